@@ -0,0 +1,43 @@
+import numpy as np
+
+# --- REDUÇÃO DE SÉRIES ---
+# Séries diárias longas (anos de dados) têm mais pontos do que o gráfico
+# consegue mostrar. O LTTB (Largest-Triangle-Three-Buckets, Steinarsson 2013)
+# escolhe `limite` pontos que preservam a forma da curva: picos e vales
+# continuam no gráfico, ao contrário de uma média por janela.
+MAX_PONTOS = 1000
+
+
+def lttb(x, y, limite=MAX_PONTOS):
+    """Índices dos pontos de (x, y) escolhidos pelo LTTB, em ordem crescente.
+
+    `x` precisa estar ordenado; datas podem vir como datetime64. Com até
+    `limite` pontos, devolve todos os índices.
+    """
+    n = len(y)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    x = np.asarray(x).astype('int64', copy=False).astype('float64') if np.asarray(x).dtype.kind == 'M' \
+        else np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # Primeiro e último pontos ficam; o miolo é dividido em limite - 2 baldes
+    bordas = np.linspace(1, n - 1, limite - 1).astype('int64')
+    indices = np.empty(limite, dtype='int64')
+    indices[0], indices[-1] = 0, n - 1
+    # Média de cada balde, usada como terceiro vértice do triângulo do balde anterior
+    somas_x = np.add.reduceat(x[1:n - 1], bordas[:-1] - 1)
+    somas_y = np.add.reduceat(y[1:n - 1], bordas[:-1] - 1)
+    tamanhos = np.diff(bordas)
+    medias_x = np.append(somas_x / tamanhos, x[-1])
+    medias_y = np.append(somas_y / tamanhos, y[-1])
+
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio, fim = bordas[balde], bordas[balde + 1]
+        # Dobro da área do triângulo (anterior, candidato, média do próximo balde)
+        areas = np.abs((x[anterior] - medias_x[balde + 1]) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (medias_y[balde + 1] - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[balde + 1] = anterior
+    return indices
@@ -1,58 +1,120 @@
-import pandas as pd
-from dash import Dash, dcc, html, Input, Output
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import numpy as np
+from dash import Dash, dcc, html, Input, Output, Patch
+from dash.exceptions import PreventUpdate
+from datetime import datetime
+import functools
+import json
+import os
+import threading
+import time
+import traceback
+from flask import abort, g, has_request_context, request, send_file
+
+from cacheCallbacks import CacheCallbacks
+from metricas import metricas
+from perfilador import pagina_indice, pagina_perfil, perfilador
 
 # --- CARREGAR DADOS ---
-try:
-    orders = pd.read_csv('data/olist_orders_dataset.csv', parse_dates=['order_purchase_timestamp'])
-    customers = pd.read_csv('data/olist_customers_dataset.csv')
-    order_items = pd.read_csv('data/olist_order_items_dataset.csv')
-    products = pd.read_csv('data/olist_products_dataset.csv')
-    sellers = pd.read_csv('data/olist_sellers_dataset.csv')
-    payments = pd.read_csv('data/olist_order_payments_dataset.csv')
-except FileNotFoundError as e:
-    print(f"Arquivo não encontrado: {e}")
-    print("Certifique-se que a pasta 'data' existe com todos os arquivos CSV.")
-    exit()
-
-# --- PREPARAÇÃO E JUNÇÃO ---
-# Unir orders + customers (para ter estado)
-data = orders.merge(customers, on='customer_id', how='left')
-
-# Unir orders + order_items para receita
-order_items['price'] = pd.to_numeric(order_items['price'], errors='coerce').fillna(0)
-order_items['freight_value'] = pd.to_numeric(order_items['freight_value'], errors='coerce').fillna(0)
-order_revenue = order_items.groupby('order_id').agg({
-    'price': 'sum',
-    'freight_value': 'sum',
-    'product_id': 'count'
-}).reset_index()
-order_revenue['total_value'] = order_revenue['price'] + order_revenue['freight_value']
-order_revenue = order_revenue.rename(columns={'product_id': 'items_count'})
-
-data = data.merge(order_revenue, on='order_id', how='left')
-
-# Unir com produtos para categorias
-order_items_with_products = order_items.merge(products[['product_id', 'product_category_name']], on='product_id', how='left')
-
-# Unir com pagamentos
-if 'payments' in locals():
-    payments['payment_value'] = pd.to_numeric(payments['payment_value'], errors='coerce').fillna(0)
-    payment_summary = payments.groupby('order_id').agg({
-        'payment_value': 'sum',
-        'payment_type': 'first',
-        'payment_installments': 'mean'
-    }).reset_index()
-    data = data.merge(payment_summary, on='order_id', how='left')
-
-# Criar colunas auxiliares para data
-data['order_month'] = data['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
-data['order_year'] = data['order_purchase_timestamp'].dt.year
-data['order_quarter'] = data['order_purchase_timestamp'].dt.quarter
-data['order_weekday'] = data['order_purchase_timestamp'].dt.day_name()
+# Leitura, junções e colunas auxiliares ficam em carregadorDados.py, que
+# reaproveita o cache Parquet em data/cache quando os CSVs não mudaram.
+# O observador guarda o conjunto atual (data, cubo diário, ...) e o troca
+# quando chegam arquivos novos em data/.
+#
+# Importar este módulo não lê dados nem importa pandas, numpy ou
+# plotly.express: `carregar()` faz tudo isso, e `carregar_em_segundo_plano()`
+# faz o mesmo numa thread, com o servidor já no ar. Até lá a página mostra
+# um aviso de carregamento e /ready responde 503.
+observador = None
+dados_prontos = threading.Event()
+erro_carga = None
+INTERVALO_ESPERA_MS = 2000   # a página de carregamento consulta /ready nesse intervalo
+# As requisições esperam as importações da thread de carga: o plotly serializa
+# as respostas consultando o pandas em sys.modules, que fica incompleto
+# enquanto o pandas está sendo importado
+importacoes_concluidas = threading.Event()
+importacoes_concluidas.set()
+
+# Mesma variável de carregadorDados.CONTAGEM_EXATA, lida aqui sem importar o pandas
+CONTAGEM_EXATA = os.environ.get('DASH_CONTAGEM_EXATA') == '1'
+
+# Cache dos resultados dos callbacks, compartilhado entre workers e invalidado pela versão dos dados
+cache_callbacks = CacheCallbacks()
+
+
+def obter_versao_dados():
+    if not dados_prontos.is_set():
+        raise PreventUpdate   # página aberta antes de a carga terminar
+    return observador.atual.versao
+
+
+def carregar():
+    """Carrega os dados e monta as figuras base, bloqueando até o fim.
+
+    Levanta carregadorDados.ArquivoAusente se faltar algum CSV. Chamadas
+    seguintes não fazem nada.
+    """
+    global observador
+    inicio = time.perf_counter()
+    try:
+        import plotly.express  # noqa: F401
+        from observadorDados import ObservadorDados
+    finally:
+        importacoes_concluidas.set()
+    if dados_prontos.is_set():
+        return
+    tempos_carga = {'importacoes': time.perf_counter() - inicio}
+
+    novo = ObservadorDados()
+    novo.ao_trocar(_ao_trocar_dados)
+    novo.carregar(tempos_carga)
+    inicio = time.perf_counter()
+    FIGURAS_BASE.update(montar_figuras_base())
+    tempos_carga['figuras_base'] = time.perf_counter() - inicio
+    for etapa, segundos in tempos_carga.items():
+        metricas.observar('dash_carga_segundos', segundos, etapa=etapa)
+
+    observador = novo
+    dados_prontos.set()
+
+
+def carregar_em_segundo_plano(observar=False, encerrar_se_falhar=False):
+    """Roda `carregar()` numa thread e volta na hora; com `observar`, inicia o
+    observador de dados quando a carga terminar.
+
+    Se faltar algum CSV, a página e o /ready mostram o erro. Qualquer outra
+    falha também, ou, com `encerrar_se_falhar` (workers do gunicorn), encerra
+    o processo para que o gunicorn suba outro no lugar.
+    """
+    def falhar(e):
+        global erro_carga
+        traceback.print_exc()
+        if encerrar_se_falhar:
+            print("Falha ao carregar os dados: encerrando o worker")
+            os._exit(1)
+        erro_carga = f"Falha ao carregar os dados: {e}"
+
+    def executar():
+        global erro_carga
+        inicio = time.perf_counter()
+        try:
+            carregar()
+        except FileNotFoundError as e:
+            from carregadorDados import ArquivoAusente
+            if not isinstance(e, ArquivoAusente):
+                falhar(e)
+                return
+            erro_carga = f"Arquivo não encontrado: {e}"
+            print(erro_carga)
+            print("Certifique-se que a pasta 'data' existe com todos os arquivos CSV.")
+            return
+        except Exception as e:
+            falhar(e)
+            return
+        print(f"✅ Dados prontos em {time.perf_counter() - inicio:.1f}s")
+        if observar:
+            iniciar_observador()
+
+    importacoes_concluidas.clear()
+    threading.Thread(target=executar, name='carga-dados', daemon=True).start()
 
 # --- CONFIGURAÇÕES DE ESTILO ---
 COLORS = {
@@ -72,7 +134,9 @@ COLORS = {
 external_stylesheets = ['https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css']
 
 # --- DASH APP ---
-app = Dash(__name__, external_stylesheets=external_stylesheets)
+# O layout muda com a carga (aviso de carregamento → painel): os callbacks do
+# painel não são validados contra o layout da página de carregamento
+app = Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True)
 app.title = "Dashboard EJ - Análise Financeira"
 
 # Estilo CSS customizado
@@ -201,9 +265,95 @@ app.index_string = '''
 </html>
 '''
 
-app.layout = html.Div([
-    # Header
-    html.Div([
+# --- FIGURAS BASE ---
+# Layout, template e escalas de cor de cada gráfico são montados uma vez e vão
+# junto com a página; os callbacks só mandam os dados novos (Patch do Dash).
+# Montados por `carregar()`, que também importa o plotly.express.
+AGRUPAMENTOS = {   # valor do dropdown: (frequência do pandas, título)
+    'day': ('D', "Diária"),
+    'month': ('M', "Mensal"),
+    'quarter': ('Q', "Trimestral"),
+    'year': ('Y', "Anual"),
+}
+ESTILO_GRAFICO = dict(title_font_size=16, title_x=0.02, plot_bgcolor='rgba(0,0,0,0)',
+                      paper_bgcolor='rgba(0,0,0,0)', height=400)
+
+
+def _barras_base(x, y, titulo, escala, orientation=None):
+    import pandas as pd
+    import plotly.express as px
+
+    # px.bar sobre um DataFrame vazio: mesma aparência do gráfico completo, sem dados
+    fig = px.bar(pd.DataFrame({x: pd.Series(dtype='float64' if orientation else 'object'),
+                               y: pd.Series(dtype='object' if orientation else 'float64')}),
+                 x=x, y=y, orientation=orientation, title=titulo, template='plotly_white',
+                 color=x if orientation else y, color_continuous_scale=escala)
+    fig.update_layout(showlegend=False, **ESTILO_GRAFICO)
+    return fig
+
+
+def montar_figuras_base():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    try:
+        import orjson  # noqa: F401
+        pio.json.config.default_engine = 'orjson'   # serialização das respostas mais rápida
+    except ImportError:
+        pass
+
+    fig_trend = go.Figure(go.Scatter(
+        x=[], y=[],
+        mode='lines+markers',
+        name='Receita',
+        line=dict(width=3, color=COLORS['primary']),
+        marker=dict(size=8, color=COLORS['primary'])
+    ))
+    fig_trend.update_layout(
+        title='📈 Evolução da Receita Mensal',
+        title_font_size=18,
+        title_x=0.02,
+        template='plotly_white',
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=False
+    )
+
+    fig_payment = px.pie(values=[], names=[], title='💳 Métodos de Pagamento', template='plotly_white',
+                         color_discrete_sequence=[COLORS['primary'], COLORS['secondary'],
+                                                  COLORS['accent'], COLORS['success']])
+    fig_payment.update_layout(**ESTILO_GRAFICO)
+
+    # Caixas com estatísticas já calculadas (dos esboços de quantis): bigodes em p5 e p95
+    fig_distribution = go.Figure([
+        go.Box(name='Valor do pedido', marker_color=COLORS['primary'],
+               q1=[None], median=[None], q3=[None], lowerfence=[None], upperfence=[None]),
+        go.Box(name='Frete', marker_color=COLORS['accent'],
+               q1=[None], median=[None], q3=[None], lowerfence=[None], upperfence=[None]),
+    ])
+    fig_distribution.update_layout(title='📦 Valores por Pedido (p5, p25, mediana, p75, p95)',
+                                   template='plotly_white', showlegend=False,
+                                   yaxis=dict(type='log', title='R$'), **ESTILO_GRAFICO)
+
+    return {
+        'distribution-box': fig_distribution,
+        'revenue-trend': fig_trend,
+        'orders-by-state': _barras_base('pedidos', 'customer_state', '🗺️ Top 10 Estados',
+                                        [[0, COLORS['primary']], [1, COLORS['secondary']]], 'h'),
+        'payment-methods': fig_payment,
+        'category-analysis': _barras_base('vendas', 'categoria', '🛍️ Vendas por Categoria',
+                                          [[0, COLORS['accent']], [1, COLORS['primary']]], 'h'),
+        'weekday-pattern': _barras_base('weekday_pt', 'pedidos', '📅 Pedidos por Dia da Semana',
+                                        [[0, COLORS['secondary']], [1, COLORS['primary']]]),
+    }
+
+
+FIGURAS_BASE = {}
+
+
+def montar_cabecalho():
+    return html.Div([
         html.Div([
             html.H1([
                 html.I(className="fas fa-chart-line", style={'marginRight': '15px'}),
@@ -217,125 +367,396 @@ app.layout = html.Div([
             html.P("Análise completa de vendas e performance da Empresa Junior", 
                    style={'textAlign': 'center', 'margin': '15px 0 0 0', 'opacity': '0.9', 'fontSize': '1.1rem'})
         ])
-    ], className="header"),
+    ], className="header")
+
+
+def montar_layout_carregando():
+    # Enquanto a carga roda, a página consulta /ready e se recarrega quando os dados ficam prontos
+    if erro_carga:
+        aviso = [html.H3([html.I(className="fas fa-exclamation-triangle", style={'marginRight': '12px'}),
+                          "Não foi possível carregar os dados"], className="section-title"),
+                 html.P(erro_carga, style={'color': '#DC3545'})]
+    else:
+        aviso = [html.H3([html.I(className="fas fa-spinner fa-spin", style={'marginRight': '12px'}),
+                          "Carregando dados..."], className="section-title"),
+                 html.P("O painel aparece sozinho assim que os dados estiverem prontos.",
+                        style={'color': '#6C757D'}),
+                 dcc.Interval(id='espera-dados', interval=INTERVALO_ESPERA_MS)]
+    return html.Div([
+        montar_cabecalho(),
+        html.Div(aviso, className="filters-container", style={'maxWidth': '1400px', 'margin': '0 auto'})
+    ])
+
+
+def montar_layout():
+    # Montado a cada carregamento da página, para o calendário refletir os dados atuais
+    if not dados_prontos.is_set():
+        return montar_layout_carregando()
+    data_inicial, data_final = observador.atual.periodo()
+    return html.Div([
+        # Header
+        montar_cabecalho(),
     
-    # Container principal
-    html.Div([
-        # Filtros
+        # Container principal
         html.Div([
-            html.H3([
-                html.I(className="fas fa-sliders-h", style={'marginRight': '12px'}),
-                "Controles de Análise"
-            ], className="section-title"),
-            
+            # Filtros
             html.Div([
+                html.H3([
+                    html.I(className="fas fa-sliders-h", style={'marginRight': '12px'}),
+                    "Controles de Análise"
+                ], className="section-title"),
+            
                 html.Div([
-                    html.Label("Período de Análise:", className="filter-label"),
-                    html.P("💡 As variações são calculadas comparando com o período anterior de mesmo tamanho", 
-                           style={'fontSize': '0.8rem', 'color': '#6C757D', 'margin': '5px 0 10px 0', 'fontStyle': 'italic'}),
-                    dcc.DatePickerRange(
-                        id='date-range',
-                        min_date_allowed=data['order_purchase_timestamp'].min(),
-                        max_date_allowed=data['order_purchase_timestamp'].max(),
-                        start_date=data['order_purchase_timestamp'].min(),
-                        end_date=data['order_purchase_timestamp'].max(),
-                        display_format='DD/MM/YYYY',
-                        style={'width': '100%'},
-                        start_date_placeholder_text="Data inicial",
-                        end_date_placeholder_text="Data final"
-                    )
-                ], className="filter-group", style={'flex': '1', 'marginRight': '20px'}),
+                    html.Div([
+                        html.Label("Período de Análise:", className="filter-label"),
+                        html.P("💡 As variações são calculadas comparando com o período anterior de mesmo tamanho", 
+                               style={'fontSize': '0.8rem', 'color': '#6C757D', 'margin': '5px 0 10px 0', 'fontStyle': 'italic'}),
+                        dcc.DatePickerRange(
+                            id='date-range',
+                            min_date_allowed=data_inicial,
+                            max_date_allowed=data_final,
+                            start_date=data_inicial,
+                            end_date=data_final,
+                            display_format='DD/MM/YYYY',
+                            style={'width': '100%'},
+                            start_date_placeholder_text="Data inicial",
+                            end_date_placeholder_text="Data final"
+                        )
+                    ], className="filter-group", style={'flex': '1', 'marginRight': '20px'}),
                 
-                html.Div([
-                    html.Label("Agrupamento Temporal:", className="filter-label"),
-                    dcc.Dropdown(
-                        id='time-grouping',
-                        options=[
-                            {'label': '📅 Mensal', 'value': 'month'},
-                            {'label': '📊 Trimestral', 'value': 'quarter'},
-                            {'label': '📈 Anual', 'value': 'year'}
-                        ],
-                        value='month',
-                        clearable=False,
-                        style={'width': '100%'}
-                    )
-                ], className="filter-group", style={'flex': '1'})
-            ], style={'display': 'flex', 'alignItems': 'end'})
-        ], className="filters-container"),
-
-        # KPIs principais
-        html.Div([
-            html.H3([
-                html.I(className="fas fa-tachometer-alt", style={'marginRight': '12px'}),
-                "Indicadores de Performance"
-            ], className="section-title"),
-            
+                    html.Div([
+                        html.Label("Agrupamento Temporal:", className="filter-label"),
+                        dcc.Dropdown(
+                            id='time-grouping',
+                            options=[
+                                {'label': '🗓️ Diário', 'value': 'day'},
+                                {'label': '📅 Mensal', 'value': 'month'},
+                                {'label': '📊 Trimestral', 'value': 'quarter'},
+                                {'label': '📈 Anual', 'value': 'year'}
+                            ],
+                            value='month',
+                            clearable=False,
+                            style={'width': '100%'}
+                        )
+                    ], className="filter-group", style={'flex': '1'})
+                ], style={'display': 'flex', 'alignItems': 'end'})
+            ], className="filters-container"),
+
+            # KPIs principais
             html.Div([
-                html.Div(id='total-revenue', style={'flex': '1'}),
-                html.Div(id='total-orders', style={'flex': '1'}),
-                html.Div(id='avg-ticket', style={'flex': '1'}),
-                html.Div(id='total-customers', style={'flex': '1'}),
-            ], style={
-                'display': 'flex', 
-                'gap': '20px',
-                'marginBottom': '30px',
-                'flexWrap': 'wrap'
-            })
-        ]),
-
-        # KPIs secundários
-        html.Div([
-            html.H3([
-                html.I(className="fas fa-chart-pie", style={'marginRight': '12px'}),
-                "Métricas Operacionais"
-            ], className="section-title"),
+                html.H3([
+                    html.I(className="fas fa-tachometer-alt", style={'marginRight': '12px'}),
+                    "Indicadores de Performance"
+                ], className="section-title"),
             
+                html.Div([
+                    html.Div(id='total-revenue', style={'flex': '1'}),
+                    html.Div(id='total-orders', style={'flex': '1'}),
+                    html.Div(id='avg-ticket', style={'flex': '1'}),
+                    html.Div(id='total-customers', style={'flex': '1'}),
+                ], style={
+                    'display': 'flex', 
+                    'gap': '20px',
+                    'marginBottom': '30px',
+                    'flexWrap': 'wrap'
+                })
+            ]),
+
+            # KPIs secundários
             html.Div([
-                html.Div(id='avg-items', style={'flex': '1'}),
-                html.Div(id='avg-freight', style={'flex': '1'}),
-                html.Div(id='conversion-rate', style={'flex': '1'}),
-            ], style={
-                'display': 'flex', 
-                'gap': '20px',
-                'marginBottom': '40px',
-                'flexWrap': 'wrap'
-            })
-        ]),
-
-        # Gráficos principais
-        html.Div([
-            html.Div([
-                dcc.Graph(id='revenue-trend')
-            ], className="chart-container", style={'marginBottom': '20px'}),
+                html.H3([
+                    html.I(className="fas fa-chart-pie", style={'marginRight': '12px'}),
+                    "Métricas Operacionais"
+                ], className="section-title"),
+            
+                html.Div([
+                    html.Div(id='avg-items', style={'flex': '1'}),
+                    html.Div(id='avg-freight', style={'flex': '1'}),
+                    html.Div(id='conversion-rate', style={'flex': '1'}),
+                ], style={
+                    'display': 'flex', 
+                    'gap': '20px',
+                    'marginBottom': '40px',
+                    'flexWrap': 'wrap'
+                })
+            ]),
 
+            # Gráficos principais
             html.Div([
                 html.Div([
-                    dcc.Graph(id='orders-by-state')
-                ], style={'flex': '1', 'marginRight': '10px'}),
+                    dcc.Graph(id='revenue-trend', figure=FIGURAS_BASE['revenue-trend'])
+                ], className="chart-container", style={'marginBottom': '20px'}),
+
+                html.Div([
+                    html.Div([
+                        dcc.Graph(id='orders-by-state', figure=FIGURAS_BASE['orders-by-state'])
+                    ], style={'flex': '1', 'marginRight': '10px'}),
                 
+                    html.Div([
+                        dcc.Graph(id='payment-methods', figure=FIGURAS_BASE['payment-methods'])
+                    ], style={'flex': '1', 'marginLeft': '10px'})
+                ], style={'display': 'flex', 'gap': '20px'}, className="chart-container"),
+
                 html.Div([
-                    dcc.Graph(id='payment-methods')
-                ], style={'flex': '1', 'marginLeft': '10px'})
-            ], style={'display': 'flex', 'gap': '20px'}, className="chart-container"),
+                    html.Div([
+                        dcc.Graph(id='category-analysis', figure=FIGURAS_BASE['category-analysis'])
+                    ], style={'flex': '1', 'marginRight': '10px'}),
+                
+                    html.Div([
+                        dcc.Graph(id='weekday-pattern', figure=FIGURAS_BASE['weekday-pattern'])
+                    ], style={'flex': '1', 'marginLeft': '10px'})
+                ], style={'display': 'flex', 'gap': '20px'}, className="chart-container"),
+            ]),
 
+            # Distribuição dos valores por pedido
             html.Div([
+                html.H3([
+                    html.I(className="fas fa-chart-bar", style={'marginRight': '12px'}),
+                    "Distribuição dos Pedidos"
+                ], className="section-title"),
+
                 html.Div([
-                    dcc.Graph(id='category-analysis')
-                ], style={'flex': '1', 'marginRight': '10px'}),
-                
+                    html.Div(id='median-order', style={'flex': '1'}),
+                    html.Div(id='p90-order', style={'flex': '1'}),
+                    html.Div(id='p99-order', style={'flex': '1'}),
+                    html.Div(id='median-freight', style={'flex': '1'}),
+                    html.Div(id='p90-freight', style={'flex': '1'}),
+                ], style={
+                    'display': 'flex',
+                    'gap': '20px',
+                    'marginBottom': '20px',
+                    'flexWrap': 'wrap'
+                }),
+
                 html.Div([
-                    dcc.Graph(id='weekday-pattern')
-                ], style={'flex': '1', 'marginLeft': '10px'})
-            ], style={'display': 'flex', 'gap': '20px'}, className="chart-container"),
-        ])
-    ], style={
-        'maxWidth': '1400px', 
-        'margin': '0 auto', 
-        'padding': '0 20px'
-    })
-])
+                    dcc.Graph(id='distribution-box', figure=FIGURAS_BASE['distribution-box'])
+                ], className="chart-container")
+            ], style={'marginTop': '40px'})
+        ], style={
+            'maxWidth': '1400px', 
+            'margin': '0 auto', 
+            'padding': '0 20px'
+        })
+    ])
+
+
+app.layout = montar_layout
+
+app.clientside_callback(
+    """
+    function(n_intervals) {
+        fetch('/ready').then(function(resposta) {
+            if (resposta.ok) { window.location.reload(); }
+        });
+        return window.dash_clientside.no_update;
+    }
+    """,
+    Output('espera-dados', 'disabled'),
+    Input('espera-dados', 'n_intervals')
+)
+
+# --- RECORTE DO PERÍODO ---
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+@functools.lru_cache(maxsize=64)
+def _recorte_periodo(conjunto, start_dt, end_dt):
+    import pandas as pd
+    from carregadorDados import fatia_por_periodo
+
+    n_dias = end_dt - start_dt + pd.Timedelta(days=1)
+    end_excl = start_dt + n_dias
+
+    # Período anterior para comparação (mesmo número de dias, imediatamente antes)
+    prev_start = start_dt - n_dias
+    prev_end = start_dt
+
+    return {
+        'start_dt': start_dt,
+        'end_dt': end_dt,
+        'prev_start': prev_start,
+        'prev_end': prev_end,
+        # Recorte do cubo diário do período atual (ordenado por data), para os gráficos
+        'cubo_atual': fatia_por_periodo(conjunto.cubo, 'dia', start_dt, end_excl),
+        # Totais das medidas somáveis dos dois períodos, pelas somas acumuladas
+        'totais_atual': conjunto.acumulados.totais(start_dt, end_excl),
+        'totais_anterior': conjunto.acumulados.totais(prev_start, prev_end),
+        # Quantis de QUANTIS por medida, dos esboços diários
+        'quantis': {medida: dict(zip(QUANTIS, esboco.quantis(start_dt, end_excl, QUANTIS)))
+                    for medida, esboco in conjunto.quantis.items()},
+        'categorias_atual': fatia_por_periodo(conjunto.cubo_categorias, 'dia', start_dt, end_excl),
+        # Clientes distintos não são somáveis entre dias: HyperLogLog diário (ou exato)
+        'clientes_atual': conjunto.clientes_distintos(start_dt, end_excl),
+        'clientes_anterior': conjunto.clientes_distintos(prev_start, prev_end),
+    }
+
+
+def obter_recorte(start_date, end_date):
+    """Recorte memoizado do período [start_date, end_date], com granularidade de dia.
+
+    Compartilhado por todos os callbacks: mudar só o agrupamento temporal ou
+    disparar vários gráficos para o mesmo período não refaz os recortes.
+    Cada callback pega um único recorte, todo ele do mesmo conjunto de dados.
+    """
+    import pandas as pd
+
+    with metricas.etapa('recorte'):
+        return _recorte_periodo(observador.atual,
+                                pd.to_datetime(start_date).normalize(),
+                                pd.to_datetime(end_date).normalize())
+
+
+def _ao_trocar_dados(conjunto):
+    # Recortes memoizados prendem o conjunto antigo na memória
+    _recorte_periodo.cache_clear()
+    cache_callbacks.invalidar_outras_versoes(conjunto.versao)
+
+
+def iniciar_observador():
+    """Recarga dos arquivos novos de data/ em segundo plano (DASH_OBSERVAR_DADOS=0 desliga).
+
+    Chamada no processo que atende as requisições: em produção, em cada worker
+    depois do fork (threads não sobrevivem ao fork), ver servidor.py. Antes
+    de os dados estarem carregados, não faz nada.
+    """
+    if os.environ.get('DASH_OBSERVAR_DADOS', '1') == '1' and dados_prontos.is_set():
+        observador.iniciar()
+
+
+# --- MÉTRICAS ---
+# Cada callback mede o seu tempo total e o das etapas (recorte, agregação,
+# figura); a requisição inteira inclui ainda a serialização da resposta pelo
+# Dash. Tudo vai para os histogramas de /metrics e para uma linha JSON por
+# requisição no log. Abaixo do cache, chamadas armadas no perfilador rodam sob
+# o cProfile: resultados vindos do cache não gastam as chamadas armadas.
+def instrumentar(nome):
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args):
+            inicio = time.perf_counter()
+            with metricas.callback(nome) as etapas:
+                resultado = funcao(*args)
+            segundos = time.perf_counter() - inicio
+            metricas.observar('dash_callback_segundos', segundos, callback=nome)
+            if has_request_context():
+                g.callback = {'callback': nome, 'entradas': args, 'segundos': segundos, 'etapas': etapas}
+            return resultado
+        return envoltorio
+    return decorador
+
+
+def perfilar(nome):
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args):
+            return perfilador.executar(nome, funcao, args, obter_versao_dados())
+        return envoltorio
+    return decorador
+
+
+@app.server.before_request
+def _iniciar_requisicao():
+    g.inicio = time.perf_counter()
+    if request.path != '/ready':
+        importacoes_concluidas.wait()
+    perfilador.armar_pela_requisicao(request.headers)
+
+
+@app.server.after_request
+def _registrar_requisicao(resposta):
+    if not request.path.endswith('_dash-update-component'):
+        return resposta
+    segundos = time.perf_counter() - g.inicio
+    tamanho = resposta.calculate_content_length() or 0
+    callback = g.get('callback')
+    nome = callback['callback'] if callback else '-'
+    metricas.observar('dash_requisicao_segundos', segundos, callback=nome)
+    metricas.observar('dash_resposta_bytes', tamanho, callback=nome)
+    linha = {'em': datetime.now().isoformat(timespec='milliseconds'), 'callback': nome,
+             'status': resposta.status_code, 'ms': round(segundos * 1000, 2), 'bytes': tamanho}
+    if callback:
+        serializacao = segundos - callback['segundos']
+        metricas.observar('dash_serializacao_segundos', serializacao, callback=nome)
+        linha.update(entradas=callback['entradas'], ms_callback=round(callback['segundos'] * 1000, 2),
+                     ms_serializacao=round(serializacao * 1000, 2),
+                     etapas_ms={etapa: round(s * 1000, 2) for etapa, s in callback['etapas'].items()})
+    print(json.dumps(linha, ensure_ascii=False, default=str), flush=True)
+    return resposta
+
+
+@app.server.route('/metrics')
+def expor_metricas():
+    return metricas.texto_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@app.server.route('/ready')
+def prontidao():
+    # 200 só com os dados e os agregados no lugar; antes disso (ou se a carga falhou), 503
+    if dados_prontos.is_set():
+        conjunto = observador.atual
+        return {'pronto': True, 'versao': conjunto.versao, 'pedidos': len(conjunto.data)}, 200
+    return {'pronto': False, 'erro': erro_carga}, 503
+
+
+# Cabeçalhos que um proxy reverso acrescenta: a requisição veio de fora, mesmo com
+# remote_addr local
+CABECALHOS_PROXY = ('X-Forwarded-For', 'X-Real-IP', 'Forwarded')
+
+
+def _acesso_admin():
+    # Com DASH_TOKEN_ADMIN, só quem traz o token; sem ele, só a própria máquina, sem proxy
+    if perfilador.token:
+        return perfilador.autorizado(request.args.get('token') or request.headers.get('X-Token-Admin'))
+    return request.remote_addr in ('127.0.0.1', '::1') and \
+        not any(cabecalho in request.headers for cabecalho in CABECALHOS_PROXY)
+
+
+@app.server.route('/perfis')
+def listar_perfis():
+    if not _acesso_admin():
+        abort(403)
+    return pagina_indice(perfilador.perfis()[:50], request.args.get('token', ''))
+
+
+@app.server.route('/perfis/<nome>')
+def mostrar_perfil(nome):
+    if not _acesso_admin():
+        abort(403)
+    baixar = nome.endswith('.prof')
+    nome = nome.removesuffix('.prof')
+    caminho = perfilador.caminho(nome)
+    if caminho is None:
+        abort(404)
+    if baixar:
+        return send_file(os.path.abspath(caminho), as_attachment=True)
+    return pagina_perfil(nome, perfilador.relatorio(nome))
+
+
+# --- COMPONENTES ---
+def create_kpi_card(title, value, icon, color, change=None, prefix="", suffix=""):
+    change_element = []
+    if change is not None:
+        change_class = "metric-up" if change >= 0 else "metric-down"
+        change_icon = "fas fa-arrow-up" if change >= 0 else "fas fa-arrow-down"
+        change_element = [
+            html.Div([
+                html.I(className=change_icon, style={'marginRight': '5px'}),
+                f"{change:+.1f}% vs período anterior"
+            ], className=f"metric-change {change_class}")
+        ]
+    
+    return html.Div([
+        html.I(className=f"{icon} kpi-icon", style={'color': color}),
+        html.H4(title, className="kpi-label"),
+        html.H2(f"{prefix}{value}{suffix}", className="kpi-value"),
+        *change_element
+    ], className="kpi-card")
+
 
 # --- CALLBACKS ---
+# Um callback por grupo de saídas com as mesmas entradas: só a tendência de
+# receita depende do agrupamento temporal. Cada callback é uma requisição
+# separada do navegador, então os gráficos são montados em paralelo.
 @app.callback(
     [Output('total-revenue', 'children'),
      Output('total-orders', 'children'),
@@ -343,266 +764,312 @@ app.layout = html.Div([
      Output('total-customers', 'children'),
      Output('avg-items', 'children'),
      Output('avg-freight', 'children'),
-     Output('conversion-rate', 'children'),
-     Output('revenue-trend', 'figure'),
-     Output('orders-by-state', 'figure'),
-     Output('payment-methods', 'figure'),
-     Output('category-analysis', 'figure'),
-     Output('weekday-pattern', 'figure')],
+     Output('conversion-rate', 'children')],
     [Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('time-grouping', 'value')]
+     Input('date-range', 'end_date')]
 )
-def update_dashboard(start_date, end_date, time_grouping):
-    # Filtrar dados do período atual
-    filtered = data[(data['order_purchase_timestamp'] >= start_date) & 
-                   (data['order_purchase_timestamp'] <= end_date)]
-    
-    # Calcular período anterior para comparação (mesmo tamanho do período atual)
-    start_dt = pd.to_datetime(start_date)
-    end_dt = pd.to_datetime(end_date)
-    date_diff = end_dt - start_dt
-    
-    prev_start = start_dt - date_diff
-    prev_end = start_dt
-    
-    prev_data = data[(data['order_purchase_timestamp'] >= prev_start) & 
-                    (data['order_purchase_timestamp'] < prev_end)]
-
-    print(f"📅 Período atual: {start_date} a {end_date} ({len(filtered)} registros)")
-    print(f"📅 Período anterior: {prev_start.date()} a {prev_end.date()} ({len(prev_data)} registros)")
+@instrumentar('kpis')
+# Contagem exata e estimada de clientes não dividem as entradas do cache
+@cache_callbacks.memoizar('kpis_exata' if CONTAGEM_EXATA else 'kpis', obter_versao_dados)
+@perfilar('kpis')
+def update_kpis(start_date, end_date):
+    recorte = obter_recorte(start_date, end_date)
+    atual = recorte['totais_atual']
+    anterior = recorte['totais_anterior']
 
-    # Métricas principais
-    total_revenue = filtered['price'].sum()
-    prev_revenue = prev_data['price'].sum() if len(prev_data) > 0 else 0
-    revenue_change = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
+    with metricas.etapa('agregacao'):
+        # Métricas principais
+        total_revenue = atual['price']
+        prev_revenue = anterior['price']
+        revenue_change = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
     
-    total_orders = filtered['order_id'].nunique()
-    prev_orders = prev_data['order_id'].nunique() if len(prev_data) > 0 else 0
-    orders_change = ((total_orders - prev_orders) / prev_orders * 100) if prev_orders > 0 else 0
+        total_orders = int(atual['pedidos'])
+        prev_orders = int(anterior['pedidos'])
+        orders_change = ((total_orders - prev_orders) / prev_orders * 100) if prev_orders > 0 else 0
     
-    avg_ticket = total_revenue / total_orders if total_orders else 0
-    prev_avg_ticket = prev_revenue / prev_orders if prev_orders else 0
-    ticket_change = ((avg_ticket - prev_avg_ticket) / prev_avg_ticket * 100) if prev_avg_ticket > 0 else 0
+        avg_ticket = total_revenue / total_orders if total_orders else 0
+        prev_avg_ticket = prev_revenue / prev_orders if prev_orders else 0
+        ticket_change = ((avg_ticket - prev_avg_ticket) / prev_avg_ticket * 100) if prev_avg_ticket > 0 else 0
     
-    total_customers = filtered['customer_id'].nunique()
-    prev_customers = prev_data['customer_id'].nunique() if len(prev_data) > 0 else 0
-    customers_change = ((total_customers - prev_customers) / prev_customers * 100) if prev_customers > 0 else 0
+        # Cada pedido tem um único customer_id: o HyperLogLog (erro ~1,6%) pode estimar
+        # mais clientes que pedidos, a contagem exata não
+        total_customers = min(recorte['clientes_atual'], total_orders)
+        prev_customers = min(recorte['clientes_anterior'], prev_orders)
+        customers_change = ((total_customers - prev_customers) / prev_customers * 100) if prev_customers > 0 else 0
     
-    # Debug das variações
-    print(f"💰 Receita: R$ {total_revenue:.2f} (era R$ {prev_revenue:.2f}) = {revenue_change:+.1f}%")
-    print(f"🛒 Pedidos: {total_orders} (eram {prev_orders}) = {orders_change:+.1f}%")
-    
-    # Métricas operacionais
-    avg_items = filtered['items_count'].mean() if len(filtered) > 0 else 0
-    avg_freight = filtered['freight_value'].mean() if len(filtered) > 0 else 0
-    conversion_rate = (total_orders / total_customers * 100) if total_customers > 0 else 0
-
-    # Função para criar KPI card
-    def create_kpi_card(title, value, icon, color, change=None, prefix="", suffix=""):
-        change_element = []
-        if change is not None:
-            change_class = "metric-up" if change >= 0 else "metric-down"
-            change_icon = "fas fa-arrow-up" if change >= 0 else "fas fa-arrow-down"
-            change_element = [
-                html.Div([
-                    html.I(className=change_icon, style={'marginRight': '5px'}),
-                    f"{change:+.1f}% vs período anterior"
-                ], className=f"metric-change {change_class}")
-            ]
-        
-        return html.Div([
-            html.I(className=f"{icon} kpi-icon", style={'color': color}),
-            html.H4(title, className="kpi-label"),
-            html.H2(f"{prefix}{value}{suffix}", className="kpi-value"),
-            *change_element
-        ], className="kpi-card")
-
-    # KPI Cards
-    kpi_revenue = create_kpi_card(
-        "Receita Total", 
-        f"{total_revenue:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-        "fas fa-dollar-sign", COLORS['success'], revenue_change, "R$ "
-    )
+        # Métricas operacionais (médias sobre pedidos com itens)
+        pedidos_com_itens = atual['pedidos_com_itens']
+        avg_items = atual['items_count'] / pedidos_com_itens if pedidos_com_itens > 0 else 0
+        avg_freight = atual['freight_value'] / pedidos_com_itens if pedidos_com_itens > 0 else 0
+        conversion_rate = (total_orders / total_customers * 100) if total_customers > 0 else 0
 
-    kpi_orders = create_kpi_card(
-        "Total de Pedidos", 
-        f"{total_orders:,}".replace(',', '.'),
-        "fas fa-shopping-cart", COLORS['primary'], orders_change
-    )
+    with metricas.etapa('figura'):
+        # Clientes e conversão vêm da estimativa, a menos que DASH_CONTAGEM_EXATA=1
+        aproximado = "" if CONTAGEM_EXATA else "≈ "
 
-    kpi_avg_ticket = create_kpi_card(
-        "Ticket Médio", 
-        f"{avg_ticket:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-        "fas fa-receipt", COLORS['secondary'], ticket_change, "R$ "
-    )
+        # KPI Cards
+        kpi_revenue = create_kpi_card(
+            "Receita Total", 
+            f"{total_revenue:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "fas fa-dollar-sign", COLORS['success'], revenue_change, "R$ "
+        )
+
+        kpi_orders = create_kpi_card(
+            "Total de Pedidos", 
+            f"{total_orders:,}".replace(',', '.'),
+            "fas fa-shopping-cart", COLORS['primary'], orders_change
+        )
+
+        kpi_avg_ticket = create_kpi_card(
+            "Ticket Médio", 
+            f"{avg_ticket:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "fas fa-receipt", COLORS['secondary'], ticket_change, "R$ "
+        )
     
-    kpi_customers = create_kpi_card(
-        "Clientes Únicos", 
-        f"{total_customers:,}".replace(',', '.'),
-        "fas fa-users", COLORS['accent'], customers_change
-    )
+        kpi_customers = create_kpi_card(
+            "Clientes Únicos", 
+            f"{total_customers:,}".replace(',', '.'),
+            "fas fa-users", COLORS['accent'], customers_change, aproximado
+        )
     
-    kpi_avg_items = create_kpi_card(
-        "Itens por Pedido", 
-        f"{avg_items:.1f}",
-        "fas fa-boxes", COLORS['primary']
-    )
+        kpi_avg_items = create_kpi_card(
+            "Itens por Pedido", 
+            f"{avg_items:.1f}",
+            "fas fa-boxes", COLORS['primary']
+        )
     
-    kpi_avg_freight = create_kpi_card(
-        "Frete Médio", 
-        f"{avg_freight:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-        "fas fa-truck", COLORS['secondary'], None, "R$ "
-    )
+        kpi_avg_freight = create_kpi_card(
+            "Frete Médio", 
+            f"{avg_freight:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "fas fa-truck", COLORS['secondary'], None, "R$ "
+        )
     
-    kpi_conversion = create_kpi_card(
-        "Taxa de Conversão", 
-        f"{conversion_rate:.1f}",
-        "fas fa-percentage", COLORS['success'], None, "", "%"
-    )
+        kpi_conversion = create_kpi_card(
+            "Taxa de Conversão", 
+            f"{conversion_rate:.1f}",
+            "fas fa-percentage", COLORS['success'], None, aproximado, "%"
+        )
+
+    return (kpi_revenue, kpi_orders, kpi_avg_ticket, kpi_customers,
+            kpi_avg_items, kpi_avg_freight, kpi_conversion)
+
+
+@app.callback(
+    Output('revenue-trend', 'figure'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('time-grouping', 'value')]
+)
+@instrumentar('revenue_trend')
+@cache_callbacks.memoizar('revenue_trend', obter_versao_dados)
+@perfilar('revenue_trend')
+def update_revenue_trend(start_date, end_date, time_grouping):
+    from amostragem import lttb
+
+    cubo_atual = obter_recorte(start_date, end_date)['cubo_atual']
 
     # Gráfico de tendência de receita
-    if time_grouping == 'month':
-        period_col = 'order_month'
-        title_suffix = "Mensal"
-    elif time_grouping == 'quarter':
-        filtered['period'] = filtered['order_purchase_timestamp'].dt.to_period('Q').dt.to_timestamp()
-        period_col = 'period'
-        title_suffix = "Trimestral"
-    else:  # year
-        filtered['period'] = filtered['order_purchase_timestamp'].dt.to_period('Y').dt.to_timestamp()
+    with metricas.etapa('agregacao'):
+        freq, title_suffix = AGRUPAMENTOS[time_grouping]
         period_col = 'period'
-        title_suffix = "Anual"
     
-    trend_data = (filtered.groupby(period_col)
-                  .agg({'price': 'sum', 'order_id': 'nunique'})
-                  .reset_index())
+        trend_data = (cubo_atual.groupby(cubo_atual['dia'].dt.to_period(freq).dt.to_timestamp().rename(period_col))
+                      .agg({'price': 'sum', 'pedidos': 'sum'})
+                      .reset_index())
+        if time_grouping == 'day':
+            # Série diária: no máximo MAX_PONTOS pontos, preservando picos e vales
+            trend_data = trend_data.iloc[lttb(trend_data[period_col].to_numpy(), trend_data['price'].to_numpy())]
     
-    fig_trend = go.Figure()
-    fig_trend.add_trace(go.Scatter(
-        x=trend_data[period_col], 
-        y=trend_data['price'],
-        mode='lines+markers',
-        name='Receita',
-        line=dict(width=3, color=COLORS['primary']),
-        marker=dict(size=8, color=COLORS['primary'])
-    ))
-    
-    fig_trend.update_layout(
-        title=f'📈 Evolução da Receita {title_suffix}',
-        title_font_size=18,
-        title_x=0.02,
-        template='plotly_white',
-        hovermode='x unified',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=False
-    )
+    with metricas.etapa('figura'):
+        fig_trend = Patch()
+        fig_trend['data'][0]['x'] = trend_data[period_col].to_numpy()
+        fig_trend['data'][0]['y'] = trend_data['price'].to_numpy()
+        fig_trend['data'][0]['mode'] = 'lines' if time_grouping == 'day' else 'lines+markers'
+        fig_trend['layout']['title']['text'] = f'📈 Evolução da Receita {title_suffix}'
+
+    return fig_trend
+
+
+def _atualizar_barras(x, y, valores):
+    # Só os dados das barras; a cor acompanha o valor (eixo de cor contínuo da figura base)
+    figura = Patch()
+    figura['data'][0]['x'] = x
+    figura['data'][0]['y'] = y
+    figura['data'][0]['marker']['color'] = valores
+    return figura
+
+
+@app.callback(
+    Output('orders-by-state', 'figure'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+@instrumentar('orders_by_state')
+@cache_callbacks.memoizar('orders_by_state', obter_versao_dados)
+@perfilar('orders_by_state')
+def update_orders_by_state(start_date, end_date):
+    cubo_atual = obter_recorte(start_date, end_date)['cubo_atual']
 
     # Gráfico de pedidos por estado (Top 10)
-    state_orders = (filtered.groupby('customer_state')
-                    .agg({'order_id': 'nunique'})
-                    .reset_index()
-                    .rename(columns={'order_id': 'pedidos'})
-                    .sort_values('pedidos', ascending=True)
-                    .tail(10))
+    with metricas.etapa('agregacao'):
+        state_orders = (cubo_atual.groupby('customer_state', observed=True)
+                        .agg({'pedidos': 'sum'})
+                        .reset_index()
+                        .sort_values('pedidos', ascending=True)
+                        .tail(10))
     
-    fig_state = px.bar(state_orders, 
-                      x='pedidos', 
-                      y='customer_state',
-                      orientation='h',
-                      title='🗺️ Top 10 Estados',
-                      template='plotly_white',
-                      color='pedidos',
-                      color_continuous_scale=[[0, COLORS['primary']], [1, COLORS['secondary']]])
-    
-    fig_state.update_layout(
-        title_font_size=16,
-        title_x=0.02,
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400
-    )
+    with metricas.etapa('figura'):
+        pedidos = state_orders['pedidos'].to_numpy()
+        fig_state = _atualizar_barras(pedidos, state_orders['customer_state'].astype(str).to_numpy(), pedidos)
+
+    return fig_state
+
+
+@app.callback(
+    Output('payment-methods', 'figure'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+@instrumentar('payment_methods')
+@cache_callbacks.memoizar('payment_methods', obter_versao_dados)
+@perfilar('payment_methods')
+def update_payment_methods(start_date, end_date):
+    cubo_atual = obter_recorte(start_date, end_date)['cubo_atual']
 
     # Gráfico de métodos de pagamento
-    if 'payment_type' in filtered.columns:
-        payment_data = filtered['payment_type'].value_counts().head(6)
-        fig_payment = px.pie(
-            values=payment_data.values,
-            names=payment_data.index,
-            title='💳 Métodos de Pagamento',
-            template='plotly_white',
-            color_discrete_sequence=[COLORS['primary'], COLORS['secondary'], COLORS['accent'], COLORS['success']]
-        )
-    else:
-        fig_payment = px.pie(values=[1], names=['Dados não disponíveis'], title='💳 Métodos de Pagamento')
-    
-    fig_payment.update_layout(
-        title_font_size=16,
-        title_x=0.02,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400
-    )
+    with metricas.etapa('figura'):
+        fig_payment = Patch()
+        if 'payment_type' in cubo_atual.columns:
+            payment_data = (cubo_atual.groupby('payment_type', observed=True)['pedidos'].sum()
+                            .sort_values(ascending=False).head(6))
+            fig_payment['data'][0]['values'] = payment_data.to_numpy()
+            fig_payment['data'][0]['labels'] = payment_data.index.astype(str).to_numpy()
+        else:
+            fig_payment['data'][0]['values'] = [1]
+            fig_payment['data'][0]['labels'] = ['Dados não disponíveis']
 
-    # Análise por categoria (simulada - usando dados disponíveis)
-    category_data = pd.DataFrame({
-        'categoria': ['Eletrônicos', 'Casa & Jardim', 'Esporte', 'Moda', 'Livros', 'Outros'],
-        'vendas': np.random.randint(50, 500, 6)  # Dados simulados
-    }).sort_values('vendas', ascending=True)
-    
-    fig_category = px.bar(category_data,
-                         x='vendas',
-                         y='categoria',
-                         orientation='h',
-                         title='🛍️ Vendas por Categoria',
-                         template='plotly_white',
-                         color='vendas',
-                         color_continuous_scale=[[0, COLORS['accent']], [1, COLORS['primary']]])
+    return fig_payment
+
+
+@app.callback(
+    Output('category-analysis', 'figure'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+@instrumentar('category_analysis')
+@cache_callbacks.memoizar('category_analysis', obter_versao_dados)
+@perfilar('category_analysis')
+def update_category_analysis(start_date, end_date):
+    categorias_atual = obter_recorte(start_date, end_date)['categorias_atual']
+
+    # Análise por categoria (Top 10 por receita), a partir do cubo categoria × dia
+    with metricas.etapa('agregacao'):
+        category_data = (categorias_atual.groupby('product_category_name', observed=True, dropna=False)['price']
+                         .sum()
+                         .rename('vendas')
+                         .rename_axis('categoria')
+                         .reset_index()
+                         .sort_values('vendas', ascending=True)
+                         .tail(10))
+        category_data['categoria'] = (category_data['categoria'].astype(object)
+                                      .fillna('sem_categoria').str.replace('_', ' '))
     
-    fig_category.update_layout(
-        title_font_size=16,
-        title_x=0.02,
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400
-    )
+    with metricas.etapa('figura'):
+        vendas = category_data['vendas'].to_numpy()
+        fig_category = _atualizar_barras(vendas, category_data['categoria'].to_numpy(), vendas)
+
+    return fig_category
+
+
+@app.callback(
+    Output('weekday-pattern', 'figure'),
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+@instrumentar('weekday_pattern')
+@cache_callbacks.memoizar('weekday_pattern', obter_versao_dados)
+@perfilar('weekday_pattern')
+def update_weekday_pattern(start_date, end_date):
+    cubo_atual = obter_recorte(start_date, end_date)['cubo_atual']
 
     # Padrão por dia da semana
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    weekday_names = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
-    
-    weekday_data = (filtered.groupby('order_weekday')['order_id']
-                   .nunique().reset_index()
-                   .rename(columns={'order_id': 'pedidos'}))
+    with metricas.etapa('agregacao'):
+        weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        weekday_names = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
     
-    # Reordenar e traduzir
-    weekday_data['order'] = weekday_data['order_weekday'].map({day: i for i, day in enumerate(weekday_order)})
-    weekday_data = weekday_data.sort_values('order')
-    weekday_data['weekday_pt'] = weekday_names
+        weekday_data = (cubo_atual.groupby('order_weekday', observed=True)['pedidos']
+                       .sum().reset_index())
     
-    fig_weekday = px.bar(weekday_data,
-                        x='weekday_pt',
-                        y='pedidos',
-                        title='📅 Pedidos por Dia da Semana',
-                        template='plotly_white',
-                        color='pedidos',
-                        color_continuous_scale=[[0, COLORS['secondary']], [1, COLORS['primary']]])
+        # Reordenar e traduzir
+        weekday_data['order'] = weekday_data['order_weekday'].map({day: i for i, day in enumerate(weekday_order)})
+        weekday_data = weekday_data.sort_values('order')
+        weekday_data['weekday_pt'] = weekday_data['order'].map(dict(enumerate(weekday_names)))
     
-    fig_weekday.update_layout(
-        title_font_size=16,
-        title_x=0.02,
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=400
-    )
+    with metricas.etapa('figura'):
+        pedidos = weekday_data['pedidos'].to_numpy()
+        fig_weekday = _atualizar_barras(weekday_data['weekday_pt'].to_numpy(), pedidos, pedidos)
 
-    return (kpi_revenue, kpi_orders, kpi_avg_ticket, kpi_customers,
-            kpi_avg_items, kpi_avg_freight, kpi_conversion,
-            fig_trend, fig_state, fig_payment, fig_category, fig_weekday)
+    return fig_weekday
+
+
+@app.callback(
+    [Output('median-order', 'children'),
+     Output('p90-order', 'children'),
+     Output('p99-order', 'children'),
+     Output('median-freight', 'children'),
+     Output('p90-freight', 'children'),
+     Output('distribution-box', 'figure')],
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
+)
+@instrumentar('distribution')
+@cache_callbacks.memoizar('distribution', obter_versao_dados)
+@perfilar('distribution')
+def update_distribution(start_date, end_date):
+    import pandas as pd
+
+    # Quantis combinados dos esboços diários: custo pelo número de dias, não de pedidos
+    quantis = obter_recorte(start_date, end_date)['quantis']
+    vazio = dict.fromkeys(QUANTIS, float('nan'))
+    pedido = quantis.get('total_value', vazio)
+    frete = quantis.get('freight_value', vazio)
+
+    with metricas.etapa('figura'):
+        def card_reais(title, valor, icon, color):
+            if pd.isna(valor):  # período sem pedidos
+                return create_kpi_card(title, "-", icon, color)
+            return create_kpi_card(title, f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+                                   icon, color, None, "R$ ")
+
+        cards = (
+            card_reais("Pedido Mediano", pedido[0.5], "fas fa-equals", COLORS['primary']),
+            card_reais("Pedido p90", pedido[0.9], "fas fa-arrow-up", COLORS['secondary']),
+            card_reais("Pedido p99", pedido[0.99], "fas fa-angle-double-up", COLORS['success']),
+            card_reais("Frete Mediano", frete[0.5], "fas fa-truck", COLORS['accent']),
+            card_reais("Frete p90", frete[0.9], "fas fa-truck-moving", COLORS['secondary']),
+        )
+
+        fig_distribution = Patch()
+        for i, valores in enumerate((pedido, frete)):
+            valores = {q: None if pd.isna(v) else round(v, 2) for q, v in valores.items()}
+            fig_distribution['data'][i]['lowerfence'] = [valores[0.05]]
+            fig_distribution['data'][i]['q1'] = [valores[0.25]]
+            fig_distribution['data'][i]['median'] = [valores[0.5]]
+            fig_distribution['data'][i]['q3'] = [valores[0.75]]
+            fig_distribution['data'][i]['upperfence'] = [valores[0.95]]
+
+    return (*cards, fig_distribution)
+
+
+def update_dashboard(start_date, end_date, time_grouping):
+    """Todas as saídas do dashboard de uma vez, na ordem do layout (para scripts e medições)."""
+    return (*update_kpis(start_date, end_date),
+            update_revenue_trend(start_date, end_date, time_grouping),
+            update_orders_by_state(start_date, end_date),
+            update_payment_methods(start_date, end_date),
+            update_category_analysis(start_date, end_date),
+            update_weekday_pattern(start_date, end_date),
+            *update_distribution(start_date, end_date))
 
 
 if __name__ == '__main__':
@@ -610,4 +1077,6 @@ if __name__ == '__main__':
     print("📊 Acesse: http://localhost:8050")
     print("⏹️  Para parar: Ctrl+C")
     
+    # O servidor sobe na hora; os dados (e depois o observador) vêm da thread de carga
+    carregar_em_segundo_plano(observar=True)
     app.run(debug=True, host='0.0.0.0', port=8050)
\ No newline at end of file
@@ -0,0 +1,332 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from carregadorDados import (DIAS_SEMANA, DIMENSOES_CATEGORIAS, DIMENSOES_CUBO, PASTA_CACHE, PASTA_DADOS,
+                             _marcar, arquivos_da_tabela, construir_cubo_categorias,
+                             construir_cubo_diario, montar_dados, otimizar_tipos, relatorio_memoria)
+
+try:
+    import duckdb
+    DUCKDB_DISPONIVEL = True
+except ImportError:
+    DUCKDB_DISPONIVEL = False
+
+# --- MOTOR SQL EMBUTIDO ---
+# Com DASH_BACKEND_SQL=1 a carga sem cache lê os CSVs direto no DuckDB, que
+# faz as junções e agregações com memória limitada e, quando ela não basta,
+# grava partes intermediárias em disco (PASTA_TEMPORARIA). Ao pandas chegam
+# só as tabelas já compactas: uma linha por pedido, com os IDs trocados por
+# códigos inteiros e os textos repetidos como categorias (ENUM), os itens
+# reduzidos a pedido × categoria (como na ingestão em blocos), os
+# dicionários dos IDs e os cubos diários.
+# Só a carga roda no SQL: depois dela, `data` fica inteira no pandas (cache,
+# incrementos do observador, HyperLogLog e esboços de quantis são montados a
+# partir dela) e os callbacks leem os cubos e esboços em memória. O pico da
+# carga cai, mas a memória do processo ainda cresce com o número de pedidos.
+#
+#   python backendSQL.py --paridade      (compara com o pandas, em blocos e linha a linha)
+MEMORIA_SQL = os.environ.get('DASH_MEMORIA_SQL', '2GB')
+PASTA_TEMPORARIA = os.path.join(PASTA_CACHE, 'duckdb')
+TABELAS_SQL = ['orders', 'customers', 'order_items', 'products', 'payments']
+# Tabelas em que a ordem das linhas importa: o desempate da ordenação por data
+# (orders) e a primeira forma de pagamento (payments), como no pandas. Elas são
+# materializadas, e o rowid segue a ordem dos arquivos e das linhas.
+TABELAS_ORDENADAS = ['orders', 'payments']
+
+
+def conectar(pasta=PASTA_DADOS, memoria=MEMORIA_SQL, pasta_temporaria=PASTA_TEMPORARIA):
+    """Conexão DuckDB em memória com uma tabela ou view por tabela sobre os seus CSVs.
+
+    Cada uma lê o arquivo base e os incrementos diários (arquivos_da_tabela)
+    como uma tabela só; as colunas são casadas pelo nome.
+    """
+    os.makedirs(pasta_temporaria, exist_ok=True)
+    con = duckdb.connect(':memory:')
+    con.execute(f"SET memory_limit = '{memoria}'")
+    con.execute(f"SET temp_directory = {_literal(pasta_temporaria)}")
+    # Padrão do DuckDB, fixado aqui porque o rowid de TABELAS_ORDENADAS depende
+    # dele: a leitura dos CSVs é inserida na ordem da lista de arquivos e das linhas
+    con.execute("SET preserve_insertion_order = true")
+    for tabela in TABELAS_SQL:
+        caminhos = ', '.join(_literal(c) for c in arquivos_da_tabela(pasta, tabela))
+        tipo = 'TEMP TABLE' if tabela in TABELAS_ORDENADAS else 'VIEW'
+        con.execute(f"CREATE {tipo} {tabela} AS "
+                    f"SELECT * FROM read_csv_auto([{caminhos}], header = true, union_by_name = true)")
+    return con
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+# Mesmas regras de resumir_itens_em_blocos, resumir_pagamentos, juntar_tabelas
+# e derivar_colunas. O rowid das tabelas ordenadas faz o papel da ordem das
+# linhas no pandas: 'first' dos pagamentos e desempate da ordenação estável.
+SQL_ITENS = """
+CREATE TEMP TABLE itens AS
+SELECT i.order_id, pr.product_category_name,
+       SUM(COALESCE(TRY_CAST(i.price AS DOUBLE), 0)) AS price,
+       SUM(COALESCE(TRY_CAST(i.freight_value AS DOUBLE), 0)) AS freight_value,
+       COUNT(i.product_id) AS items_count
+FROM order_items i
+LEFT JOIN (SELECT product_id, product_category_name FROM products) pr ON pr.product_id = i.product_id
+GROUP BY ALL
+"""
+
+SQL_PAGAMENTOS = """
+CREATE TEMP TABLE pagamentos AS
+SELECT order_id,
+       SUM(COALESCE(TRY_CAST(payment_value AS DOUBLE), 0)) AS payment_value,
+       arg_min(payment_type, rowid) FILTER (WHERE payment_type IS NOT NULL) AS payment_type,
+       AVG(payment_installments) AS payment_installments
+FROM payments
+WHERE order_id IS NOT NULL
+GROUP BY order_id
+"""
+
+SQL_PEDIDOS = """
+CREATE TEMP TABLE pedidos AS
+WITH receita AS (
+    SELECT order_id,
+           SUM(price) AS price,
+           SUM(freight_value) AS freight_value,
+           CAST(SUM(items_count) AS DOUBLE) AS items_count
+    FROM itens
+    WHERE order_id IS NOT NULL
+    GROUP BY order_id
+), pedidos_base AS (
+    SELECT * REPLACE (TRY_CAST(order_purchase_timestamp AS TIMESTAMP) AS order_purchase_timestamp),
+           rowid AS linha
+    FROM orders
+)
+SELECT o.*,
+       c.* EXCLUDE (customer_id),
+       r.price, r.freight_value, r.items_count,
+       r.price + r.freight_value AS total_value,
+       p.payment_value, p.payment_type, p.payment_installments,
+       date_trunc('month', o.order_purchase_timestamp) AS order_month,
+       year(o.order_purchase_timestamp) AS order_year,
+       quarter(o.order_purchase_timestamp) AS order_quarter,
+       dayname(o.order_purchase_timestamp) AS order_weekday
+FROM pedidos_base o
+LEFT JOIN customers c ON c.customer_id = o.customer_id
+LEFT JOIN receita r ON r.order_id = o.order_id
+LEFT JOIN pagamentos p ON p.order_id = o.order_id
+"""
+
+# Dicionário de cada coluna de ID (os mesmos IDs que otimizar_tipos e a
+# carga registrariam), com códigos na ordem dos IDs
+SQL_IDS = {
+    'order_id': "SELECT order_id FROM orders UNION SELECT order_id FROM order_items "
+                "UNION SELECT order_id FROM payments",
+    'customer_id': "SELECT customer_id FROM orders",
+    'customer_unique_id': "SELECT customer_unique_id FROM pedidos",
+}
+# Colunas de texto repetido que saem como ENUM (categóricas no pandas), com a
+# tabela de onde vêm os valores
+COLUNAS_ENUM = {'order_status': 'pedidos', 'customer_city': 'pedidos', 'customer_state': 'pedidos',
+                'payment_type': 'pedidos', 'product_category_name': 'itens'}
+
+
+def _criar_tipos(con):
+    """Cria as tabelas ids_<coluna> e os tipos ENUM usados na exportação."""
+    for coluna, origem in SQL_IDS.items():
+        con.execute(f"CREATE TEMP TABLE ids_{coluna} AS "
+                    f"SELECT {coluna}, CAST(row_number() OVER (ORDER BY {coluna}) - 1 AS INTEGER) AS codigo "
+                    f"FROM (SELECT DISTINCT {coluna} FROM ({origem}) WHERE {coluna} IS NOT NULL)")
+    for coluna, origem in COLUNAS_ENUM.items():
+        con.execute(f"CREATE TYPE enum_{coluna} AS ENUM "
+                    f"(SELECT DISTINCT CAST({coluna} AS VARCHAR) FROM {origem} "
+                    f"WHERE {coluna} IS NOT NULL ORDER BY 1)")
+    dias = ', '.join(_literal(dia) for dia in DIAS_SEMANA)
+    con.execute(f"CREATE TYPE enum_order_weekday AS ENUM ({dias})")
+
+
+def _sql_exportacao(con, tabela, ordem, excluir=()):
+    """SELECT de `tabela` com os IDs trocados pelos códigos (-1 se ausente) e os
+    textos repetidos pelos ENUMs, ordenado por `ordem`."""
+    colunas = con.table(tabela).columns
+    ids = [c for c in SQL_IDS if c in colunas]
+    trocas = [f"COALESCE(ids_{c}.codigo, -1) AS {c}" for c in ids]
+    trocas += [f"CAST(t.{c} AS enum_{c}) AS {c}" for c in [*COLUNAS_ENUM, 'order_weekday'] if c in colunas]
+    juncoes = ''.join(f" LEFT JOIN ids_{c} ON ids_{c}.{c} = t.{c}" for c in ids)
+    exclusao = f" EXCLUDE ({', '.join(excluir)})" if excluir else ''
+    return f"SELECT t.*{exclusao} REPLACE ({', '.join(trocas)}) FROM {tabela} t{juncoes} ORDER BY {ordem}"
+
+
+# Mesmas medidas de construir_cubo_diario e construir_cubo_categorias
+SQL_CUBO = """
+SELECT date_trunc('day', order_purchase_timestamp) AS dia,
+       customer_state, payment_type, order_weekday,
+       COALESCE(SUM(price), 0) AS price,
+       COALESCE(SUM(freight_value), 0) AS freight_value,
+       COALESCE(SUM(items_count), 0) AS items_count,
+       COUNT(*) AS pedidos,
+       COUNT(items_count) AS pedidos_com_itens
+FROM pedidos
+GROUP BY ALL
+"""
+
+SQL_CUBO_CATEGORIAS = """
+SELECT date_trunc('day', p.order_purchase_timestamp) AS dia,
+       i.product_category_name,
+       SUM(i.price) AS price,
+       CAST(SUM(i.items_count) AS BIGINT) AS items_count
+FROM itens i
+JOIN pedidos p ON p.order_id = i.order_id
+WHERE p.order_purchase_timestamp IS NOT NULL
+GROUP BY ALL
+"""
+
+
+def montar_dados_sql(pasta=PASTA_DADOS, relatorio=True, tempos=None, memoria=MEMORIA_SQL):
+    """Como montar_dados em blocos, com leitura, junções e agregações feitas no DuckDB.
+
+    Retorna (data, order_items_with_products, dicionarios, cubos), onde os
+    itens vêm agregados por pedido × categoria e `cubos` tem o cubo diário e
+    o de categorias (argumentos do ConjuntoDados). Em `tempos`, a etapa
+    juncao inclui a leitura dos CSVs.
+    """
+    if not DUCKDB_DISPONIVEL:
+        raise ImportError('O backend SQL precisa do duckdb (pip install duckdb)')
+    tempos = {} if tempos is None else tempos
+    inicio = time.perf_counter()
+    con = conectar(pasta, memoria)
+    try:
+        con.execute(SQL_ITENS)
+        con.execute(SQL_PAGAMENTOS)
+        con.execute(SQL_PEDIDOS)
+        inicio = _marcar(tempos, 'juncao', inicio)
+        cubo = con.execute(SQL_CUBO).df()
+        cubo_categorias = con.execute(SQL_CUBO_CATEGORIAS).df()
+        inicio = _marcar(tempos, 'agregacao_sql', inicio)
+        _criar_tipos(con)
+        data = con.execute(_sql_exportacao(con, 'pedidos', 't.order_purchase_timestamp NULLS LAST, t.linha',
+                                           excluir=['linha'])).df()
+        order_items_with_products = con.execute(_sql_exportacao(con, 'itens', '1, 2')).df()
+        dicionarios = {coluna: pd.Index(con.execute(f"SELECT {coluna} FROM ids_{coluna} ORDER BY codigo")
+                                        .df()[coluna], dtype=object)
+                       for coluna in SQL_IDS}
+        inicio = _marcar(tempos, 'exportacao', inicio)
+    finally:
+        con.close()
+
+    # O DuckDB entrega datas em microssegundos (o resto do app usa nanossegundos)
+    # e ENUMs como categóricas ordenadas (as do pandas não são)
+    for df in (data, order_items_with_products, cubo, cubo_categorias):
+        for col in df.select_dtypes(include='datetime').columns:
+            df[col] = df[col].astype('datetime64[ns]')
+        for col in df.select_dtypes(include='category').columns:
+            df[col] = df[col].cat.as_unordered()
+    memoria_antes = data.memory_usage(deep=True)
+    data, order_items_with_products, dicionarios = otimizar_tipos(data, order_items_with_products, dicionarios)
+    cubos = {'cubo': _tipos_do_cubo(cubo, data, DIMENSOES_CUBO),
+             'cubo_categorias': _tipos_do_cubo(cubo_categorias, order_items_with_products, DIMENSOES_CATEGORIAS)}
+    _marcar(tempos, 'tipos', inicio)
+    if relatorio:
+        relatorio_memoria(memoria_antes, data.memory_usage(deep=True))
+    return data, order_items_with_products, dicionarios, cubos
+
+
+def _tipos_do_cubo(cubo, origem, dimensoes):
+    """Dimensões do cubo com os mesmos tipos categóricos da tabela compacta de
+    origem e as linhas na ordem do groupby do pandas (dia primeiro)."""
+    for col in dimensoes[1:]:
+        if col == 'order_weekday':
+            cubo[col] = pd.Categorical(cubo[col], categories=DIAS_SEMANA, ordered=True)
+        else:
+            cubo[col] = pd.Categorical(cubo[col], categories=origem[col].cat.categories)
+    for col in ('pedidos', 'pedidos_com_itens', 'items_count'):
+        if col in cubo and pd.api.types.is_integer_dtype(cubo[col].dtype):
+            cubo[col] = cubo[col].astype('int64')
+    return cubo.sort_values(dimensoes, ignore_index=True)
+
+
+# --- PARIDADE COM O PANDAS ---
+def _normalizar(df, dicionarios, chaves):
+    """Tabela comparável entre os dois caminhos: IDs decodificados, categóricas
+    como valores e linhas ordenadas por `chaves`."""
+    df = df.copy()
+    for col in df.columns:
+        if col in dicionarios and pd.api.types.is_integer_dtype(df[col].dtype):
+            codigos = df[col].to_numpy()
+            valores = dicionarios[col].to_numpy()[codigos.clip(0)]
+            df[col] = pd.Series(valores, dtype=object).where(codigos >= 0, None)
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df.sort_values(chaves, ignore_index=True, na_position='last')
+
+
+def _comparar(nome, pandas_df, sql_df, dic_pandas, dic_sql, chaves):
+    a = _normalizar(pandas_df, dic_pandas, chaves)
+    b = _normalizar(sql_df, dic_sql, chaves)[a.columns.tolist()] if set(a.columns) == set(sql_df.columns) else None
+    if b is None:
+        print(f"❌ {nome}: colunas diferentes {sorted(set(pandas_df.columns) ^ set(sql_df.columns))}")
+        return False
+    try:
+        pd.testing.assert_frame_equal(a, b, check_dtype=False, check_categorical=False, rtol=1e-9)
+    except AssertionError as e:
+        print(f"❌ {nome}: {str(e).splitlines()[0]}\n{e}")
+        return False
+    print(f"✅ {nome}: {len(a):,} linhas iguais")
+    return True
+
+
+def verificar_paridade(pasta=PASTA_DADOS):
+    """Monta os dados pelo DuckDB e pelo pandas, em blocos e linha a linha, e compara
+    tabelas, dicionários e cubos.
+
+    Os itens só são comparados com os do modo em blocos, o único que também os
+    guarda por pedido × categoria; `data` e os cubos, com os dois modos.
+    """
+    inicio = time.perf_counter()
+    data_sql, itens_sql, dicionarios_sql, cubos = montar_dados_sql(pasta, relatorio=False)
+    segundos = {'DuckDB': time.perf_counter() - inicio}
+
+    ok = True
+    for streaming, modo in ((True, 'pandas em blocos'), (False, 'pandas linha a linha')):
+        inicio = time.perf_counter()
+        data, itens, dicionarios = montar_dados(pasta, streaming=streaming, relatorio=False)
+        cubo = construir_cubo_diario(data)
+        cubo_categorias = construir_cubo_categorias(data, itens)
+        segundos[modo] = time.perf_counter() - inicio
+
+        print(f"— DuckDB × {modo}")
+        ok &= _comparar('data', data, data_sql, dicionarios, dicionarios_sql, ['order_id'])
+        if streaming:
+            ok &= _comparar('order_items_with_products', itens, itens_sql, dicionarios, dicionarios_sql,
+                            ['order_id', 'product_category_name'])
+        ok &= _comparar('cubo diário', cubo, cubos['cubo'], {}, {}, DIMENSOES_CUBO)
+        ok &= _comparar('cubo de categorias', cubo_categorias, cubos['cubo_categorias'], {}, {},
+                        DIMENSOES_CATEGORIAS)
+        # A ordem das linhas de data importa (recortes por busca binária)
+        if not data['order_purchase_timestamp'].equals(data_sql['order_purchase_timestamp']):
+            print("❌ data: datas de compra fora da mesma ordem")
+            ok = False
+        for col in dicionarios:
+            if set(dicionarios[col]) != set(dicionarios_sql.get(col, [])):
+                print(f"❌ dicionário de {col}: IDs diferentes")
+                ok = False
+        del data, itens, dicionarios, cubo, cubo_categorias
+    print(f"⏱️ {' · '.join(f'{modo} {s:.2f}s' for modo, s in segundos.items())}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Carga dos dados pelo DuckDB (junções e agregações fora da memória).')
+    parser.add_argument('--pasta', default=PASTA_DADOS, help=f'pasta dos CSVs (padrão {PASTA_DADOS})')
+    parser.add_argument('--paridade', action='store_true', help='compara o resultado com o caminho do pandas')
+    args = parser.parse_args()
+    if not DUCKDB_DISPONIVEL:
+        print("duckdb não instalado (pip install duckdb)")
+        sys.exit(1)
+    if args.paridade:
+        sys.exit(0 if verificar_paridade(args.pasta) else 1)
+    tempos = {}
+    data, itens, _, cubos = montar_dados_sql(args.pasta, tempos=tempos)
+    print(f"🦆 {len(data):,} pedidos, {len(itens):,} itens, {len(cubos['cubo']):,} células no cubo diário "
+          f"({', '.join(f'{etapa} {s:.2f}s' for etapa, s in tempos.items())})")
@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from carregadorDados import ARQUIVOS, ConjuntoDados, montar_dados, salvar_cache, assinatura_fontes, chave_cache
+from geradorOlist import gerar as gerar_olist
+
+# --- CONFIGURAÇÃO ---
+PASTA_BENCHMARK = os.path.join('data', 'benchmark')
+TAMANHOS = [10_000, 100_000, 1_000_000, 10_000_000]
+REPETICOES = 20
+# Cenários fixos (início, fim, agrupamento), dentro do período dos dados sintéticos (geradorOlist.py)
+CENARIOS = [
+    ('2016-09-04', '2018-10-17', 'month'),
+    ('2017-06-01', '2017-12-31', 'quarter'),
+    ('2018-01-01', '2018-03-31', 'year'),
+    ('2017-11-20', '2017-11-26', 'month'),
+    ('2016-09-04', '2018-10-17', 'day'),
+]
+# Callbacks na ordem das saídas de app.update_dashboard: (nome, número de saídas)
+CALLBACKS = [('kpis', 7), ('revenue_trend', 1), ('orders_by_state', 1), ('payment_methods', 1),
+             ('category_analysis', 1), ('weekday_pattern', 1), ('distribution', 6)]
+
+# --- MEDIÇÃO (processo filho, um por tamanho) ---
+def pico_rss_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def tamanhos_resposta(saidas):
+    """Bytes do JSON que cada callback devolve ao navegador, como o Dash serializa."""
+    from plotly.io.json import to_json_plotly
+    tamanhos, inicio = {}, 0
+    for nome, n_saidas in CALLBACKS:
+        tamanhos[nome] = len(to_json_plotly(list(saidas[inicio:inicio + n_saidas])).encode())
+        inicio += n_saidas
+    return tamanhos
+
+
+def medir(pasta, repeticoes, streaming):
+    """Mede carga e callbacks sobre os CSVs de `pasta`; retorna um dict serializável."""
+    # Etapas da carga a frio (sem cache)
+    etapas = {}
+    fontes = assinatura_fontes(pasta)
+    data, itens, dicionarios = montar_dados(pasta, streaming, relatorio=False, tempos=etapas)
+    inicio = time.perf_counter()
+    conjunto = ConjuntoDados(data, itens, dicionarios, chave_cache(fontes, streaming), fontes, streaming)
+    etapas['agregados'] = time.perf_counter() - inicio
+    n_pedidos = len(conjunto.data)
+
+    # Grava o cache para que o app abaixo parta dele, como numa partida normal
+    inicio = time.perf_counter()
+    salvar_cache(data, itens, dicionarios, fontes, os.path.join(pasta, 'cache'), streaming)
+    etapas['gravar_cache'] = time.perf_counter() - inicio
+    rss_carga = pico_rss_mb()
+    del data, itens, dicionarios, conjunto
+    gc.collect()
+
+    # Importar o app não lê dados; carregar() lê DASH_PASTA_DADOS e monta as figuras base
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    etapas['importar_app'] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.carregar()
+    etapas['partida_app'] = time.perf_counter() - inicio
+    if app.observador.atual.versao != chave_cache(fontes, streaming):
+        # O app partiu de outra versão (ex.: DASH_INGESTAO_STREAMING diferente de --streaming)
+        raise SystemExit("O app não carregou o cache gravado para esta medição")
+
+    cenarios = []
+    for start_date, end_date, agrupamento in CENARIOS:
+        duracoes = []
+        for _ in range(repeticoes):
+            # Sem recortes memoizados: cada chamada refaz o caminho completo
+            app._recorte_periodo.cache_clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                saidas = app.update_dashboard(start_date, end_date, agrupamento)
+                duracoes.append(time.perf_counter() - inicio)
+        ms = np.array(duracoes) * 1000
+        cenarios.append({'inicio': start_date, 'fim': end_date, 'agrupamento': agrupamento,
+                         'repeticoes': repeticoes,
+                         'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                         'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                         'media_ms': round(float(ms.mean()), 3),
+                         'bytes_resposta': tamanhos_resposta(saidas)})
+
+    return {'pedidos': n_pedidos,
+            'streaming': streaming,
+            'etapas_s': {etapa: round(segundos, 4) for etapa, segundos in etapas.items()},
+            'rss_carga_mb': rss_carga and round(rss_carga, 1),
+            'pico_rss_mb': pico_rss_mb() and round(pico_rss_mb(), 1),
+            'cenarios': cenarios}
+
+
+# --- EXECUÇÃO ---
+def _revisao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(tamanhos, repeticoes, streaming, pasta, saida):
+    resultados = []
+    for tamanho in tamanhos:
+        pasta_tamanho = os.path.join(pasta, str(tamanho))
+        if not os.path.exists(os.path.join(pasta_tamanho, ARQUIVOS['orders'])):
+            print(f"🏗️  Gerando {tamanho:,} pedidos sintéticos em {pasta_tamanho}...")
+            gerar_olist(pasta_tamanho, tamanho, processos=os.cpu_count() or 1)
+
+        # Um processo por tamanho: o pico de RSS e os caches não vazam entre medições
+        print(f"⏱️  Medindo {tamanho:,} pedidos...")
+        # O app do filho precisa do mesmo modo de ingestão para achar o cache gravado por medir()
+        ambiente = {**os.environ, 'DASH_PASTA_DADOS': pasta_tamanho,
+                    'DASH_OBSERVAR_DADOS': '0', 'DASH_CACHE_CALLBACKS': '0',
+                    'DASH_INGESTAO_STREAMING': '1' if streaming else '0'}
+        comando = [sys.executable, __file__, '--medir', pasta_tamanho, '--repeticoes', str(repeticoes)]
+        if streaming:
+            comando.append('--streaming')
+        processo = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if processo.returncode != 0:
+            print(f"❌ Falha ao medir {tamanho:,} pedidos:\n{processo.stderr}")
+            continue
+        resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+        resultados.append(resultado)
+
+        etapas = ', '.join(f"{etapa} {segundos:.2f}s" for etapa, segundos in resultado['etapas_s'].items())
+        print(f"   carga: {etapas} | pico RSS {resultado['pico_rss_mb']} MB")
+        for cenario in resultado['cenarios']:
+            print(f"   {cenario['inicio']} a {cenario['fim']} ({cenario['agrupamento']}): "
+                  f"p50 {cenario['p50_ms']:.1f} ms, p95 {cenario['p95_ms']:.1f} ms, "
+                  f"resposta {sum(cenario['bytes_resposta'].values()) / 1024:.1f} KB")
+
+    relatorio = {'data': datetime.now().isoformat(timespec='seconds'),
+                 'revisao': _revisao_git(),
+                 'python': platform.python_version(),
+                 'pandas': pd.__version__,
+                 'maquina': platform.platform(),
+                 'resultados': resultados}
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w') as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"💾 Resultados gravados em {saida}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mede a carga e os callbacks do dashboard sobre dados sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS, help='quantidades de pedidos')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES, help='chamadas por cenário')
+    parser.add_argument('--streaming', action='store_true', help='ingestão em blocos')
+    parser.add_argument('--pasta', default=PASTA_BENCHMARK, help='onde ficam os dados sintéticos')
+    parser.add_argument('--saida', help='arquivo JSON dos resultados')
+    parser.add_argument('--medir', metavar='PASTA', help=argparse.SUPPRESS)  # processo filho
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.repeticoes, args.streaming)))
+    else:
+        saida = args.saida or os.path.join(args.pasta, 'resultados',
+                                           f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+        executar(args.tamanhos, args.repeticoes, args.streaming, args.pasta, saida)
@@ -0,0 +1,85 @@
+import functools
+import os
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# --- CONFIGURAÇÃO ---
+# Cache em disco (SQLite) compartilhado por todos os workers da mesma máquina,
+# dentro da pasta de cache dos dados (a mesma de carregadorDados.PASTA_CACHE,
+# lida aqui sem importar o pandas): pastas de dados diferentes não dividem o cache.
+PASTA_CACHE_CALLBACKS = os.path.join(os.environ.get('DASH_PASTA_DADOS', 'data'), 'cache', 'callbacks')
+# DASH_CACHE_CALLBACKS=0 desliga o cache (ex.: para medir os callbacks)
+USAR_CACHE = os.environ.get('DASH_CACHE_CALLBACKS', '1') == '1'
+LIMITE_BYTES = 256 * 1024 * 1024   # acima disso, descarta os menos usados (LRU)
+TTL_SEGUNDOS = 6 * 60 * 60         # cada resultado expira depois de 6 horas
+
+_CHAVE_VERSOES = '__versoes__'
+
+
+class CacheCallbacks:
+    """Cache LRU/TTL dos resultados dos callbacks, chaveado pela versão dos dados.
+
+    A chave de cada entrada é (callback, argumentos, versão dos dados), e cada
+    entrada é marcada (tag) com a versão, registrada junto em `__versoes__`.
+    Quando a versão muda, as entradas das versões anteriores são descartadas
+    com `invalidar_outras_versoes`; um worker que ainda grave numa versão já
+    descartada a registra de novo, e ela sai na próxima invalidação.
+    Sem o pacote `diskcache`, os callbacks rodam sem cache.
+    """
+
+    def __init__(self, pasta=PASTA_CACHE_CALLBACKS, limite_bytes=LIMITE_BYTES, ttl=TTL_SEGUNDOS):
+        self.ttl = ttl
+        self.cache = None
+        if not USAR_CACHE:
+            return
+        if diskcache is None:
+            print("⚠️  Pacote 'diskcache' não instalado: callbacks sem cache compartilhado")
+            return
+        self.cache = diskcache.Cache(pasta, size_limit=limite_bytes,
+                                     eviction_policy='least-recently-used')
+
+    def invalidar_outras_versoes(self, versao):
+        if self.cache is None:
+            return
+        with self.cache.transact():
+            versoes = self.cache.get(_CHAVE_VERSOES, set())
+            antigas = versoes - {versao}
+            self.cache.set(_CHAVE_VERSOES, {versao})
+        for antiga in antigas:
+            self.cache.evict(antiga)
+
+    def _gravar(self, chave, resultado, versao):
+        with self.cache.transact(retry=True):
+            self.cache.set(chave, resultado, expire=self.ttl, tag=versao)
+            versoes = self.cache.get(_CHAVE_VERSOES, set())
+            if versao not in versoes:
+                self.cache.set(_CHAVE_VERSOES, versoes | {versao})
+
+    def fechar(self):
+        """Fecha a conexão com o SQLite; a próxima operação abre outra.
+
+        Chamar antes de um fork: a conexão do processo pai não pode ser usada
+        pelos filhos.
+        """
+        if self.cache is not None:
+            self.cache.close()
+
+    def memoizar(self, nome, obter_versao):
+        """Decorador: guarda o retorno do callback `nome` para a versão atual dos dados."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envoltorio(*args):
+                if self.cache is None:
+                    return funcao(*args)
+                versao = obter_versao()
+                chave = (nome, versao, *args)
+                resultado = self.cache.get(chave, default=None, retry=True)
+                if resultado is None:
+                    resultado = funcao(*args)
+                    self._gravar(chave, resultado, versao)
+                return resultado
+            return envoltorio
+        return decorador
@@ -0,0 +1,788 @@
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from esbocos import HllDiario, QuantisDiarios
+
+try:
+    import pyarrow  # noqa: F401  (motor do Parquet)
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+try:
+    import fcntl  # travas entre processos na pasta de cache
+except ImportError:  # Windows: sem trava, como num processo só
+    fcntl = None
+
+# --- ARQUIVOS DE ORIGEM ---
+PASTA_DADOS = os.environ.get('DASH_PASTA_DADOS', 'data')
+PASTA_CACHE = os.path.join(PASTA_DADOS, 'cache')
+
+ARQUIVOS = {
+    'orders': 'olist_orders_dataset.csv',
+    'customers': 'olist_customers_dataset.csv',
+    'order_items': 'olist_order_items_dataset.csv',
+    'products': 'olist_products_dataset.csv',
+    'sellers': 'olist_sellers_dataset.csv',
+    'payments': 'olist_order_payments_dataset.csv',
+}
+# Além do arquivo base, cada tabela pode ter incrementos diários com o mesmo
+# nome e um sufixo, ex.: olist_orders_dataset_2018-10-18.csv
+LEITURA = {
+    'orders': {'parse_dates': ['order_purchase_timestamp']},
+}
+
+# Incrementar quando a lógica de junção mudar, para invalidar caches antigos
+VERSAO_ESQUEMA = 3
+
+# Ingestão em blocos de order_items e payments (ver INGESTÃO EM BLOCOS)
+INGESTAO_STREAMING = os.environ.get('DASH_INGESTAO_STREAMING') == '1'
+
+# Junções e agregações da carga sem cache no DuckDB, com memória limitada e
+# transbordo para disco (ver backendSQL.py); tem precedência sobre os blocos.
+# O resultado (data e os cubos) fica em memória como nos outros modos
+BACKEND_SQL = os.environ.get('DASH_BACKEND_SQL') == '1'
+
+# Clientes únicos exatos (nunique sobre as linhas do período) em vez do
+# HyperLogLog diário; para auditar a estimativa
+CONTAGEM_EXATA = os.environ.get('DASH_CONTAGEM_EXATA') == '1'
+
+
+# --- LEITURA E JUNÇÃO ---
+class ArquivoAusente(FileNotFoundError):
+    """Falta o CSV base de alguma tabela na pasta de dados."""
+
+
+def arquivos_da_tabela(pasta, tabela):
+    """Arquivo base da tabela seguido dos incrementos, em ordem de nome."""
+    base = os.path.join(pasta, ARQUIVOS[tabela])
+    if not os.path.exists(base):
+        raise ArquivoAusente(base)
+    incrementos = glob.glob(glob.escape(base[:-len('.csv')]) + '_*.csv')
+    return [base] + sorted(incrementos)
+
+
+def ler_tabela(pasta, tabela, **kwargs):
+    partes = [pd.read_csv(caminho, **LEITURA.get(tabela, {}), **kwargs)
+              for caminho in arquivos_da_tabela(pasta, tabela)]
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+def ler_linhas_novas(caminho, inicio, tabela, incluir_final=False):
+    """Lê as linhas completas de `caminho` a partir do byte `inicio`.
+
+    Retorna (linhas, fim), onde `fim` é o byte logo após a última linha
+    lida. Sem `incluir_final`, uma última linha sem quebra de linha (ainda
+    sendo escrita) fica para a próxima leitura.
+    """
+    with open(caminho, 'rb') as f:
+        cabecalho = f.readline()
+        f.seek(max(inicio, len(cabecalho)))
+        conteudo = f.read()
+    corte = len(conteudo) if incluir_final else conteudo.rfind(b'\n') + 1
+    fim = max(inicio, len(cabecalho)) + corte
+    linhas = pd.read_csv(io.BytesIO(cabecalho + conteudo[:corte]), **LEITURA.get(tabela, {}))
+    return linhas, fim
+
+
+def ler_csvs(pasta=PASTA_DADOS):
+    orders = ler_tabela(pasta, 'orders')
+    customers = ler_tabela(pasta, 'customers')
+    order_items = ler_tabela(pasta, 'order_items')
+    products = ler_tabela(pasta, 'products')
+    sellers = ler_tabela(pasta, 'sellers')
+    payments = ler_tabela(pasta, 'payments')
+    return orders, customers, order_items, products, sellers, payments
+
+
+def resumir_itens(order_items, products):
+    """Soma os itens por pedido e une os itens às categorias dos produtos.
+
+    Retorna (order_revenue, order_items_with_products).
+    """
+    order_items['price'] = pd.to_numeric(order_items['price'], errors='coerce').fillna(0)
+    order_items['freight_value'] = pd.to_numeric(order_items['freight_value'], errors='coerce').fillna(0)
+    order_revenue = order_items.groupby('order_id').agg({
+        'price': 'sum',
+        'freight_value': 'sum',
+        'product_id': 'count'
+    }).reset_index()
+    order_revenue = order_revenue.rename(columns={'product_id': 'items_count'})
+
+    # Unir com produtos para categorias
+    order_items_with_products = order_items.merge(products[['product_id', 'product_category_name']], on='product_id', how='left')
+    return order_revenue, order_items_with_products
+
+
+def resumir_pagamentos(payments):
+    payments['payment_value'] = pd.to_numeric(payments['payment_value'], errors='coerce').fillna(0)
+    return payments.groupby('order_id').agg({
+        'payment_value': 'sum',
+        'payment_type': 'first',
+        'payment_installments': 'mean'
+    }).reset_index()
+
+
+def juntar_tabelas(orders, customers, order_revenue, payment_summary=None):
+    # Unir orders + customers (para ter estado)
+    data = orders.merge(customers, on='customer_id', how='left')
+
+    # Unir orders + order_items para receita
+    order_revenue['total_value'] = order_revenue['price'] + order_revenue['freight_value']
+    data = data.merge(order_revenue, on='order_id', how='left')
+
+    # Unir com pagamentos
+    if payment_summary is not None:
+        data = data.merge(payment_summary, on='order_id', how='left')
+    return data
+
+
+def derivar_colunas(data):
+    # Criar colunas auxiliares para data
+    data['order_month'] = data['order_purchase_timestamp'].dt.to_period('M').dt.to_timestamp()
+    data['order_year'] = data['order_purchase_timestamp'].dt.year
+    data['order_quarter'] = data['order_purchase_timestamp'].dt.quarter
+    data['order_weekday'] = data['order_purchase_timestamp'].dt.day_name()
+
+    # Ordenar por data da compra para permitir recortes por busca binária
+    data = data.sort_values('order_purchase_timestamp', kind='stable', ignore_index=True)
+
+    return data
+
+
+def juntar_dados(orders, customers, order_revenue, payment_summary=None):
+    return derivar_colunas(juntar_tabelas(orders, customers, order_revenue, payment_summary))
+
+
+# --- INGESTÃO EM BLOCOS ---
+# order_items e payments são lidos em blocos de TAMANHO_BLOCO linhas, e cada
+# bloco é reduzido a somas por pedido antes do próximo. Só as tabelas
+# reduzidas ficam em memória; a cada BLOCOS_POR_DOBRA blocos os parciais são
+# combinados num único acumulador.
+TAMANHO_BLOCO = 500_000
+BLOCOS_POR_DOBRA = 8
+
+
+def _dobrar(parciais, agregacoes):
+    combinado = pd.concat(parciais)
+    return combinado.groupby(level=list(range(combinado.index.nlevels)), dropna=False, sort=False).agg(agregacoes)
+
+
+def _reduzir_em_blocos(caminhos, colunas, reduzir_bloco, agregacoes, tamanho_bloco):
+    parciais = []
+    for caminho in caminhos:
+        for bloco in pd.read_csv(caminho, usecols=colunas, chunksize=tamanho_bloco):
+            parciais.append(reduzir_bloco(bloco))
+            if len(parciais) >= BLOCOS_POR_DOBRA:
+                parciais = [_dobrar(parciais, agregacoes)]
+    return _dobrar(parciais, agregacoes)
+
+
+def resumir_itens_em_blocos(caminhos, products, tamanho_bloco=TAMANHO_BLOCO):
+    """Versão em blocos de `resumir_itens`.
+
+    Em vez das linhas de itens, `order_items_with_products` sai reduzido a
+    pedido × categoria (price, freight_value, items_count somados).
+    """
+    categorias = products.set_index('product_id')['product_category_name']
+    medidas = {'price': 'sum', 'freight_value': 'sum', 'items_count': 'sum'}
+
+    def reduzir_bloco(bloco):
+        bloco['price'] = pd.to_numeric(bloco['price'], errors='coerce').fillna(0)
+        bloco['freight_value'] = pd.to_numeric(bloco['freight_value'], errors='coerce').fillna(0)
+        bloco['items_count'] = bloco['product_id'].notna().astype('int64')
+        bloco['product_category_name'] = bloco['product_id'].map(categorias)
+        return bloco.groupby(['order_id', 'product_category_name'], dropna=False, sort=False)[list(medidas)].sum()
+
+    por_categoria = _reduzir_em_blocos(caminhos, ['order_id', 'product_id', 'price', 'freight_value'],
+                                       reduzir_bloco, medidas, tamanho_bloco)
+    order_revenue = por_categoria.groupby(level='order_id', sort=False).sum().reset_index()
+    return order_revenue, por_categoria.reset_index()
+
+
+def resumir_pagamentos_em_blocos(caminhos, tamanho_bloco=TAMANHO_BLOCO):
+    """Versão em blocos de `resumir_pagamentos` (média de parcelas via soma e contagem)."""
+    agregacoes = {'payment_value': 'sum', 'payment_type': 'first',
+                  'parcelas_soma': 'sum', 'parcelas_n': 'sum'}
+
+    def reduzir_bloco(bloco):
+        bloco['payment_value'] = pd.to_numeric(bloco['payment_value'], errors='coerce').fillna(0)
+        return bloco.groupby('order_id', sort=False).agg(
+            payment_value=('payment_value', 'sum'),
+            payment_type=('payment_type', 'first'),
+            parcelas_soma=('payment_installments', 'sum'),
+            parcelas_n=('payment_installments', 'count'))
+
+    resumo = _reduzir_em_blocos(caminhos, ['order_id', 'payment_type', 'payment_installments', 'payment_value'],
+                                reduzir_bloco, agregacoes, tamanho_bloco)
+    resumo['payment_installments'] = resumo['parcelas_soma'] / resumo['parcelas_n'].where(resumo['parcelas_n'] > 0)
+    return resumo.drop(columns=['parcelas_soma', 'parcelas_n']).reset_index()
+
+
+# --- TIPOS COMPACTOS ---
+# IDs hexadecimais de 32 caracteres viram códigos inteiros (dicionário guardado à parte)
+COLUNAS_ID = ['order_id', 'customer_id', 'customer_unique_id']
+# Colunas de texto com poucos valores distintos viram categóricas
+COLUNAS_CATEGORICAS = ['order_status', 'customer_city', 'customer_state', 'payment_type',
+                       'product_category_name', 'product_id', 'seller_id']
+# Demais datas do Olist chegam como texto
+COLUNAS_DATA = ['order_approved_at', 'order_delivered_carrier_date',
+                'order_delivered_customer_date', 'order_estimated_delivery_date',
+                'shipping_limit_date']
+# Valores monetários ficam em float64: somas de centenas de milhares de
+# pedidos perderiam centavos em float32
+COLUNAS_MONETARIAS = ['price', 'freight_value', 'total_value', 'payment_value']
+DIAS_SEMANA = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def codificar_ids(serie, dicionario=None):
+    """Troca os IDs de `serie` por códigos int32, estendendo `dicionario` com IDs novos.
+
+    Retorna (códigos, dicionário). IDs ausentes (NaN) recebem o código -1.
+    """
+    if dicionario is None:
+        codigos, dicionario = pd.factorize(serie)
+        return codigos.astype('int32'), pd.Index(dicionario)
+    codigos = dicionario.get_indexer(serie)
+    novos = serie[(codigos < 0) & serie.notna()].unique()
+    if len(novos):
+        dicionario = dicionario.append(pd.Index(novos))
+        codigos = dicionario.get_indexer(serie)
+    return codigos.astype('int32'), dicionario
+
+
+def _compactar(df, dicionarios):
+    for col in df.columns:
+        serie = df[col]
+        if col in COLUNAS_ID:
+            if serie.dtype == object:
+                df[col], dicionarios[col] = codificar_ids(serie, dicionarios.get(col))
+        elif col == 'order_weekday':
+            df[col] = pd.Categorical(serie, categories=DIAS_SEMANA, ordered=True)
+        elif col == 'order_month':
+            df[col] = serie.astype('category')
+        elif col in ('order_year', 'order_quarter'):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif col in COLUNAS_DATA:
+            if serie.dtype == object:
+                df[col] = pd.to_datetime(serie, errors='coerce')
+        elif col in COLUNAS_CATEGORICAS or (serie.dtype == object and serie.nunique() < 0.5 * len(serie)):
+            df[col] = serie.astype('category')
+        elif pd.api.types.is_integer_dtype(serie.dtype):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie.dtype) and col not in COLUNAS_MONETARIAS:
+            df[col] = pd.to_numeric(serie, downcast='float')
+    return df
+
+
+def otimizar_tipos(data, order_items_with_products, dicionarios=None):
+    """Converte as tabelas para tipos compactos, no lugar.
+
+    Retorna (data, order_items_with_products, dicionarios), onde `dicionarios`
+    mapeia cada coluna de ID para o Index que decodifica seus códigos. É
+    idempotente: colunas já compactas são mantidas.
+    """
+    dicionarios = dict(dicionarios or {})
+    data = _compactar(data, dicionarios)
+    order_items_with_products = _compactar(order_items_with_products, dicionarios)
+    return data, order_items_with_products, dicionarios
+
+
+def relatorio_memoria(antes, depois, titulo='data'):
+    """Imprime o uso de memória por coluna antes e depois da compactação."""
+    mb = 1024 * 1024
+    total_antes = antes.sum() / mb
+    total_depois = depois.sum() / mb
+    print(f"🧮 Memória de {titulo}: {total_antes:.1f} MB → {total_depois:.1f} MB "
+          f"({(1 - total_depois / total_antes) * 100 if total_antes else 0:.0f}% menor)")
+    for col in antes.index.drop('Index', errors='ignore'):
+        print(f"   {col:<32} {antes[col] / mb:8.2f} MB → {depois.get(col, 0) / mb:8.2f} MB")
+
+
+# --- AGREGADOS ---
+DIMENSOES_CUBO = ['dia', 'customer_state', 'payment_type', 'order_weekday']
+
+
+def construir_cubo_diario(data):
+    """Agrega `data` por dia × estado × forma de pagamento × dia da semana.
+
+    Cada linha de `data` é um pedido, então `pedidos` é a contagem de pedidos
+    da célula e todas as medidas são somáveis entre células. `pedidos_com_itens`
+    conta os pedidos com itens, denominador das médias de itens e frete.
+    """
+    cubo = (data[['order_purchase_timestamp', 'customer_state', 'payment_type', 'order_weekday',
+                  'price', 'freight_value', 'items_count']]
+            .assign(dia=data['order_purchase_timestamp'].dt.normalize(),
+                    # Somar em float64 mesmo com a coluna compactada em float32
+                    items_count=data['items_count'].astype('float64'),
+                    pedidos=1,
+                    pedidos_com_itens=data['items_count'].notna().astype('int64'))
+            .groupby(DIMENSOES_CUBO, dropna=False, observed=True, sort=True)
+            .agg(price=('price', 'sum'),
+                 freight_value=('freight_value', 'sum'),
+                 items_count=('items_count', 'sum'),
+                 pedidos=('pedidos', 'sum'),
+                 pedidos_com_itens=('pedidos_com_itens', 'sum'))
+            .reset_index())
+    return cubo
+
+
+# Medidas somáveis do cubo com soma acumulada por dia
+MEDIDAS_ACUMULADAS = ['price', 'freight_value', 'items_count', 'pedidos', 'pedidos_com_itens']
+
+
+class SomasAcumuladas:
+    """Somas acumuladas diárias das medidas do cubo.
+
+    O total de qualquer período [inicio, fim) é a diferença de duas posições,
+    achadas por busca binária nos dias: custo constante, qualquer que seja o
+    tamanho do período.
+    """
+
+    def __init__(self, cubo):
+        diario = cubo.groupby('dia', sort=True)[MEDIDAS_ACUMULADAS].sum()
+        self.dias = diario.index.to_numpy(dtype='datetime64[ns]')
+        self.somas = {}
+        for medida in MEDIDAS_ACUMULADAS:
+            valores = diario[medida].to_numpy()
+            # Contagens ficam inteiras (exatas); valores em float64
+            tipo = np.int64 if medida.startswith('pedidos') else np.float64
+            self.somas[medida] = np.concatenate([[0], np.cumsum(valores, dtype=tipo)])
+
+    def totais(self, inicio, fim):
+        a, b = self.dias.searchsorted([pd.Timestamp(inicio).to_datetime64(),
+                                       pd.Timestamp(fim).to_datetime64()], side='left')
+        return {medida: soma[b] - soma[a] for medida, soma in self.somas.items()}
+
+
+def construir_hll_clientes(data):
+    """HyperLogLog diário dos clientes (códigos de customer_id) por dia da compra."""
+    codigos = data['customer_id'].to_numpy()
+    conhecidos = codigos >= 0
+    return HllDiario.construir(data['order_purchase_timestamp'].to_numpy()[conhecidos], codigos[conhecidos])
+
+
+# Valores por pedido com esboço diário de quantis (medianas, p90, p99)
+MEDIDAS_QUANTIS = ['total_value', 'freight_value']
+
+
+def construir_quantis(data):
+    """Esboço diário de quantis de cada medida de MEDIDAS_QUANTIS presente em `data`."""
+    return {medida: QuantisDiarios.construir(data['order_purchase_timestamp'], data[medida])
+            for medida in MEDIDAS_QUANTIS if medida in data.columns}
+
+
+DIMENSOES_CATEGORIAS = ['dia', 'product_category_name']
+
+
+def construir_cubo_categorias(data, order_items_with_products):
+    """Agrega os itens por dia da compra × categoria do produto.
+
+    Faz uma única vez a junção dos itens com a data do pedido; os itens de
+    pedidos ausentes em `data` ficam de fora. Funciona tanto com os itens
+    linha a linha quanto com os itens já agregados por pedido × categoria
+    do modo em blocos.
+    """
+    itens = order_items_with_products
+    quantidade = itens['items_count'] if 'items_count' in itens else itens['order_id'].notna().astype('int64')
+    datas = pd.Series(data['order_purchase_timestamp'].dt.normalize().values, index=data['order_id'].values)
+    return (pd.DataFrame({'dia': itens['order_id'].map(datas),
+                          'product_category_name': itens['product_category_name'],
+                          'price': itens['price'].astype('float64'),
+                          'items_count': quantidade.astype('int64')})
+            .dropna(subset=['dia'])
+            .groupby(DIMENSOES_CATEGORIAS, dropna=False, observed=True, sort=True)
+            .sum()
+            .reset_index())
+
+
+def concatenar_compactos(antigo, novo):
+    """Concatena duas tabelas compactas mantendo as colunas categóricas.
+
+    As categorias novas são acrescentadas ao fim das antigas, então os
+    códigos de `antigo` não mudam.
+    """
+    novo = novo.copy()
+    for col in antigo.columns:
+        if isinstance(antigo[col].dtype, pd.CategoricalDtype) and col in novo:
+            categorias = antigo[col].cat.categories
+            faltantes = pd.Index(pd.unique(novo[col].dropna().to_numpy())).difference(categorias)
+            if len(faltantes):
+                antigo = antigo.assign(**{col: antigo[col].cat.add_categories(faltantes)})
+                categorias = antigo[col].cat.categories
+            novo[col] = pd.Categorical(novo[col], categories=categorias, ordered=antigo[col].cat.ordered)
+        elif col in novo and novo[col].dtype != antigo[col].dtype:
+            # Lotes pequenos (ou vazios) podem inferir outro tipo para a mesma coluna
+            novo[col] = novo[col].astype(antigo[col].dtype)
+    return pd.concat([antigo, novo], ignore_index=True)
+
+
+def combinar_cubos(cubo, cubo_novo, dimensoes=DIMENSOES_CUBO):
+    """Soma dois cubos diários (as medidas são somáveis célula a célula)."""
+    combinado = concatenar_compactos(cubo, cubo_novo)
+    return (combinado.groupby(dimensoes, dropna=False, observed=True, sort=True)
+            .sum()
+            .reset_index())
+
+
+def fatia_por_periodo(df, coluna, inicio, fim):
+    """Linhas de `df` com `coluna` em [inicio, fim), por busca binária.
+
+    `df` precisa estar ordenado por `coluna`. O recorte é feito por posição
+    (iloc), sem máscara booleana do tamanho da tabela.
+    """
+    valores = df[coluna].values
+    a, b = valores.searchsorted([pd.Timestamp(inicio).to_datetime64(),
+                                 pd.Timestamp(fim).to_datetime64()], side='left')
+    return df.iloc[a:b]
+
+
+# --- CACHE COLUNAR ---
+# O cache guarda `data` e `order_items_with_products` já juntados em Parquet.
+# A chave combina mtime, tamanho e hash SHA-256 de cada CSV de origem; o hash
+# só é recalculado quando mtime ou tamanho mudam em relação ao manifesto.
+def _hash_arquivo(caminho, limite=None, bloco=1 << 20):
+    h = hashlib.sha256()
+    restante = limite
+    with open(caminho, 'rb') as f:
+        while restante is None or restante > 0:
+            parte = f.read(bloco if restante is None else min(bloco, restante))
+            if not parte:
+                break
+            h.update(parte)
+            if restante is not None:
+                restante -= len(parte)
+    return h.hexdigest()
+
+
+def _ler_manifesto(pasta_cache):
+    try:
+        with open(os.path.join(pasta_cache, 'manifesto.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def assinatura_arquivo(caminho, anterior=None, tamanho=None):
+    """{mtime_ns, tamanho, sha256} de um arquivo; `tamanho` limita o hash aos primeiros bytes."""
+    st = os.stat(caminho)
+    tamanho = st.st_size if tamanho is None else tamanho
+    anterior = anterior or {}
+    if anterior.get('mtime_ns') == st.st_mtime_ns and anterior.get('tamanho') == tamanho:
+        sha = anterior['sha256']
+    else:
+        sha = _hash_arquivo(caminho, None if tamanho == st.st_size else tamanho)
+    return {'tabela': anterior.get('tabela'), 'mtime_ns': st.st_mtime_ns, 'tamanho': tamanho, 'sha256': sha}
+
+
+def assinatura_fontes(pasta=PASTA_DADOS, manifesto=None):
+    """Retorna {arquivo: {tabela, mtime_ns, tamanho, sha256}} dos CSVs de origem."""
+    anteriores = (manifesto or {}).get('fontes', {})
+    fontes = {}
+    for tabela in ARQUIVOS:
+        for caminho in arquivos_da_tabela(pasta, tabela):
+            nome = os.path.basename(caminho)
+            fontes[nome] = {**assinatura_arquivo(caminho, anteriores.get(nome)), 'tabela': tabela}
+    return fontes
+
+
+def chave_cache(fontes, streaming=False):
+    conteudo = json.dumps({'esquema': VERSAO_ESQUEMA,
+                           'streaming': streaming,
+                           'fontes': {n: f['sha256'] for n, f in sorted(fontes.items())}})
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+def _caminho_cache(pasta_cache, nome, chave):
+    return os.path.join(pasta_cache, f'{nome}-{chave}.parquet')
+
+
+def _substituir(caminho, escrever):
+    # Escrever num temporário e renomear, para nunca deixar arquivo pela metade.
+    # Cada escritor tem o seu temporário: processos gravando o mesmo caminho
+    # não renomeiam (nem apagam) o arquivo um do outro
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or '.',
+                                      prefix=os.path.basename(caminho) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        escrever(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporario)
+        raise
+
+
+def _gravar_parquet(df, caminho):
+    _substituir(caminho, lambda temporario: df.to_parquet(temporario, index=False))
+
+
+def salvar_manifesto(fontes, chave, pasta_cache=PASTA_CACHE):
+    def escrever(temporario):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'chave': chave, 'fontes': fontes}, f, indent=2)
+    _substituir(os.path.join(pasta_cache, 'manifesto.json'), escrever)
+
+
+# Leituras do cache tomam a trava compartilhada e gravações a exclusiva: a
+# limpeza de versões antigas não apaga um Parquet que outro processo está
+# lendo. O arquivo da trava fica na própria pasta de cache.
+@contextlib.contextmanager
+def trava_cache(pasta_cache=PASTA_CACHE, exclusiva=True):
+    """Trava entre processos da pasta de cache (exclusiva para gravar, compartilhada para ler)."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(pasta_cache, exist_ok=True)
+    with open(os.path.join(pasta_cache, '.trava'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        yield
+
+
+def reservar_gravacao(pasta_cache=PASTA_CACHE):
+    """Torna este processo o único que grava o cache fora da carga, se nenhum outro já for.
+
+    Retorna o arquivo travado, a manter aberto enquanto o processo viver (a
+    reserva acaba com ele), ou None se outro processo tem a reserva.
+    """
+    os.makedirs(pasta_cache, exist_ok=True)
+    arquivo = open(os.path.join(pasta_cache, '.gravador'), 'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            arquivo.close()
+            return None
+    return arquivo
+
+
+def salvar_cache(data, order_items_with_products, dicionarios, fontes, pasta_cache=PASTA_CACHE, streaming=False):
+    """Grava uma versão do cache e remove as anteriores; chamar com `trava_cache(pasta_cache)`."""
+    os.makedirs(pasta_cache, exist_ok=True)
+    chave = chave_cache(fontes, streaming)
+
+    _gravar_parquet(data, _caminho_cache(pasta_cache, 'data', chave))
+    _gravar_parquet(order_items_with_products, _caminho_cache(pasta_cache, 'order_items_with_products', chave))
+    for coluna, dicionario in dicionarios.items():
+        _gravar_parquet(pd.DataFrame({coluna: dicionario}), _caminho_cache(pasta_cache, f'ids_{coluna}', chave))
+
+    # Remover entradas de versões anteriores
+    for arquivo in os.listdir(pasta_cache):
+        if arquivo.endswith('.parquet') and chave not in arquivo:
+            os.remove(os.path.join(pasta_cache, arquivo))
+
+    salvar_manifesto(fontes, chave, pasta_cache)
+    return chave
+
+
+def carregar_cache(fontes, pasta_cache=PASTA_CACHE, streaming=False):
+    """Retorna (data, order_items_with_products, dicionarios) do cache ou None se estiver desatualizado."""
+    chave = chave_cache(fontes, streaming)
+    caminho_data = _caminho_cache(pasta_cache, 'data', chave)
+    caminho_itens = _caminho_cache(pasta_cache, 'order_items_with_products', chave)
+    if not (os.path.exists(caminho_data) and os.path.exists(caminho_itens)):
+        return None
+    dicionarios = {}
+    for coluna in COLUNAS_ID:
+        caminho = _caminho_cache(pasta_cache, f'ids_{coluna}', chave)
+        if os.path.exists(caminho):
+            dicionarios[coluna] = pd.Index(pd.read_parquet(caminho)[coluna])
+    return pd.read_parquet(caminho_data), pd.read_parquet(caminho_itens), dicionarios
+
+
+def _marcar(tempos, etapa, inicio):
+    agora = time.perf_counter()
+    tempos[etapa] = agora - inicio
+    return agora
+
+
+def montar_dados(pasta=PASTA_DADOS, streaming=False, relatorio=True, tempos=None):
+    """Lê os CSVs, faz as junções e compacta os tipos.
+
+    Com `streaming`, order_items e payments são reduzidos em blocos sem
+    serem carregados inteiros (a redução conta como leitura). Se `tempos` for
+    um dict, recebe a duração em segundos de cada etapa: leitura, juncao,
+    derivacao e tipos. Retorna (data, order_items_with_products, dicionarios).
+    """
+    tempos = {} if tempos is None else tempos
+    inicio = time.perf_counter()
+    if streaming:
+        orders = ler_tabela(pasta, 'orders')
+        customers = ler_tabela(pasta, 'customers')
+        products = ler_tabela(pasta, 'products', usecols=['product_id', 'product_category_name'])
+        order_revenue, order_items_with_products = resumir_itens_em_blocos(
+            arquivos_da_tabela(pasta, 'order_items'), products)
+        payment_summary = resumir_pagamentos_em_blocos(arquivos_da_tabela(pasta, 'payments'))
+        inicio = _marcar(tempos, 'leitura', inicio)
+    else:
+        orders, customers, order_items, products, sellers, payments = ler_csvs(pasta)
+        inicio = _marcar(tempos, 'leitura', inicio)
+        order_revenue, order_items_with_products = resumir_itens(order_items, products)
+        payment_summary = resumir_pagamentos(payments)
+    data = juntar_tabelas(orders, customers, order_revenue, payment_summary)
+    inicio = _marcar(tempos, 'juncao', inicio)
+    data = derivar_colunas(data)
+    inicio = _marcar(tempos, 'derivacao', inicio)
+
+    memoria_antes = data.memory_usage(deep=True)
+    data, order_items_with_products, dicionarios = otimizar_tipos(data, order_items_with_products)
+    # Registrar também pedidos citados só em pagamentos (sem linha em orders), para
+    # que a recarga incremental perceba quando eles chegarem
+    dicionarios['order_id'] = codificar_ids(payment_summary['order_id'], dicionarios['order_id'])[1]
+    _marcar(tempos, 'tipos', inicio)
+    if relatorio:
+        relatorio_memoria(memoria_antes, data.memory_usage(deep=True))
+    return data, order_items_with_products, dicionarios
+
+
+class ConjuntoDados:
+    """Uma versão dos dados carregados e dos agregados derivados dela.
+
+    Não é alterada depois de criada: a recarga monta um novo conjunto e troca
+    a referência, então quem já pegou um conjunto continua com uma visão
+    consistente.
+    """
+
+    def __init__(self, data, order_items_with_products, dicionarios, versao, fontes,
+                 streaming=False, cubo=None, cubo_categorias=None, hll_clientes=None, quantis=None):
+        self.data = data
+        self.order_items_with_products = order_items_with_products
+        self.dicionarios = dicionarios
+        self.versao = versao
+        self.fontes = fontes
+        self.streaming = streaming
+        self.cubo = construir_cubo_diario(data) if cubo is None else cubo
+        self.acumulados = SomasAcumuladas(self.cubo)
+        if cubo_categorias is None:
+            cubo_categorias = construir_cubo_categorias(data, order_items_with_products)
+        self.cubo_categorias = cubo_categorias
+        self.hll_clientes = construir_hll_clientes(data) if hll_clientes is None else hll_clientes
+        self.quantis = construir_quantis(data) if quantis is None else quantis
+
+    def periodo(self):
+        """Primeira e última data de compra (data está ordenado)."""
+        datas = self.data['order_purchase_timestamp']
+        return datas.iloc[0], datas.iloc[-1]
+
+    def clientes_distintos(self, inicio, fim, exata=CONTAGEM_EXATA):
+        """Clientes distintos com compra em [inicio, fim): estimativa do HyperLogLog
+        diário (erro ~1,6%) ou, com `exata`, contagem sobre as linhas do período."""
+        if exata:
+            return fatia_por_periodo(self.data, 'order_purchase_timestamp', inicio, fim)['customer_id'].nunique()
+        return self.hll_clientes.contar(inicio, fim)
+
+    def com_novos_pedidos(self, novos_dados, novos_itens, dicionarios, versao, fontes):
+        """Novo conjunto com pedidos acrescentados, já compactados com `dicionarios`."""
+        data = concatenar_compactos(self.data, novos_dados)
+        if len(novos_dados) and len(self.data) and \
+                novos_dados['order_purchase_timestamp'].min() < self.data['order_purchase_timestamp'].iloc[-1]:
+            data = data.sort_values('order_purchase_timestamp', kind='stable', ignore_index=True)
+        itens = concatenar_compactos(self.order_items_with_products, novos_itens)
+        cubo = combinar_cubos(self.cubo, construir_cubo_diario(novos_dados))
+        cubo_categorias = combinar_cubos(self.cubo_categorias,
+                                         construir_cubo_categorias(novos_dados, novos_itens),
+                                         DIMENSOES_CATEGORIAS)
+        hll_clientes = self.hll_clientes.combinar(construir_hll_clientes(novos_dados))
+        novos_quantis = construir_quantis(novos_dados)
+        quantis = {medida: esboco.combinar(novos_quantis[medida]) for medida, esboco in self.quantis.items()}
+        return ConjuntoDados(data, itens, dicionarios, versao, fontes, self.streaming, cubo, cubo_categorias,
+                             hll_clientes, quantis)
+
+
+def carregar_dados(pasta=PASTA_DADOS, pasta_cache=PASTA_CACHE, usar_cache=True, streaming=INGESTAO_STREAMING,
+                   tempos=None, sql=BACKEND_SQL):
+    """Carrega os dados como um ConjuntoDados, usando o cache colunar quando válido.
+
+    A versão do conjunto é a chave do cache, derivada dos arquivos de origem.
+    Se `tempos` for um dict, recebe a duração (s) de cada etapa da carga. Com
+    `sql`, a carga sem cache é feita pelo DuckDB (montar_dados_sql).
+    """
+    tempos = {} if tempos is None else tempos
+    if sql:
+        from backendSQL import DUCKDB_DISPONIVEL
+        if DUCKDB_DISPONIVEL:
+            # Os itens chegam agregados por pedido × categoria, como na leitura em blocos
+            streaming = True
+        else:
+            print("⚠️ duckdb não instalado: carga feita pelo pandas")
+            sql = False
+    inicio = time.perf_counter()
+    manifesto = _ler_manifesto(pasta_cache)
+    fontes = assinatura_fontes(pasta, manifesto)
+    versao = chave_cache(fontes, streaming)
+    inicio = _marcar(tempos, 'assinatura', inicio)
+
+    # Sem pyarrow o cache é ignorado e os CSVs são lidos como antes
+    usar_cache = usar_cache and PARQUET_DISPONIVEL
+    if not usar_cache:
+        return _montar_conjunto(pasta, pasta_cache, fontes, versao, streaming, sql, False, tempos)
+
+    with trava_cache(pasta_cache, exclusiva=False):
+        em_cache = carregar_cache(fontes, pasta_cache, streaming)
+    if em_cache is None:
+        # Só um processo monta e grava o cache; os demais esperam a trava e leem o que ele gravou
+        with trava_cache(pasta_cache):
+            em_cache = carregar_cache(fontes, pasta_cache, streaming)
+            if em_cache is None:
+                return _montar_conjunto(pasta, pasta_cache, fontes, versao, streaming, sql, True, tempos)
+    if manifesto.get('fontes') != fontes:
+        # Arquivos tocados sem mudar conteúdo: atualizar mtimes no manifesto
+        with trava_cache(pasta_cache):
+            salvar_manifesto(fontes, versao, pasta_cache)
+    print(f"⚡ Dados carregados do cache ({versao})")
+    # O Parquet não preserva categóricas de datas (order_month): reaplicar os tipos
+    em_cache = otimizar_tipos(*em_cache)
+    inicio = _marcar(tempos, 'cache', inicio)
+    conjunto = ConjuntoDados(*em_cache, versao, fontes, streaming)
+    _marcar(tempos, 'agregados', inicio)
+    return conjunto
+
+
+def _montar_conjunto(pasta, pasta_cache, fontes, versao, streaming, sql, gravar, tempos):
+    if sql:
+        from backendSQL import montar_dados_sql
+        data, order_items_with_products, dicionarios, cubos = montar_dados_sql(pasta, tempos=tempos)
+    else:
+        data, order_items_with_products, dicionarios = montar_dados(pasta, streaming, tempos=tempos)
+        cubos = {}
+    inicio = time.perf_counter()
+
+    if gravar:
+        try:
+            salvar_cache(data, order_items_with_products, dicionarios, fontes, pasta_cache, streaming)
+            print(f"💾 Cache gravado em {pasta_cache} ({versao})")
+        except OSError as e:
+            # Os dados já estão em memória: seguir sem cache e tentar de novo na próxima carga
+            print(f"⚠️  Falha ao gravar o cache em {pasta_cache}: {e}")
+        inicio = _marcar(tempos, 'gravacao_cache', inicio)
+    conjunto = ConjuntoDados(data, order_items_with_products, dicionarios, versao, fontes, streaming, **cubos)
+    _marcar(tempos, 'agregados', inicio)
+    return conjunto
+
+if __name__ == '__main__':
+    # Etapa de build: `python carregadorDados.py [--streaming | --sql]` lê os CSVs, faz as junções e grava o cache
+    sql = BACKEND_SQL or '--sql' in sys.argv[1:]
+    streaming = sql or INGESTAO_STREAMING or '--streaming' in sys.argv[1:]
+    try:
+        fontes = assinatura_fontes(PASTA_DADOS, _ler_manifesto(PASTA_CACHE))
+    except FileNotFoundError as e:
+        print(f"Arquivo não encontrado: {e}")
+        sys.exit(1)
+    if sql:
+        from backendSQL import montar_dados_sql
+        data, order_items_with_products, dicionarios, _ = montar_dados_sql(PASTA_DADOS)
+    else:
+        data, order_items_with_products, dicionarios = montar_dados(PASTA_DADOS, streaming)
+    with trava_cache(PASTA_CACHE):
+        chave = salvar_cache(data, order_items_with_products, dicionarios, fontes, PASTA_CACHE, streaming)
+    print(f"💾 Cache gravado em {PASTA_CACHE} ({chave}): {len(data)} pedidos, {len(order_items_with_products)} itens")
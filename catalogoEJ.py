@@ -0,0 +1,112 @@
+import random
+
+from faker.providers import BaseProvider
+
+# Valores fixos do domínio da EJ, compartilhados por geradorDados.py e geradorEscala.py
+
+ATIVIDADES_EMPRESA = ["PetShop", "Advocacia", "E-commerce", "Ensino", "Design", "Eventos", "Entretenimento", "Outros"]
+
+# --- Áreas disponíveis ---
+AREAS = {
+    1: "Desenvolvimento de Jogos",
+    2: "Desenvolvimento Web",
+    3: "Automação"
+}
+
+# Faixa de valor dos serviços de cada área
+FAIXAS_VALOR = {
+    "Desenvolvimento de Jogos": (150, 1200),
+    "Desenvolvimento Web": (150, 1500),
+    "Automação": (300, 1700),
+}
+
+TRIBUTOS = ["ISS", "ICMS", "IPI", "COFINS", "PIS", "IRPJ"]
+
+CATEGORIAS_DESPESA = [
+    "Cursos",
+    "Licença para produção",
+    "Troca de gestão",
+    "Contabilidade",
+    "Manutenção",
+    "Outros"
+]
+
+
+# --- Provider customizado ---
+class EJServiceProvider(BaseProvider):
+    web_titles = [
+        "Desenvolvimento de site institucional",
+        "E-commerce com checkout integrado",
+        "Landing page de campanha",
+        "Portal com CMS e blog",
+        "API REST e painel administrativo",
+        "Refatoração e otimização de performance web",
+        "Integração com gateway de pagamento",
+        "Sistema de autenticação e área do cliente"
+    ]
+    web_features = [
+        "layout responsivo", "SEO on-page", "otimização de imagens",
+        "cache e CDN", "analytics e eventos", "acessibilidade (WCAG)",
+        "integração com CRM", "formulários com validação"
+    ]
+    web_stacks = [
+        "Next.js + Node.js + PostgreSQL",
+        "React + Django + PostgreSQL",
+        "Vue + Laravel + MySQL",
+        "WordPress + WooCommerce",
+        "SvelteKit + Supabase"
+    ]
+
+    game_titles = [
+        "Protótipo de jogo 2D de plataforma",
+        "Jogo mobile de puzzles",
+        "Runner infinito com ranking",
+        "Serious game educativo",
+        "Advergame para campanha",
+        "Port do jogo para Android",
+        "Minigames para evento"
+    ]
+    game_features = [
+        "sistema de fases", "ranking online", "conquistas",
+        "IA básica de inimigos", "controle por toque/teclado",
+        "salvamento de progresso", "HUD e menus",
+        "efeitos sonoros e trilha"
+    ]
+    game_engines = ["Unity", "Godot", "Unreal (Blueprints)", "Phaser"]
+
+    auto_titles = [
+        "Automação de deploy (CI/CD)",
+        "RPA para extração de dados",
+        "Integração de APIs e webhooks",
+        "Robô de testes end-to-end",
+        "Monitoramento e alertas",
+        "Automação de relatórios semanais"
+    ]
+    auto_features = [
+        "pipelines GitHub Actions", "containers Docker",
+        "agendamento com cron", "logs centralizados",
+        "orquestração de tarefas", "testes E2E com Playwright/Selenium",
+        "integração com Slack/Discord"
+    ]
+    auto_tools = ["Python RPA", "Playwright", "Selenium", "Node-RED", "Airflow", "GitHub Actions"]
+
+    def service_title(self, area: str) -> str:
+        if area == "Desenvolvimento Web":
+            return random.choice(self.web_titles)
+        if area == "Desenvolvimento de Jogos":
+            return random.choice(self.game_titles)
+        return random.choice(self.auto_titles)
+
+    def service_description(self, area: str) -> str:
+        if area == "Desenvolvimento Web":
+            feats = ", ".join(random.sample(self.web_features, k=3))
+            stack = random.choice(self.web_stacks)
+            return f"Projeto web com foco em {feats}. Stack utilizada: {stack}."
+        if area == "Desenvolvimento de Jogos":
+            feats = ", ".join(random.sample(self.game_features, k=3))
+            engine = random.choice(self.game_engines)
+            alvo = random.choice(["web", "Android", "PC"])
+            return f"Jogo com {feats}. Desenvolvido na engine {engine}, com build para {alvo}."
+        feats = ", ".join(random.sample(self.auto_features, k=3))
+        tool = random.choice(self.auto_tools)
+        return f"Automação implementada usando {tool}, com {feats}."
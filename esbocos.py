@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+# --- ESBOÇOS POR DIA ---
+# Contagens distintas não são somáveis entre dias: o mesmo cliente pode
+# comprar em dois dias do período. Um HyperLogLog por dia resolve isso com
+# memória fixa: os registros de dois dias se combinam pelo máximo, e o esboço
+# de qualquer período é o máximo dos esboços dos seus dias.
+PRECISAO_HLL = 12          # 2^12 registros de 1 byte por dia; erro padrão ~1,04/√4096 ≈ 1,6%
+
+_UM = np.uint64(1)
+
+
+def misturar64(valores):
+    """Hash splitmix64 (bijetivo) de inteiros, vetorizado."""
+    x = np.asarray(valores).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _zeros_a_esquerda(x):
+    # Contagem de zeros à esquerda em 64 bits, por busca binária nos bits
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for passo in (32, 16, 8, 4, 2, 1):
+        vazios = (x >> np.uint64(64 - passo)) == 0
+        zeros[vazios] += passo
+        x[vazios] <<= np.uint64(passo)
+    return zeros
+
+
+class HllDiario:
+    """HyperLogLog de cada dia: `dias` ordenados e uma linha de registros por dia.
+
+    Não é alterado depois de criado; `combinar` devolve um novo esboço.
+    """
+
+    def __init__(self, dias, registros, precisao=PRECISAO_HLL):
+        self.dias = dias
+        self.registros = registros
+        self.precisao = precisao
+
+    @classmethod
+    def construir(cls, dias, valores, precisao=PRECISAO_HLL):
+        """Esboço dos `valores` (inteiros, ex.: códigos de ID) agrupados por `dias`."""
+        dias = pd.Series(dias).dt.normalize()
+        validos = dias.notna().to_numpy() & pd.notna(valores)
+        codigos_dia, unicos = pd.factorize(dias[validos], sort=True)
+        h = misturar64(np.asarray(valores)[validos])
+        # Os `precisao` bits altos escolhem o registro; o posto é a posição do
+        # primeiro bit 1 no restante (com um bit sentinela, nunca passa do limite)
+        registro = (h >> np.uint64(64 - precisao)).astype(np.int64)
+        resto = (h << np.uint64(precisao)) | (_UM << np.uint64(precisao - 1))
+        posto = _zeros_a_esquerda(resto) + 1
+
+        m = 1 << precisao
+        registros = np.zeros((len(unicos), m), dtype=np.uint8)
+        maximos = pd.Series(posto).groupby(codigos_dia.astype(np.int64) * m + registro).max()
+        registros.ravel()[maximos.index.to_numpy()] = maximos.to_numpy()
+        return cls(unicos.to_numpy(dtype='datetime64[ns]'), registros, precisao)
+
+    def combinar(self, outro):
+        """Esboço com os dias dos dois; dias em comum combinam os registros pelo máximo."""
+        dias = np.union1d(self.dias, outro.dias)
+        registros = np.zeros((len(dias), self.registros.shape[1]), dtype=np.uint8)
+        for esboco in (self, outro):
+            posicoes = np.searchsorted(dias, esboco.dias)
+            registros[posicoes] = np.maximum(registros[posicoes], esboco.registros)
+        return HllDiario(dias, registros, self.precisao)
+
+    def contar(self, inicio, fim):
+        """Estimativa de distintos nos dias em [inicio, fim)."""
+        a, b = self.dias.searchsorted([pd.Timestamp(inicio).to_datetime64(),
+                                       pd.Timestamp(fim).to_datetime64()], side='left')
+        if a == b:
+            return 0
+        return estimar(self.registros[a:b].max(axis=0))
+
+
+def estimar(registros):
+    """Estimativa do HyperLogLog, com contagem linear para cardinalidades pequenas."""
+    m = len(registros)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(np.exp2(-registros.astype(np.float64)))
+    vazios = int(np.count_nonzero(registros == 0))
+    if estimativa <= 2.5 * m and vazios:
+        estimativa = m * np.log(m / vazios)
+    return int(round(estimativa))
+
+
+# --- QUANTIS POR DIA ---
+# Esboço de quantis no estilo do DDSketch (Masson et al., 2019): cada valor
+# positivo cai no balde ceil(log_γ(x)), com γ = (1 + α) / (1 - α), e qualquer
+# quantil é devolvido com erro relativo de no máximo α. Os baldes de dois dias
+# se combinam somando as contagens, como os do t-digest ou do KLL, mas com
+# erro garantido e combinação exata.
+ERRO_RELATIVO = 0.01
+
+
+class QuantisDiarios:
+    """Contagens por balde logarítmico de cada dia: `dias` ordenados e uma linha
+    de `contagens` por dia, a partir do balde `primeiro`; zeros e negativos
+    ficam em `zeros`.
+
+    Não é alterado depois de criado; `combinar` devolve um novo esboço.
+    """
+
+    def __init__(self, dias, contagens, zeros, primeiro, alfa=ERRO_RELATIVO):
+        self.dias = dias
+        self.contagens = contagens
+        self.zeros = zeros
+        self.primeiro = primeiro
+        self.alfa = alfa
+        self.gama = (1 + alfa) / (1 - alfa)
+
+    @classmethod
+    def construir(cls, dias, valores, alfa=ERRO_RELATIVO):
+        """Esboço dos `valores` agrupados por `dias`; valores nulos ficam de fora."""
+        dias = pd.Series(dias).dt.normalize()
+        valores = np.asarray(valores, dtype=np.float64)
+        validos = dias.notna().to_numpy() & ~np.isnan(valores)
+        codigos_dia, unicos = pd.factorize(dias[validos], sort=True)
+        valores = valores[validos]
+
+        gama = (1 + alfa) / (1 - alfa)
+        positivos = valores > 0
+        baldes = np.zeros(len(valores), dtype=np.int64)
+        baldes[positivos] = np.ceil(np.log(valores[positivos]) / np.log(gama))
+        primeiro = int(baldes[positivos].min()) if positivos.any() else 0
+        n_baldes = int(baldes[positivos].max()) - primeiro + 1 if positivos.any() else 0
+
+        n_dias = len(unicos)
+        contagens = np.bincount(codigos_dia[positivos] * n_baldes + (baldes[positivos] - primeiro),
+                                minlength=n_dias * n_baldes).reshape(n_dias, n_baldes).astype(np.int32)
+        zeros = np.bincount(codigos_dia[~positivos], minlength=n_dias).astype(np.int32)
+        return cls(unicos.to_numpy(dtype='datetime64[ns]'), contagens, zeros, primeiro, alfa)
+
+    def combinar(self, outro):
+        """Esboço com os dias dos dois; dias e baldes em comum somam as contagens."""
+        dias = np.union1d(self.dias, outro.dias)
+        primeiro = min(self.primeiro, outro.primeiro)
+        ultimo = max(self.primeiro + self.contagens.shape[1], outro.primeiro + outro.contagens.shape[1])
+        contagens = np.zeros((len(dias), ultimo - primeiro), dtype=np.int32)
+        zeros = np.zeros(len(dias), dtype=np.int32)
+        for esboco in (self, outro):
+            posicoes = np.searchsorted(dias, esboco.dias)
+            inicio = esboco.primeiro - primeiro
+            contagens[posicoes, inicio:inicio + esboco.contagens.shape[1]] += esboco.contagens
+            zeros[posicoes] += esboco.zeros
+        return QuantisDiarios(dias, contagens, zeros, primeiro, self.alfa)
+
+    def quantis(self, inicio, fim, qs):
+        """Quantis `qs` (entre 0 e 1) dos valores dos dias em [inicio, fim); NaN sem valores."""
+        a, b = self.dias.searchsorted([pd.Timestamp(inicio).to_datetime64(),
+                                       pd.Timestamp(fim).to_datetime64()], side='left')
+        contagens = np.concatenate([[self.zeros[a:b].sum()], self.contagens[a:b].sum(axis=0)])
+        acumuladas = np.cumsum(contagens, dtype=np.int64)
+        total = acumuladas[-1] if len(acumuladas) else 0
+        if total == 0:
+            return [np.nan] * len(qs)
+        # Posição (0 a total - 1) de cada quantil e o balde que a contém
+        posicoes = np.searchsorted(acumuladas, np.floor(np.asarray(qs) * (total - 1)), side='right')
+        # Estimativa do balde k: 2γ^k / (γ + 1), a meio caminho (relativo) entre γ^(k-1) e γ^k
+        valores = 2 * self.gama ** (posicoes - 1 + self.primeiro) / (self.gama + 1)
+        return [0.0 if p == 0 else float(v) for p, v in zip(posicoes, valores)]
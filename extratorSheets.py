@@ -1,50 +1,359 @@
-import gspread
+import argparse
+import contextlib
 import csv
-from google.oauth2.service_account import Credentials
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from tiposSheets import PARQUET_DISPONIVEL, gravar_parquet, tipar
+
+# --- CONFIGURAÇÃO ---
+# Escopos necessários para acessar o Sheets e Drive
+scopes = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+# Caminho para o arquivo JSON baixado do Google Cloud
+CREDENCIAIS = "credenciais.json"
+PLANILHA = "teste-FluxoCaixa"
+
+# aba -> CSV de saída
+ABAS = {
+    'pessoa': 'data/dadosPessoa.csv',
+    'empresa': 'data/dadosEmpresa.csv',
+    'area_projeto': 'data/dadosArea_projeto.csv',
+    'servico': 'data/dadosServico.csv',
+    'despesa': 'data/dadosDespesa.csv',
+    'tributo': 'data/dadosTributo.csv',
+}
+
+MAX_CONCORRENCIA = 4        # leituras simultâneas quando não dá para ler em lote
+REQUISICOES_POR_MINUTO = 60 # cota de leitura da API do Sheets por usuário
+TENTATIVAS = 6
+ESPERA_INICIAL = 1.0        # segundos; dobra a cada tentativa, com variação aleatória
+ESPERA_MAXIMA = 32.0
+CODIGOS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+# Sincronização incremental (ver SINCRONIZAÇÃO INCREMENTAL)
+MANIFESTO = 'data/manifesto_sheets.json'
+PASTA_DELTAS = 'data/deltas'
+# 'csv', 'parquet' (tipado pelos esquemas de tiposSheets.py, ao lado do CSV) ou 'ambos'
+FORMATO = 'ambos'
+
 
 def escreveCSV (dados, caminho):
-    with open(caminho, 'w', newline='') as csvfile:
+    # Grava num temporário e renomeia: quem lê nunca vê um CSV pela metade
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', newline='') as csvfile:
         spamwriter = csv.writer(csvfile, delimiter=',',
                                 quotechar='"', quoting=csv.QUOTE_MINIMAL)
         for linha in dados:
             spamwriter.writerow(linha)
+    os.replace(temporario, caminho)
 
 
-# Escopos necessários para acessar o Sheets e Drive
-scopes = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
+def _gravar_json(dados, caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def cliente_google(credenciais=CREDENCIAIS):
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_file(credenciais, scopes=scopes)
+    # Autenticar no Google Sheets
+    return gspread.authorize(creds)
+
+
+# --- LEITURA COM RETENTATIVAS ---
+class OrcamentoApi:
+    """Limite global das chamadas à API, compartilhado por todas as threads.
+
+    No máximo `max_concorrencia` chamadas ao mesmo tempo e `por_minuto`
+    chamadas por minuto, espaçadas igualmente.
+    """
+
+    def __init__(self, max_concorrencia=MAX_CONCORRENCIA, por_minuto=REQUISICOES_POR_MINUTO):
+        self._vagas = threading.BoundedSemaphore(max_concorrencia)
+        self._intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self._proxima = time.monotonic()
+        self._trava = threading.Lock()
+
+    @contextlib.contextmanager
+    def chamada(self):
+        with self._vagas:
+            with self._trava:
+                agora = time.monotonic()
+                espera = self._proxima - agora
+                self._proxima = max(agora, self._proxima) + self._intervalo
+            if espera > 0:
+                time.sleep(espera)
+            yield
+
+
+def _codigo_http(erro):
+    # APIError do gspread 6 tem `code`; o do 5 guarda a resposta em `response`
+    codigo = getattr(erro, 'code', None)
+    if codigo is None:
+        codigo = getattr(getattr(erro, 'response', None), 'status_code', None)
+    return codigo
+
+
+def com_retentativas(funcao, *args, tentativas=TENTATIVAS, espera_inicial=ESPERA_INICIAL, orcamento=None):
+    """Chama `funcao(*args)`, repetindo com espera exponencial em limite de taxa (429) e erros 5xx.
+
+    Cada tentativa conta no `orcamento` (OrcamentoApi), se houver; a espera entre
+    tentativas não ocupa vaga.
+    """
+    for tentativa in range(tentativas):
+        try:
+            with orcamento.chamada() if orcamento else contextlib.nullcontext():
+                return funcao(*args)
+        except Exception as erro:
+            if _codigo_http(erro) not in CODIGOS_REPETIVEIS or tentativa == tentativas - 1:
+                raise
+            espera = min(ESPERA_MAXIMA, espera_inicial * 2 ** tentativa) * random.uniform(0.5, 1.0)
+            print(f"⏳ {erro} (HTTP {_codigo_http(erro)}); nova tentativa em {espera:.1f}s")
+            time.sleep(espera)
+
+
+def _preencher(linhas):
+    # A API omite células vazias no fim das linhas; get_all_values as completa
+    largura = max((len(linha) for linha in linhas), default=0)
+    return [linha + [''] * (largura - len(linha)) for linha in linhas]
+
+
+def ler_abas(planilha, abas, max_concorrencia=MAX_CONCORRENCIA, orcamento=None):
+    """Lê todas as `abas` de `planilha`; retorna {aba: linhas}.
+
+    Usa um único pedido em lote (values_batch_get) quando o cliente permite;
+    senão, lê as abas em paralelo com no máximo `max_concorrencia` leituras.
+    """
+    abas = list(abas)
+    if hasattr(planilha, 'values_batch_get'):
+        # Só o nome da aba (entre aspas) como intervalo: a aba inteira
+        resposta = com_retentativas(planilha.values_batch_get, [f"'{aba}'" for aba in abas], orcamento=orcamento)
+        intervalos = resposta.get('valueRanges', [])
+        return {aba: _preencher(intervalo.get('values', [])) for aba, intervalo in zip(abas, intervalos)}
+
+    def ler(aba):
+        return com_retentativas(lambda: planilha.worksheet(aba).get_all_values(), orcamento=orcamento)
+
+    with ThreadPoolExecutor(max_workers=max_concorrencia) as executor:
+        return dict(zip(abas, executor.map(ler, abas)))
+
+
+# --- SINCRONIZAÇÃO INCREMENTAL ---
+# O manifesto guarda, por aba, o hash do conteúdo, o cabeçalho e o hash de cada
+# linha (chaveada pela primeira coluna, o id). Só as abas cujo hash mudou são
+# regravadas, e as linhas inseridas, atualizadas e removidas de cada uma vão
+# para um arquivo de delta em PASTA_DELTAS, para os consumidores aplicarem.
+def _hash(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def _hashes_linhas(linhas):
+    """{id: hash da linha}, ou None se a primeira coluna não identifica as linhas."""
+    hashes = {}
+    for linha in linhas:
+        chave = linha[0] if linha else ''
+        if chave == '' or chave in hashes:
+            return None
+        hashes[chave] = _hash('\x1f'.join(linha))
+    return hashes
+
+
+def _ler_manifesto(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def calcular_delta(anterior, cabecalho, hashes, linhas):
+    """Linhas inseridas, atualizadas e removidas desde `anterior` (entrada do manifesto).
+
+    Sem estado anterior comparável (primeira sincronização, cabeçalho novo ou
+    ids repetidos), o delta é marcado como completo: o consumidor recarrega a aba.
+    """
+    if not anterior or anterior.get('cabecalho') != cabecalho or hashes is None or anterior.get('linhas') is None:
+        return {'completo': True, 'cabecalho': cabecalho, 'inseridas': linhas, 'atualizadas': [], 'removidas': []}
+    antigos = anterior['linhas']
+    return {'completo': False,
+            'cabecalho': cabecalho,
+            'inseridas': [linha for linha in linhas if linha[0] not in antigos],
+            'atualizadas': [linha for linha in linhas
+                            if linha[0] in antigos and antigos[linha[0]] != hashes[linha[0]]],
+            'removidas': [chave for chave in antigos if chave not in hashes]}
+
+
+def saidas(caminho, formato=FORMATO):
+    """Arquivos gravados para a aba cujo CSV é `caminho`."""
+    arquivos = []
+    if formato in ('csv', 'ambos'):
+        arquivos.append(caminho)
+    if formato in ('parquet', 'ambos'):
+        arquivos.append(os.path.splitext(caminho)[0] + '.parquet')
+    return arquivos
+
+
+def sincronizar(dados, abas=ABAS, manifesto=MANIFESTO, pasta_deltas=PASTA_DELTAS, completo=False, formato=FORMATO,
+                rotulo=''):
+    """Grava só as abas de `dados` que mudaram desde a última sincronização.
+
+    Com `completo`, regrava todas. `rotulo` prefixa as mensagens. Retorna
+    {aba: delta} das abas gravadas.
+    """
+    if formato != 'csv' and not PARQUET_DISPONIVEL:
+        print("⚠️  Pacote 'pyarrow' não instalado: gravando só os CSVs")
+        formato = 'csv'
+    estado = _ler_manifesto(manifesto)
+    deltas = {}
+    for aba, caminho in abas.items():
+        linhas = dados[aba]
+        hash_aba = _hash(json.dumps(linhas, ensure_ascii=False))
+        anterior = estado.get(aba)
+        arquivos = saidas(caminho, formato)
+        if (not completo and anterior and anterior['hash'] == hash_aba
+                and anterior.get('arquivos') == arquivos and all(map(os.path.exists, arquivos))):
+            print(f"⏭️  {rotulo}{aba}: sem mudanças")
+            continue
+
+        cabecalho, corpo = (linhas[0], linhas[1:]) if linhas else ([], [])
+        hashes = _hashes_linhas(corpo)
+        delta = calcular_delta(None if completo else anterior, cabecalho, hashes, corpo)
+        # Tipar antes de gravar qualquer coisa: valores fora do esquema (ErroEsquema) param a aba
+        tipado = tipar(aba, linhas) if formato != 'csv' else None
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        for arquivo in arquivos:
+            if arquivo.endswith('.parquet'):
+                gravar_parquet(tipado, arquivo)
+            else:
+                escreveCSV(linhas, arquivo)
+        estado[aba] = {'arquivos': arquivos, 'hash': hash_aba, 'cabecalho': cabecalho, 'linhas': hashes}
+        deltas[aba] = {'arquivos': arquivos, **delta}
+        if delta['completo']:
+            print(f"✅ {rotulo}{aba}: gravada completa ({len(corpo)} linhas)")
+        else:
+            print(f"✅ {rotulo}{aba}: {len(delta['inseridas'])} inseridas, {len(delta['atualizadas'])} atualizadas, "
+                  f"{len(delta['removidas'])} removidas")
+
+    if deltas:
+        # O delta vai antes do manifesto: se a execução cair no meio, a próxima refaz o delta
+        _gravar_json({'em': datetime.now().isoformat(timespec='seconds'), 'abas': deltas},
+                     os.path.join(pasta_deltas, f"delta-{datetime.now():%Y%m%d-%H%M%S-%f}.json"))
+        _gravar_json(estado, manifesto)
+    return deltas
+
+
+def extrair(cliente, nome_planilha=PLANILHA, abas=ABAS, completo=False, formato=FORMATO):
+    """Lê as abas da planilha e grava as que mudaram, cada uma no seu CSV."""
+    inicio = time.perf_counter()
+    # Abrir a planilha pelo nome
+    planilha = com_retentativas(cliente.open, nome_planilha)
+    dados = ler_abas(planilha, abas)
+    deltas = sincronizar(dados, abas, completo=completo, formato=formato)
+    print(f"✅ {nome_planilha}: {len(deltas)} de {len(dados)} abas gravadas em {time.perf_counter() - inicio:.2f}s")
+    return dados
+
+
+# --- VÁRIAS PLANILHAS (uma por EJ) ---
+# O arquivo de configuração (JSON) lista as planilhas e, opcionalmente, as abas
+# de cada uma ({aba: nome do CSV}; padrão: as de ABAS). Cada EJ vai para a sua
+# partição <pasta_saida>/ej=<nome>/, com manifesto e deltas próprios.
+PASTA_SAIDA_EJS = 'data/ejs'
+
+
+def ler_config(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        config = json.load(f)
+    padrao = {aba: os.path.basename(csv) for aba, csv in ABAS.items()}
+    for item in config['planilhas']:
+        item.setdefault('abas', padrao)
+    config.setdefault('pasta_saida', PASTA_SAIDA_EJS)
+    config.setdefault('max_concorrencia', MAX_CONCORRENCIA)
+    config.setdefault('requisicoes_por_minuto', REQUISICOES_POR_MINUTO)
+    return config
+
+
+def extrair_ej(cliente, item, pasta_saida, orcamento, completo=False, formato=FORMATO):
+    """Extrai a planilha de uma EJ para a sua partição; retorna a linha do relatório."""
+    inicio = time.perf_counter()
+    particao = os.path.join(pasta_saida, f"ej={item['ej']}")
+    abas = {aba: os.path.join(particao, arquivo) for aba, arquivo in item['abas'].items()}
+    relatorio = {'ej': item['ej'], 'planilha': item['planilha'], 'particao': particao}
+    try:
+        planilha = com_retentativas(cliente.open, item['planilha'], orcamento=orcamento)
+        dados = ler_abas(planilha, abas, orcamento=orcamento)
+        relatorio['segundos_leitura'] = round(time.perf_counter() - inicio, 3)
+        deltas = sincronizar(dados, abas, os.path.join(particao, 'manifesto_sheets.json'),
+                             os.path.join(particao, 'deltas'), completo, formato, rotulo=f"[{item['ej']}] ")
+        relatorio.update(linhas={aba: max(len(linhas) - 1, 0) for aba, linhas in dados.items()},
+                         abas_gravadas=sorted(deltas))
+    except Exception as erro:
+        # Uma planilha com problema não derruba as outras
+        relatorio['erro'] = f"{type(erro).__name__}: {erro}"
+    relatorio['segundos'] = round(time.perf_counter() - inicio, 3)
+    return relatorio
 
-# Caminho para o arquivo JSON baixado do Google Cloud
-creds = Credentials.from_service_account_file("credenciais.json", scopes=scopes)
 
-# Autenticar no Google Sheets
-client = gspread.authorize(creds)
+def extrair_varias(cliente, config, completo=False, formato=FORMATO):
+    """Extrai todas as planilhas de `config` em paralelo, sob um orçamento global da API."""
+    inicio = time.perf_counter()
+    orcamento = OrcamentoApi(config['max_concorrencia'], config['requisicoes_por_minuto'])
+    with ThreadPoolExecutor(max_workers=config['max_concorrencia']) as executor:
+        relatorios = list(executor.map(
+            lambda item: extrair_ej(cliente, item, config['pasta_saida'], orcamento, completo, formato),
+            config['planilhas']))
 
-# Abrir a planilha pelo nome
-spreadsheet = client.open("teste-FluxoCaixa")
+    print(f"\n{'EJ':<24} {'segundos':>9} {'linhas':>9} {'gravadas':>9}")
+    for r in relatorios:
+        if 'erro' in r:
+            print(f"{r['ej']:<24} {r['segundos']:>9.2f}  ❌ {r['erro']}")
+        else:
+            print(f"{r['ej']:<24} {r['segundos']:>9.2f} {sum(r['linhas'].values()):>9} {len(r['abas_gravadas']):>9}")
+    total = time.perf_counter() - inicio
+    print(f"⏱️  {len(relatorios)} planilhas em {total:.2f}s")
 
-# Ler todas as linhas
-dadosPessoa = spreadsheet.worksheet("pessoa").get_all_values()
-dadosEmpresa = spreadsheet.worksheet("empresa").get_all_values()
-dadosArea_projeto = spreadsheet.worksheet("area_projeto") .get_all_values()
-dadosServico =  spreadsheet.worksheet("servico").get_all_values()
-dadosDespesa = spreadsheet.worksheet("despesa") .get_all_values()
-dadosTributo = spreadsheet.worksheet("tributo").get_all_values()
+    caminho = os.path.join(config['pasta_saida'], f"relatorio-{datetime.now():%Y%m%d-%H%M%S}.json")
+    _gravar_json({'em': datetime.now().isoformat(timespec='seconds'), 'segundos': round(total, 3),
+                  'planilhas': relatorios}, caminho)
+    print(f"💾 Relatório gravado em {caminho}")
+    return relatorios
 
-commitSpreadSheet = [] # pair <table, directory>
-commitSpreadSheet.append([dadosPessoa, 'data/dadosPessoa.csv'])
-commitSpreadSheet.append([dadosEmpresa, 'data/dadosEmpresa.csv'])
-commitSpreadSheet.append([dadosArea_projeto, 'data/dadosArea_projeto.csv'])
-commitSpreadSheet.append([dadosServico, 'data/dadosServico.csv'])
-commitSpreadSheet.append([dadosDespesa, 'data/dadosDespesa.csv'])
-commitSpreadSheet.append([dadosTributo, 'data/dadosTributo.csv'])
 
-for table, directory in commitSpreadSheet:  
-    escreveCSV(table, directory)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extrai as abas da planilha para CSVs em data/.')
+    parser.add_argument('--config', metavar='JSON', help='extrair as planilhas de várias EJs listadas no arquivo')
+    parser.add_argument('--local', metavar='PASTA',
+                        help='ler de CSVs locais (uma aba por arquivo) em vez do Google Sheets; '
+                             'com --config, PASTA/<planilha>/ para cada planilha')
+    parser.add_argument('--completo', action='store_true', help='regravar todas as abas, mudadas ou não')
+    parser.add_argument('--formato', choices=['csv', 'parquet', 'ambos'], default=FORMATO,
+                        help='CSV, Parquet tipado ou os dois (padrão)')
+    args = parser.parse_args()
 
-'''
-FUNÇOES
-'''
+    config = ler_config(args.config) if args.config else None
+    if args.local:
+        from sheetsLocal import ClienteLocal
+        if config:
+            client = ClienteLocal({item['planilha']: os.path.join(args.local, item['planilha'])
+                                   for item in config['planilhas']})
+        else:
+            client = ClienteLocal({PLANILHA: args.local})
+    else:
+        client = cliente_google()
 
+    if config:
+        extrair_varias(client, config, completo=args.completo, formato=args.formato)
+    else:
+        extrair(client, completo=args.completo, formato=args.formato)
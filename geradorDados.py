@@ -1,12 +1,21 @@
 import pandas as pd
 import random
+import sys
 import faker
 from faker import Faker
-from faker.providers import BaseProvider
 import random
 import pandas as pd
 from datetime import date
 
+from catalogoEJ import AREAS, ATIVIDADES_EMPRESA, CATEGORIAS_DESPESA, FAIXAS_VALOR, TRIBUTOS, EJServiceProvider
+
+# Modo escalável (milhões de linhas, vetorizado e em paralelo): ver geradorEscala.py
+# ex.: python geradorDados.py --servicos 1000000 --despesas 200000
+if __name__ == '__main__' and len(sys.argv) > 1:
+    import geradorEscala
+    geradorEscala.main(sys.argv[1:])
+    sys.exit()
+
 # Inicializa o gerador de dados falsos
 fake = faker.Faker('pt_BR')
 random.seed(42)
@@ -29,7 +38,6 @@ pessoa_df.to_csv("fake_data/pessoa.csv", index=False)
 # -----------------
 # Geração de empresa.csv (20 linhas)
 # -----------------
-companyActivity = ["PetShop", "Advocacia", "E-commerce", "Ensino", "Design", "Eventos", "Entretenimento", "Outros"]
 empresa_data = []
 for i in range(1, 31):
     empresa_data.append([
@@ -40,7 +48,7 @@ for i in range(1, 31):
         fake.email(),
         random.randint(1000, 20000),
         fake.address(),
-        companyActivity[random.randint(0, 7)]
+        ATIVIDADES_EMPRESA[random.randint(0, 7)]
     ])
 
 empresa_df = pd.DataFrame(empresa_data, columns=["id_empresa", "nome", "cnpj","telefone","email","capital_social", "endereco", "area_empresa"])
@@ -56,101 +64,13 @@ area_df.to_csv("fake_data/area_projeto.csv", index=False)
 # -----------------
 # Geração de servico.csv (100 linhas)
 # -----------------
-# --- Provider customizado ---
-class EJServiceProvider(BaseProvider):
-    web_titles = [
-        "Desenvolvimento de site institucional",
-        "E-commerce com checkout integrado",
-        "Landing page de campanha",
-        "Portal com CMS e blog",
-        "API REST e painel administrativo",
-        "Refatoração e otimização de performance web",
-        "Integração com gateway de pagamento",
-        "Sistema de autenticação e área do cliente"
-    ]
-    web_features = [
-        "layout responsivo", "SEO on-page", "otimização de imagens",
-        "cache e CDN", "analytics e eventos", "acessibilidade (WCAG)",
-        "integração com CRM", "formulários com validação"
-    ]
-    web_stacks = [
-        "Next.js + Node.js + PostgreSQL",
-        "React + Django + PostgreSQL",
-        "Vue + Laravel + MySQL",
-        "WordPress + WooCommerce",
-        "SvelteKit + Supabase"
-    ]
-
-    game_titles = [
-        "Protótipo de jogo 2D de plataforma",
-        "Jogo mobile de puzzles",
-        "Runner infinito com ranking",
-        "Serious game educativo",
-        "Advergame para campanha",
-        "Port do jogo para Android",
-        "Minigames para evento"
-    ]
-    game_features = [
-        "sistema de fases", "ranking online", "conquistas",
-        "IA básica de inimigos", "controle por toque/teclado",
-        "salvamento de progresso", "HUD e menus",
-        "efeitos sonoros e trilha"
-    ]
-    game_engines = ["Unity", "Godot", "Unreal (Blueprints)", "Phaser"]
-
-    auto_titles = [
-        "Automação de deploy (CI/CD)",
-        "RPA para extração de dados",
-        "Integração de APIs e webhooks",
-        "Robô de testes end-to-end",
-        "Monitoramento e alertas",
-        "Automação de relatórios semanais"
-    ]
-    auto_features = [
-        "pipelines GitHub Actions", "containers Docker",
-        "agendamento com cron", "logs centralizados",
-        "orquestração de tarefas", "testes E2E com Playwright/Selenium",
-        "integração com Slack/Discord"
-    ]
-    auto_tools = ["Python RPA", "Playwright", "Selenium", "Node-RED", "Airflow", "GitHub Actions"]
-
-    def service_title(self, area: str) -> str:
-        if area == "Desenvolvimento Web":
-            return random.choice(self.web_titles)
-        if area == "Desenvolvimento de Jogos":
-            return random.choice(self.game_titles)
-        return random.choice(self.auto_titles)
-
-    def service_description(self, area: str) -> str:
-        if area == "Desenvolvimento Web":
-            feats = ", ".join(random.sample(self.web_features, k=3))
-            stack = random.choice(self.web_stacks)
-            return f"Projeto web com foco em {feats}. Stack utilizada: {stack}."
-        if area == "Desenvolvimento de Jogos":
-            feats = ", ".join(random.sample(self.game_features, k=3))
-            engine = random.choice(self.game_engines)
-            alvo = random.choice(["web", "Android", "PC"])
-            return f"Jogo com {feats}. Desenvolvido na engine {engine}, com build para {alvo}."
-        feats = ", ".join(random.sample(self.auto_features, k=3))
-        tool = random.choice(self.auto_tools)
-        return f"Automação implementada usando {tool}, com {feats}."
-
 fake.add_provider(EJServiceProvider)
 
-# --- Áreas disponíveis ---
-areas = {
-    1: "Desenvolvimento de Jogos",
-    2: "Desenvolvimento Web",
-    3: "Automação"
-}
+areas = AREAS
 
 # --- Função auxiliar para valores ---
 def gerar_valor(area_nome: str) -> float:
-    if area_nome == "Desenvolvimento de Jogos":
-        return round(random.uniform(150, 1200), 2)
-    if area_nome == "Desenvolvimento Web":
-        return round(random.uniform(150, 1500), 2)
-    return round(random.uniform(300, 1700), 2)  # Automação
+    return round(random.uniform(*FAIXAS_VALOR[area_nome]), 2)
 
 # --- Geração dos serviços ---
 servico_data = []
@@ -211,7 +131,7 @@ servico_df.to_csv("fake_data/servico.csv", index=False, encoding="utf-8")
 # Geração de tributo.csv (~120 linhas)
 # -----------------
 tributo_data = []
-tributos_possiveis = ["ISS", "ICMS", "IPI", "COFINS", "PIS", "IRPJ"]
+tributos_possiveis = TRIBUTOS
 id_counter = 1
 for i in range(1, 101):
     n_tributos = 1 if random.random() < 0.8 else 2  # média de 1,2 tributos por serviço
@@ -233,14 +153,7 @@ tributo_df.to_csv("fake_data/tributo.csv", index=False)
 # Geração de despesa.csv (30 linhas)
 # -----------------
 despesa_data = []
-categorias_despesa = [
-    "Cursos",
-    "Licença para produção",
-    "Troca de gestão",
-    "Contabilidade",
-    "Manutenção",
-    "Outros"
-]
+categorias_despesa = CATEGORIAS_DESPESA
 
 # Gerar dados de despesas
 despesa_data = []
@@ -0,0 +1,247 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+from catalogoEJ import AREAS, ATIVIDADES_EMPRESA, CATEGORIAS_DESPESA, FAIXAS_VALOR, TRIBUTOS, EJServiceProvider
+from partesCsv import caminho_parte, juntar_partes
+
+# --- CONFIGURAÇÃO ---
+# Geração das tabelas da EJ em escala: colunas numéricas, datas e categorias são
+# sorteadas em bloco com NumPy e os textos vêm de pools gerados uma vez com o Faker.
+# Cada tabela é dividida em partes de LINHAS_POR_PARTE linhas, geradas em paralelo;
+# a semente de cada parte deriva de (semente, tabela, parte), então o resultado
+# não depende do número de processos.
+PASTA_SAIDA = 'fake_data'
+SEMENTE = 42
+LINHAS_POR_PARTE = 250_000
+TAMANHO_POOL = 5_000
+INICIO_SERVICOS = date(2018, 1, 1)
+ANOS_DESPESAS = 8
+
+TABELAS = ('pessoa', 'empresa', 'servico', 'tributo', 'despesa')
+PROBABILIDADE_AREA = [0.2, 0.4, 0.4]     # mesmas proporções do modo pequeno
+PROBABILIDADE_EM_ANDAMENTO = 0.3
+PROBABILIDADE_CLIENTE_PESSOA = 0.1
+PROBABILIDADE_DOIS_TRIBUTOS = 0.2        # média de 1,2 tributos por serviço
+
+_contexto = None
+
+
+# --- POOLS DE TEXTO ---
+def gerar_pools(semente, tamanho=TAMANHO_POOL):
+    """Textos pré-gerados com o Faker, sorteados depois por índice."""
+    fake = Faker('pt_BR')
+    fake.seed_instance(semente)
+    fake.add_provider(EJServiceProvider)
+    random.seed(semente)  # o provider dos serviços usa o `random` global
+
+    pools = {
+        'nome': [fake.name() for _ in range(tamanho)],
+        'email': [fake.email() for _ in range(tamanho)],
+        'telefone': [fake.phone_number() for _ in range(tamanho)],
+        'empresa': [fake.company() for _ in range(tamanho)],
+        'cnpj': [fake.cnpj() for _ in range(tamanho)],
+        'endereco': [fake.address() for _ in range(tamanho)],
+        'frase': [fake.sentence(nb_words=4) for _ in range(tamanho)],
+    }
+    for id_area, area in AREAS.items():
+        pools[f'titulo_{id_area}'] = [fake.service_title(area) for _ in range(tamanho)]
+        pools[f'descricao_{id_area}'] = [fake.service_description(area) for _ in range(tamanho)]
+    return {nome: np.array(textos, dtype=object) for nome, textos in pools.items()}
+
+
+def _sortear(rng, pool, n):
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def _datas_entre(rng, inicio, fim):
+    # Dia uniforme em [inicio, fim], elemento a elemento (arrays datetime64[D])
+    dias = (fim - inicio).astype('int64')
+    return inicio + np.floor(rng.random(len(dias)) * (dias + 1)).astype('int64').astype('timedelta64[D]')
+
+
+def _ids_opcionais(rng, presente, maximo):
+    # Chave estrangeira inteira com vazios (Int64), sorteada em [1, maximo]
+    return pd.arrays.IntegerArray(rng.integers(1, maximo + 1, len(presente)), ~presente)
+
+
+def _tributos_por_servico(semente, parte, n):
+    # Sorteio separado do resto da parte: o processo principal também precisa
+    # dele para numerar os tributos de cada parte antes de gerá-las
+    rng = np.random.default_rng([semente, TABELAS.index('tributo'), parte, 0])
+    return 1 + (rng.random(n) < PROBABILIDADE_DOIS_TRIBUTOS)
+
+
+# --- TABELAS (uma parte por chamada) ---
+def _pessoa(rng, ids, ctx):
+    n = len(ids)
+    pools = ctx['pools']
+    return pd.DataFrame({'id_pessoa': ids,
+                         'nome': _sortear(rng, pools['nome'], n),
+                         'email': _sortear(rng, pools['email'], n),
+                         'telefone': _sortear(rng, pools['telefone'], n)})
+
+
+def _empresa(rng, ids, ctx):
+    n = len(ids)
+    pools = ctx['pools']
+    return pd.DataFrame({'id_empresa': ids,
+                         'nome': _sortear(rng, pools['empresa'], n),
+                         'cnpj': _sortear(rng, pools['cnpj'], n),
+                         'telefone': _sortear(rng, pools['telefone'], n),
+                         'email': _sortear(rng, pools['email'], n),
+                         'capital_social': rng.integers(1000, 20001, n),
+                         'endereco': _sortear(rng, pools['endereco'], n),
+                         'area_empresa': rng.choice(ATIVIDADES_EMPRESA, n)})
+
+
+def _servico(rng, ids, ctx):
+    n = len(ids)
+    pools = ctx['pools']
+    id_area = rng.choice(list(AREAS), n, p=PROBABILIDADE_AREA)
+    titulo = np.empty(n, dtype=object)
+    descricao = np.empty(n, dtype=object)
+    minimo = np.empty(n)
+    maximo = np.empty(n)
+    for area, nome_area in AREAS.items():
+        da_area = id_area == area
+        k = int(da_area.sum())
+        titulo[da_area] = _sortear(rng, pools[f'titulo_{area}'], k)
+        descricao[da_area] = _sortear(rng, pools[f'descricao_{area}'], k)
+        minimo[da_area], maximo[da_area] = FAIXAS_VALOR[nome_area]
+
+    fim = np.datetime64(ctx['ate'], 'D')
+    data_inicio = _datas_entre(rng, np.full(n, np.datetime64(INICIO_SERVICOS, 'D')), np.full(n, fim))
+    em_andamento = rng.random(n) < PROBABILIDADE_EM_ANDAMENTO
+    data_fim = _datas_entre(rng, data_inicio, np.full(n, fim))
+    data_fim[em_andamento] = np.datetime64('NaT')
+    status = np.where(em_andamento, 'Em andamento', rng.choice(['Concluído', 'Cancelado'], n))
+
+    cliente_pessoa = rng.random(n) < PROBABILIDADE_CLIENTE_PESSOA
+    return pd.DataFrame({'id_servico': ids,
+                         'titulo': titulo,
+                         'descricao': descricao,
+                         'valor': (minimo + rng.random(n) * (maximo - minimo)).round(2),
+                         'data_inicio': data_inicio,
+                         'data_fim': data_fim,
+                         'status': status,
+                         'id_area': id_area,
+                         'id_pessoa': _ids_opcionais(rng, cliente_pessoa, ctx['linhas']['pessoa']),
+                         'id_empresa': _ids_opcionais(rng, ~cliente_pessoa, ctx['linhas']['empresa'])})
+
+
+def _tributo(rng, ids_servico, ctx, parte, primeiro_id):
+    por_servico = _tributos_por_servico(ctx['semente'], parte, len(ids_servico))
+    n = int(por_servico.sum())
+    return pd.DataFrame({'id_tributo': np.arange(primeiro_id, primeiro_id + n),
+                         'tipo': rng.choice(TRIBUTOS, n),
+                         'percentual': (1 + rng.random(n) * 19).round(2),
+                         'id_servico': np.repeat(ids_servico, por_servico)})
+
+
+def _despesa(rng, ids, ctx):
+    n = len(ids)
+    fim = np.datetime64(ctx['ate'], 'D')
+    # DateOffset leva 29/02 para 28/02 quando o ano de destino não é bissexto
+    inicio = np.datetime64(pd.Timestamp(ctx['ate']) - pd.DateOffset(years=ANOS_DESPESAS), 'D')
+    return pd.DataFrame({'id_despesa': ids,
+                         'descricao': _sortear(rng, ctx['pools']['frase'], n),
+                         'valor': (50 + rng.random(n) * 950).round(2),
+                         'data': _datas_entre(rng, np.full(n, inicio), np.full(n, fim)),
+                         'categoria': rng.choice(CATEGORIAS_DESPESA, n)})
+
+
+GERADORES = {'pessoa': _pessoa, 'empresa': _empresa, 'servico': _servico, 'despesa': _despesa}
+
+
+def _gerar_parte(tarefa):
+    tabela, parte, inicio, fim, extra = tarefa
+    ctx = _contexto
+    rng = np.random.default_rng([ctx['semente'], TABELAS.index(tabela), parte])
+    ids = np.arange(inicio, fim) + 1
+    if tabela == 'tributo':
+        df = _tributo(rng, ids, ctx, parte, extra)
+    else:
+        df = GERADORES[tabela](rng, ids, ctx)
+    # Só a primeira parte leva o cabeçalho: as partes são concatenadas byte a byte
+    df.to_csv(caminho_parte(ctx['pasta'], tabela, parte), index=False, header=parte == 0)
+    return tabela, len(df)
+
+
+def _iniciar_processo(contexto):
+    global _contexto
+    _contexto = contexto
+
+
+# --- EXECUÇÃO ---
+def _tarefas(linhas, semente, linhas_por_parte):
+    tarefas = []
+    for tabela in TABELAS:
+        # tributo é dividido pelos serviços a que pertence
+        total = linhas['servico' if tabela == 'tributo' else tabela]
+        proximo_tributo = 1
+        # Tabela vazia ainda gera uma parte (sem linhas) para o CSV sair com cabeçalho
+        for parte, inicio in enumerate(range(0, max(total, 1), linhas_por_parte)):
+            fim = min(inicio + linhas_por_parte, total)
+            tarefas.append((tabela, parte, inicio, fim, proximo_tributo))
+            if tabela == 'tributo':
+                proximo_tributo += int(_tributos_por_servico(semente, parte, fim - inicio).sum())
+    return tarefas
+
+
+def gerar(linhas, pasta=PASTA_SAIDA, semente=SEMENTE, processos=None, linhas_por_parte=LINHAS_POR_PARTE, ate=None):
+    """Grava as tabelas da EJ em `pasta` com as quantidades de `linhas` por tabela.
+
+    `linhas` tem pessoa, empresa, servico e despesa; tributo sai com 1 ou 2 por serviço.
+    """
+    inicio = time.perf_counter()
+    os.makedirs(pasta, exist_ok=True)
+    contexto = {'pools': gerar_pools(semente), 'linhas': linhas, 'semente': semente,
+                'pasta': pasta, 'ate': ate or date.today()}
+    pd.DataFrame({'id_area': list(AREAS), 'nome_area': list(AREAS.values())}).to_csv(
+        os.path.join(pasta, 'area_projeto.csv'), index=False)
+
+    tarefas = _tarefas(linhas, semente, linhas_por_parte)
+    processos = processos or os.cpu_count() or 1
+    if processos == 1:
+        _iniciar_processo(contexto)
+        resultados = [_gerar_parte(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(contexto,)) as executor:
+            resultados = list(executor.map(_gerar_parte, tarefas))
+
+    for tabela in TABELAS:
+        n_partes = sum(1 for t in tarefas if t[0] == tabela)
+        juntar_partes(pasta, tabela, n_partes)
+        total = sum(n for t, n in resultados if t == tabela)
+        print(f"✅ {tabela}.csv: {total:,} linhas ({n_partes} partes)")
+    print(f"⏱️  Gerado em {time.perf_counter() - inicio:.1f}s com {processos} processo(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera as tabelas da EJ em escala, com tamanhos configuráveis.')
+    parser.add_argument('--pessoas', type=int, default=6)
+    parser.add_argument('--empresas', type=int, default=30)
+    parser.add_argument('--servicos', type=int, default=100)
+    parser.add_argument('--despesas', type=int, default=29)
+    parser.add_argument('--pasta', default=PASTA_SAIDA)
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--processos', type=int, help='padrão: número de CPUs')
+    parser.add_argument('--linhas-por-parte', type=int, default=LINHAS_POR_PARTE)
+    parser.add_argument('--ate', type=date.fromisoformat,
+                        help='data final AAAA-MM-DD (padrão: hoje; fixe para repetir uma geração)')
+    args = parser.parse_args(argv)
+    linhas = {'pessoa': args.pessoas, 'empresa': args.empresas,
+              'servico': args.servicos, 'despesa': args.despesas}
+    gerar(linhas, args.pasta, args.semente, args.processos, args.linhas_por_parte, args.ate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from carregadorDados import ARQUIVOS, PASTA_DADOS
+from partesCsv import caminho_parte, juntar_partes
+
+# --- CONFIGURAÇÃO ---
+# Gera os seis CSVs da Olist que o app.py lê, com as mesmas colunas do dataset
+# público e referências consistentes entre as tabelas. Os pedidos são gerados em
+# blocos de PEDIDOS_POR_BLOCO (pedidos, clientes, itens e pagamentos de cada
+# bloco juntos), gravados em partes e concatenados: a memória não cresce com o
+# total de pedidos. A semente de cada bloco deriva de (semente, bloco).
+SEMENTE = 42
+PEDIDOS_POR_BLOCO = 500_000
+INICIO = '2016-09-04'
+FIM = '2018-10-17'
+PEDIDOS_POR_PRODUTO = 3        # a Olist tem ~1 produto para cada 3 pedidos
+PEDIDOS_POR_VENDEDOR = 32
+CLIENTES_RECORRENTES = 0.03    # fração dos pedidos feitos por clientes que já compraram
+
+# Participação aproximada de cada estado nos pedidos da Olist
+ESTADOS = {
+    'SP': 41.9, 'RJ': 12.9, 'MG': 11.7, 'RS': 5.5, 'PR': 5.1, 'SC': 3.7, 'BA': 3.4,
+    'DF': 2.2, 'ES': 2.0, 'GO': 2.0, 'PE': 1.7, 'CE': 1.3, 'PA': 1.0, 'MT': 0.9,
+    'MA': 0.8, 'MS': 0.7, 'PB': 0.5, 'PI': 0.5, 'RN': 0.5, 'AL': 0.4, 'SE': 0.3,
+    'TO': 0.3, 'RO': 0.3, 'AM': 0.15, 'AC': 0.08, 'AP': 0.07, 'RR': 0.05,
+}
+# Faixa de prefixos de CEP e algumas cidades (a primeira é a mais frequente)
+LOCAIS = {
+    'SP': ((1000, 19999), ['sao paulo', 'campinas', 'guarulhos', 'santo andre', 'osasco']),
+    'RJ': ((20000, 28999), ['rio de janeiro', 'niteroi', 'nova iguacu']),
+    'ES': ((29000, 29999), ['vitoria', 'vila velha', 'serra']),
+    'MG': ((30000, 39999), ['belo horizonte', 'uberlandia', 'contagem', 'juiz de fora']),
+    'BA': ((40000, 48999), ['salvador', 'feira de santana']),
+    'SE': ((49000, 49999), ['aracaju']),
+    'PE': ((50000, 56999), ['recife', 'jaboatao dos guararapes']),
+    'AL': ((57000, 57999), ['maceio']),
+    'PB': ((58000, 58999), ['joao pessoa', 'campina grande']),
+    'RN': ((59000, 59999), ['natal']),
+    'CE': ((60000, 63999), ['fortaleza']),
+    'PI': ((64000, 64999), ['teresina']),
+    'MA': ((65000, 65999), ['sao luis']),
+    'PA': ((66000, 68899), ['belem', 'ananindeua']),
+    'AP': ((68900, 68999), ['macapa']),
+    'AM': ((69000, 69299), ['manaus']),
+    'RR': ((69300, 69399), ['boa vista']),
+    'AC': ((69900, 69999), ['rio branco']),
+    'DF': ((70000, 72799), ['brasilia']),
+    'GO': ((72800, 76799), ['goiania', 'anapolis']),
+    'RO': ((76800, 76999), ['porto velho']),
+    'TO': ((77000, 77999), ['palmas']),
+    'MT': ((78000, 78899), ['cuiaba']),
+    'MS': ((79000, 79999), ['campo grande']),
+    'PR': ((80000, 87999), ['curitiba', 'londrina', 'maringa']),
+    'SC': ((88000, 89999), ['florianopolis', 'joinville', 'blumenau']),
+    'RS': ((90000, 99999), ['porto alegre', 'caxias do sul', 'pelotas']),
+}
+# Vendedores concentrados no Sudeste/Sul
+ESTADOS_VENDEDORES = {'SP': 59.7, 'PR': 11.3, 'MG': 7.9, 'SC': 6.1, 'RJ': 5.5, 'RS': 4.3,
+                      'GO': 1.3, 'DF': 1.0, 'ES': 0.8, 'BA': 0.6, 'CE': 0.4, 'PE': 0.3}
+
+# Categorias em ordem de popularidade (pesos ~ Zipf) e o preço típico de cada uma
+CATEGORIAS = {
+    'cama_mesa_banho': 90, 'beleza_saude': 130, 'esporte_lazer': 115, 'moveis_decoracao': 90,
+    'informatica_acessorios': 115, 'utilidades_domesticas': 90, 'relogios_presentes': 200,
+    'telefonia': 70, 'ferramentas_jardim': 110, 'automotivo': 140, 'brinquedos': 115,
+    'cool_stuff': 165, 'perfumaria': 120, 'bebes': 130, 'eletronicos': 60, 'papelaria': 95,
+    'fashion_bolsas_e_acessorios': 75, 'pet_shop': 110, 'moveis_escritorio': 160,
+    'consoles_games': 140, 'malas_acessorios': 160, 'construcao_ferramentas_construcao': 150,
+    'eletrodomesticos': 90, 'instrumentos_musicais': 280, 'eletroportateis': 280,
+    'casa_construcao': 140, 'livros_interesse_geral': 85, 'alimentos': 60, 'moveis_sala': 140,
+    'climatizacao': 180, 'pcs': 1100, 'artes': 120, 'eletrodomesticos_2': 475,
+}
+SEM_CATEGORIA = 0.018          # produtos sem categoria no cadastro
+
+TIPOS_PAGAMENTO = {'credit_card': 73.9, 'boleto': 19.0, 'voucher': 5.6, 'debit_card': 1.5}
+PARCELAS_CARTAO = [50.5, 12.0, 10.2, 7.0, 5.2, 4.0, 1.6, 4.3, 0.6, 5.4]   # 1 a 10 parcelas
+STATUS = {'delivered': 97.0, 'shipped': 1.1, 'canceled': 0.6, 'unavailable': 0.6,
+          'invoiced': 0.3, 'processing': 0.3, 'approved': 0.1}
+ITENS_POR_PEDIDO = [90.0, 7.6, 1.3, 0.6, 0.5]                             # 1 a 5 itens
+PAGAMENTOS_POR_PEDIDO = [97.0, 2.5, 0.5]                                  # 1 a 3 pagamentos
+
+# Sazonalidade: crescimento ao longo de 2017, semana mais forte no início e Black Friday
+FATOR_DIA_SEMANA = [1.12, 1.10, 1.07, 1.03, 0.98, 0.75, 0.80]            # segunda a domingo
+PICOS = {'2017-11-24': 5.0, '2017-11-25': 2.0, '2017-11-26': 1.6, '2017-11-27': 1.5}
+FATOR_HORA = [3, 1.5, 0.7, 0.4, 0.3, 0.4, 1, 2.5, 5, 7, 8.5, 8.5, 8, 8, 8.5, 8.5, 8,
+              7.5, 7, 7, 8, 8.5, 8, 6]
+
+_contexto = None
+
+
+def _normalizar(pesos):
+    pesos = np.asarray(list(pesos.values()) if isinstance(pesos, dict) else pesos, dtype=float)
+    return pesos / pesos.sum()
+
+
+# --- IDENTIFICADORES ---
+_HEX = np.frombuffer(b'0123456789abcdef', dtype='S1')
+_DESLOCAMENTOS = np.arange(60, -4, -4, dtype=np.uint64)
+
+
+def _misturar(x):
+    # Finalizador do splitmix64: bijeção em uint64, então números distintos dão ids distintos
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def ids_hex(numeros, sal):
+    """Ids de 32 dígitos hexadecimais (como os md5 da Olist), únicos por número e `sal`."""
+    with np.errstate(over='ignore'):
+        alto = _misturar(np.asarray(numeros, dtype=np.uint64) ^ (np.uint64(sal) << np.uint64(56)))
+        baixo = _misturar(alto)
+    digitos = np.concatenate([(alto[:, None] >> _DESLOCAMENTOS) & np.uint64(15),
+                              (baixo[:, None] >> _DESLOCAMENTOS) & np.uint64(15)], axis=1)
+    return _HEX[digitos].view('S32').ravel().astype(str)
+
+
+def _uniforme_hash(numeros, sal):
+    # Valor em [0, 1) fixo para cada número: o mesmo cliente cai sempre no mesmo lugar
+    with np.errstate(over='ignore'):
+        x = _misturar(np.asarray(numeros, dtype=np.uint64) ^ (np.uint64(sal) << np.uint64(56)))
+    return (x >> np.uint64(11)) / float(1 << 53)
+
+
+def _locais(numeros, estados, sal):
+    """(estado, cidade, prefixo do CEP) determinísticos para cada número."""
+    siglas = np.array(list(estados))
+    estado = siglas[np.searchsorted(np.cumsum(_normalizar(estados)), _uniforme_hash(numeros, sal), side='right')
+                    .clip(max=len(siglas) - 1)]
+    u = _uniforme_hash(numeros, sal + 1)
+    cidade = np.empty(len(estado), dtype=object)
+    cep = np.empty(len(estado), dtype=np.int64)
+    for sigla in np.unique(estado):
+        do_estado = estado == sigla
+        (cep_min, cep_max), cidades = LOCAIS[sigla]
+        # A primeira cidade fica com metade dos clientes do estado
+        u_estado = u[do_estado]
+        k = np.where(u_estado < 0.5, 0, 1 + ((u_estado - 0.5) * 2 * (len(cidades) - 1)).astype(int))
+        cidade[do_estado] = np.array(cidades, dtype=object)[k.clip(max=len(cidades) - 1)]
+        cep[do_estado] = cep_min + (u_estado * (cep_max - cep_min + 1)).astype(int)
+    return estado, cidade, cep
+
+
+# --- CATÁLOGO (produtos e vendedores) ---
+def tamanhos_catalogo(n_pedidos):
+    return max(100, n_pedidos // PEDIDOS_POR_PRODUTO), max(10, n_pedidos // PEDIDOS_POR_VENDEDOR)
+
+
+def catalogo(semente, n_produtos, n_vendedores):
+    """Atributos dos produtos, determinísticos para a mesma semente.
+
+    Recalculado em cada processo em vez de enviado a eles. Os produtos e os
+    vendedores de índice baixo são os mais vendidos.
+    """
+    rng = np.random.default_rng([semente, 1, 0])
+    nomes = np.array(list(CATEGORIAS), dtype=object)
+    categoria = rng.choice(len(nomes), n_produtos, p=_normalizar(1 / np.arange(1, len(nomes) + 1) ** 1.1))
+    preco_tipico = np.array(list(CATEGORIAS.values()), dtype=float)[categoria]
+    return {
+        'categoria': np.where(rng.random(n_produtos) < SEM_CATEGORIA, None, nomes[categoria]),
+        'preco': (preco_tipico * rng.lognormal(-0.25, 0.7, n_produtos)).round(2).clip(min=0.85),
+        'peso_g': rng.lognormal(6.6, 1.2, n_produtos).round().clip(2, 40_000),
+        # Cada produto tem um vendedor; poucos vendedores concentram a maioria
+        'vendedor': (n_vendedores * rng.random(n_produtos) ** 2.5).astype(np.int64),
+    }
+
+
+def gravar_catalogo(pasta, semente, n_produtos, n_vendedores):
+    cat = catalogo(semente, n_produtos, n_vendedores)
+    rng = np.random.default_rng([semente, 1, 1])
+    sem_categoria = pd.isna(cat['categoria'])
+    pd.DataFrame({
+        'product_id': ids_hex(np.arange(n_produtos), 3),
+        'product_category_name': cat['categoria'],
+        'product_name_lenght': pd.arrays.IntegerArray(rng.integers(5, 77, n_produtos), sem_categoria),
+        'product_description_lenght': pd.arrays.IntegerArray(rng.integers(4, 3993, n_produtos), sem_categoria),
+        'product_photos_qty': pd.arrays.IntegerArray(rng.geometric(0.5, n_produtos), sem_categoria),
+        'product_weight_g': cat['peso_g'],
+        'product_length_cm': rng.integers(7, 106, n_produtos),
+        'product_height_cm': rng.integers(2, 106, n_produtos),
+        'product_width_cm': rng.integers(6, 119, n_produtos),
+    }).to_csv(os.path.join(pasta, ARQUIVOS['products']), index=False)
+
+    estado, cidade, cep = _locais(np.arange(n_vendedores), ESTADOS_VENDEDORES, 7)
+    pd.DataFrame({
+        'seller_id': ids_hex(np.arange(n_vendedores), 4),
+        'seller_zip_code_prefix': cep,
+        'seller_city': cidade,
+        'seller_state': estado,
+    }).to_csv(os.path.join(pasta, ARQUIVOS['sellers']), index=False)
+
+
+# --- PEDIDOS (um bloco por chamada) ---
+def pesos_dias(inicio=INICIO, fim=FIM):
+    """Dias do período e a probabilidade de um pedido cair em cada um."""
+    dias = pd.date_range(inicio, fim, freq='D')
+    meses = (dias - pd.Timestamp('2017-06-01')).days / 30.4
+    peso = np.asarray(1 / (1 + np.exp(-meses / 2.5)))        # crescimento ao longo de 2017
+    peso = peso * np.array(FATOR_DIA_SEMANA)[dias.dayofweek]
+    for dia, fator in PICOS.items():
+        peso[dias == pd.Timestamp(dia)] *= fator
+    return dias.values, peso / peso.sum()
+
+
+def _sortear_quantidades(rng, pesos, n, minimo=1):
+    return minimo + rng.choice(len(pesos), n, p=_normalizar(pesos))
+
+
+def _gerar_bloco(tarefa):
+    bloco, inicio, fim = tarefa
+    ctx = _contexto
+    cat = ctx['catalogo']
+    rng = np.random.default_rng([ctx['semente'], 0, bloco])
+    n = fim - inicio
+    numeros = np.arange(inicio, fim)
+
+    # Pedidos
+    dias, pesos = ctx['dias']
+    hora = rng.choice(24, n, p=_normalizar(FATOR_HORA))
+    compra = (dias[rng.choice(len(dias), n, p=pesos)]
+              + (hora * 3600 + rng.integers(0, 3600, n)).astype('timedelta64[s]'))
+    status = np.array(list(STATUS))[rng.choice(len(STATUS), n, p=_normalizar(STATUS))]
+    aprovacao = compra + (rng.exponential(10 * 3600, n)).astype('timedelta64[s]')
+    postagem = aprovacao + (rng.gamma(2.0, 1.5, n) * 86400).astype('timedelta64[s]')
+    entrega = postagem + (rng.gamma(3.0, 3.0, n) * 86400).astype('timedelta64[s]')
+    estimada = (compra + rng.integers(15, 40, n).astype('timedelta64[D]')).astype('datetime64[D]')
+    enviado = np.isin(status, ['delivered', 'shipped'])
+    pedidos = pd.DataFrame({
+        'order_id': ids_hex(numeros, 1),
+        'customer_id': ids_hex(numeros, 2),
+        'order_status': status,
+        'order_purchase_timestamp': compra,
+        'order_approved_at': aprovacao,
+        'order_delivered_carrier_date': np.where(enviado, postagem, np.datetime64('NaT')),
+        'order_delivered_customer_date': np.where(status == 'delivered', entrega, np.datetime64('NaT')),
+        'order_estimated_delivery_date': estimada,
+    })
+
+    # Clientes: um customer_id por pedido, como na Olist; clientes recorrentes
+    # repetem o customer_unique_id e o endereço
+    recorrente = rng.random(n) < CLIENTES_RECORRENTES
+    unico = np.where(recorrente, rng.integers(0, max(inicio, 1), n), numeros)
+    estado, cidade, cep = _locais(unico, ESTADOS, 5)
+    clientes = pd.DataFrame({
+        'customer_id': pedidos['customer_id'].values,
+        'customer_unique_id': ids_hex(unico, 6),
+        'customer_zip_code_prefix': cep,
+        'customer_city': cidade,
+        'customer_state': estado,
+    })
+
+    # Itens: pedidos indisponíveis ficam sem itens
+    por_pedido = np.where(status == 'unavailable', 0, _sortear_quantidades(rng, ITENS_POR_PEDIDO, n))
+    pedido_do_item = np.repeat(np.arange(n), por_pedido)
+    m = len(pedido_do_item)
+    produto = (len(cat['preco']) * rng.random(m) ** 3).astype(np.int64)
+    frete = (8 + cat['peso_g'][produto] / 1000 * rng.uniform(1.5, 4.0, m)).round(2)
+    preco = cat['preco'][produto]
+    itens = pd.DataFrame({
+        'order_id': pedidos['order_id'].values[pedido_do_item],
+        'order_item_id': np.arange(m) - np.repeat(np.cumsum(por_pedido) - por_pedido, por_pedido) + 1,
+        'product_id': ids_hex(produto, 3),
+        'seller_id': ids_hex(cat['vendedor'][produto], 4),
+        'shipping_limit_date': compra[pedido_do_item] + np.timedelta64(6, 'D'),
+        'price': preco,
+        'freight_value': frete,
+    })
+
+    # Pagamentos: somam o valor do pedido (itens + frete); pedidos sem itens
+    # têm um valor próprio. Pagamentos extras de um pedido são quase sempre vouchers
+    total = np.bincount(pedido_do_item, weights=preco + frete, minlength=n)
+    total = np.where(por_pedido == 0, rng.lognormal(4.7, 0.8, n).round(2), total)
+    por_pedido = _sortear_quantidades(rng, PAGAMENTOS_POR_PEDIDO, n)
+    pedido_do_pagamento = np.repeat(np.arange(n), por_pedido)
+    k = len(pedido_do_pagamento)
+    sequencia = np.arange(k) - np.repeat(np.cumsum(por_pedido) - por_pedido, por_pedido) + 1
+    tipos = np.array(list(TIPOS_PAGAMENTO))
+    tipo = np.where(sequencia == 1, tipos[rng.choice(len(tipos), k, p=_normalizar(TIPOS_PAGAMENTO))], 'voucher')
+    fatia = rng.random(k) + 0.1
+    valor = (total[pedido_do_pagamento] * fatia
+             / np.bincount(pedido_do_pagamento, weights=fatia, minlength=n)[pedido_do_pagamento]).round(2)
+    parcelas = np.where(tipo == 'credit_card', _sortear_quantidades(rng, PARCELAS_CARTAO, k), 1)
+    pagamentos = pd.DataFrame({
+        'order_id': pedidos['order_id'].values[pedido_do_pagamento],
+        'payment_sequential': sequencia,
+        'payment_type': tipo,
+        'payment_installments': parcelas,
+        'payment_value': valor,
+    })
+
+    linhas = {}
+    for tabela, df in (('orders', pedidos), ('customers', clientes),
+                       ('order_items', itens), ('payments', pagamentos)):
+        df.to_csv(caminho_parte(ctx['pasta'], tabela, bloco), index=False, header=bloco == 0)
+        linhas[tabela] = len(df)
+    return linhas
+
+
+def _iniciar_processo(contexto):
+    global _contexto
+    _contexto = dict(contexto, catalogo=catalogo(contexto['semente'], *contexto['tamanhos_catalogo']),
+                     dias=pesos_dias(contexto['inicio'], contexto['fim']))
+
+
+# --- EXECUÇÃO ---
+def gerar(pasta, n_pedidos, semente=SEMENTE, processos=1, pedidos_por_bloco=PEDIDOS_POR_BLOCO,
+          inicio=INICIO, fim=FIM):
+    """Grava em `pasta` os seis CSVs da Olist com `n_pedidos` pedidos."""
+    comeco = time.perf_counter()
+    os.makedirs(pasta, exist_ok=True)
+    n_produtos, n_vendedores = tamanhos_catalogo(n_pedidos)
+    gravar_catalogo(pasta, semente, n_produtos, n_vendedores)
+
+    contexto = {'semente': semente, 'pasta': pasta, 'inicio': inicio, 'fim': fim,
+                'tamanhos_catalogo': (n_produtos, n_vendedores)}
+    tarefas = [(bloco, ini, min(ini + pedidos_por_bloco, n_pedidos))
+               for bloco, ini in enumerate(range(0, n_pedidos, pedidos_por_bloco))]
+    linhas = {'orders': 0, 'customers': 0, 'order_items': 0, 'payments': 0}
+    executor = None
+    try:
+        if processos == 1:
+            _iniciar_processo(contexto)
+            resultados = map(_gerar_bloco, tarefas)
+        else:
+            executor = ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(contexto,))
+            resultados = executor.map(_gerar_bloco, tarefas)
+        for bloco, contagem in enumerate(resultados):
+            for tabela, n in contagem.items():
+                linhas[tabela] += n
+            print(f"   bloco {bloco + 1}/{len(tarefas)}")
+    finally:
+        # Sem deixar processos para trás se algum bloco falhar
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    for tabela in linhas:
+        juntar_partes(pasta, tabela, len(tarefas), os.path.join(pasta, ARQUIVOS[tabela]))
+    linhas.update(products=n_produtos, sellers=n_vendedores)
+    for tabela, n in linhas.items():
+        print(f"✅ {ARQUIVOS[tabela]}: {n:,} linhas")
+    print(f"⏱️  Gerado em {time.perf_counter() - comeco:.1f}s com {processos} processo(s)")
+    return linhas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera CSVs sintéticos no esquema da Olist para o app.py.')
+    parser.add_argument('pedidos', type=int, help='quantidade de pedidos')
+    parser.add_argument('--pasta', default=PASTA_DADOS)
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--processos', type=int, default=1)
+    parser.add_argument('--inicio', default=INICIO, help='primeiro dia AAAA-MM-DD')
+    parser.add_argument('--fim', default=FIM, help='último dia AAAA-MM-DD')
+    parser.add_argument('--sobrescrever', action='store_true', help='substituir CSVs existentes na pasta')
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.pasta, ARQUIVOS['orders'])) and not args.sobrescrever:
+        print(f"Já existem dados em {args.pasta}; use --sobrescrever para substituí-los.")
+        sys.exit(1)
+    gerar(args.pasta, args.pedidos, args.semente, args.processos, inicio=args.inicio, fim=args.fim)
@@ -0,0 +1,114 @@
+import contextlib
+import threading
+import time
+from bisect import bisect_left
+
+# --- CONFIGURAÇÃO ---
+# Limites (em segundos) dos baldes dos histogramas de tempo e (em bytes) dos de tamanho
+BALDES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BALDES_BYTES = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+
+class Histograma:
+    """Contagens por balde, soma e total das observações de uma série (nome + rótulos)."""
+
+    def __init__(self, baldes):
+        self.baldes = baldes
+        self.contagens = [0] * (len(baldes) + 1)   # o último é o +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.baldes, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Metricas:
+    """Histogramas do processo, expostos no formato de texto do Prometheus.
+
+    Cada processo (worker) tem as suas métricas: com vários workers, cada
+    coleta do /metrics vê só as do worker que a atendeu.
+    """
+
+    def __init__(self):
+        self._series = {}      # nome -> {rótulos ordenados: Histograma}
+        self._ajuda = {}
+        self._baldes = {}
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    def registrar(self, nome, ajuda, baldes=BALDES_SEGUNDOS):
+        self._ajuda[nome] = ajuda
+        self._baldes[nome] = baldes
+        self._series.setdefault(nome, {})
+
+    def observar(self, nome, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            series = self._series.setdefault(nome, {})
+            if chave not in series:
+                series[chave] = Histograma(self._baldes.get(nome, BALDES_SEGUNDOS))
+            series[chave].observar(valor)
+
+    # --- ETAPAS ---
+    @contextlib.contextmanager
+    def callback(self, nome):
+        """Marca a thread como executando o callback `nome`.
+
+        As etapas medidas dentro dele são rotuladas com o callback e somadas no
+        dicionário {etapa: segundos} devolvido.
+        """
+        anterior = getattr(self._local, 'callback', None), getattr(self._local, 'etapas', None)
+        self._local.callback, self._local.etapas = nome, {}
+        try:
+            yield self._local.etapas
+        finally:
+            self._local.callback, self._local.etapas = anterior
+
+    @contextlib.contextmanager
+    def etapa(self, nome, metrica='dash_etapa_segundos'):
+        """Mede o bloco como a etapa `nome` do callback em execução (ou da carga)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            callback = getattr(self._local, 'callback', None)
+            etapas = getattr(self._local, 'etapas', None)
+            if etapas is not None:
+                etapas[nome] = etapas.get(nome, 0.0) + segundos
+            self.observar(metrica, segundos, callback=callback or '-', etapa=nome)
+
+    # --- EXPOSIÇÃO ---
+    def texto_prometheus(self):
+        linhas = []
+        with self._trava:
+            for nome, series in sorted(self._series.items()):
+                if nome in self._ajuda:
+                    linhas.append(f"# HELP {nome} {self._ajuda[nome]}")
+                linhas.append(f"# TYPE {nome} histogram")
+                for chave, hist in sorted(series.items()):
+                    rotulos = ','.join(f'{k}="{_escapar(v)}"' for k, v in chave)
+                    separador = ',' if rotulos else ''
+                    acumulado = 0
+                    for limite, contagem in zip((*hist.baldes, '+Inf'), hist.contagens):
+                        acumulado += contagem
+                        linhas.append(f'{nome}_bucket{{{rotulos}{separador}le="{limite}"}} {acumulado}')
+                    rotulos = f'{{{rotulos}}}' if rotulos else ''
+                    linhas.append(f"{nome}_sum{rotulos} {hist.soma:.6f}")
+                    linhas.append(f"{nome}_count{rotulos} {hist.total}")
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metricas = Metricas()
+metricas.registrar('dash_carga_segundos', 'Tempo de cada etapa da carga dos dados na partida.')
+metricas.registrar('dash_etapa_segundos', 'Tempo de cada etapa dos callbacks (recorte, agregação, figura).')
+metricas.registrar('dash_callback_segundos', 'Tempo de execução de cada callback, com cache.')
+metricas.registrar('dash_requisicao_segundos', 'Tempo total de cada requisição de callback, com serialização.')
+metricas.registrar('dash_serializacao_segundos', 'Tempo da requisição fora do callback (serialização da resposta).')
+metricas.registrar('dash_resposta_bytes', 'Tamanho da resposta de cada callback.', BALDES_BYTES)
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+from carregadorDados import (ARQUIVOS, PASTA_CACHE, PASTA_DADOS, INGESTAO_STREAMING, PARQUET_DISPONIVEL,
+                             arquivos_da_tabela, assinatura_arquivo, carregar_dados, chave_cache,
+                             juntar_dados, ler_linhas_novas, ler_tabela, otimizar_tipos,
+                             reservar_gravacao, resumir_itens, resumir_pagamentos, salvar_cache, trava_cache)
+
+# --- CONFIGURAÇÃO ---
+INTERVALO_SEGUNDOS = int(os.environ.get('DASH_INTERVALO_OBSERVADOR', '60'))
+# Arquivos modificados há menos tempo que isso ainda podem estar sendo exportados
+ESTABILIZACAO_SEGUNDOS = 5
+# Tabelas cujas linhas novas são incorporadas incrementalmente; mudanças nas
+# demais (produtos) pedem recarga completa. sellers não é usada pelo dashboard.
+TABELAS_INCREMENTAIS = ('orders', 'customers', 'order_items', 'payments')
+
+
+class RecargaCompleta(Exception):
+    """As linhas novas não podem ser incorporadas sem refazer as junções."""
+
+
+class ObservadorDados:
+    """Mantém o ConjuntoDados atual e o atualiza quando os CSVs de `pasta` mudam.
+
+    Uma thread verifica a pasta a cada `intervalo` segundos. Arquivos novos e
+    arquivos que só cresceram têm apenas as linhas novas lidas e juntadas, e o
+    resultado é somado ao conjunto atual. Qualquer outro caso (arquivo
+    reescrito ou removido, linhas de pedidos já carregados, produtos alterados)
+    refaz a carga completa. Em ambos os casos o novo conjunto substitui o
+    atual de uma só vez; callbacks em andamento seguem com o conjunto que já
+    pegaram.
+
+    Com vários workers, cada um tem o seu observador, mas só o que obtém a
+    reserva de gravação (`reservar_gravacao`) regrava o cache depois de um
+    incremento; os demais só trocam o conjunto em memória.
+    """
+
+    def __init__(self, pasta=PASTA_DADOS, pasta_cache=PASTA_CACHE, streaming=INGESTAO_STREAMING,
+                 intervalo=INTERVALO_SEGUNDOS):
+        self.pasta = pasta
+        self.pasta_cache = pasta_cache
+        self.streaming = streaming
+        self.intervalo = intervalo
+        self.atual = None
+        self._assinantes = []
+        self._parar = threading.Event()
+        self._thread = None
+        self._reserva = None
+
+    def carregar(self, tempos=None):
+        self._trocar(carregar_dados(self.pasta, self.pasta_cache, streaming=self.streaming, tempos=tempos))
+        return self.atual
+
+    def ao_trocar(self, funcao):
+        """Registra `funcao(conjunto)`, chamada depois de cada troca de conjunto."""
+        self._assinantes.append(funcao)
+
+    def _trocar(self, conjunto):
+        self.atual = conjunto
+        for funcao in self._assinantes:
+            funcao(conjunto)
+
+    # --- THREAD ---
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name='observador-dados', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                print("⚠️  Falha ao recarregar os dados; mantendo a versão atual")
+                traceback.print_exc()
+
+    # --- DETECÇÃO DE MUDANÇAS ---
+    def _mudancas(self):
+        """Retorna {tabela: [(caminho, byte inicial)]} das linhas novas, ou None se nada mudou.
+
+        Levanta RecargaCompleta quando algum arquivo não apenas cresceu.
+        """
+        fontes = self.atual.fontes
+        novos = {}
+        vistos = set()
+        agora = time.time()
+        for tabela in ARQUIVOS:
+            for caminho in arquivos_da_tabela(self.pasta, tabela):
+                nome = os.path.basename(caminho)
+                vistos.add(nome)
+                st = os.stat(caminho)
+                antigo = fontes.get(nome)
+                if antigo and antigo['mtime_ns'] == st.st_mtime_ns and antigo['tamanho'] == st.st_size:
+                    continue
+                if agora - st.st_mtime < ESTABILIZACAO_SEGUNDOS:
+                    return None  # exportação em andamento: tentar na próxima verificação
+                if antigo is None:
+                    novos.setdefault(tabela, []).append((caminho, 0))
+                elif st.st_size > antigo['tamanho']:
+                    novos.setdefault(tabela, []).append((caminho, antigo['tamanho']))
+                else:
+                    raise RecargaCompleta(f'{nome} foi reescrito')
+        if set(fontes) - vistos:
+            raise RecargaCompleta('arquivo removido')
+        return novos or None
+
+    def verificar(self):
+        """Verifica a pasta uma vez e troca o conjunto se houver dados novos."""
+        try:
+            novos = self._mudancas()
+            if novos is None:
+                return False
+            conjunto = self._incorporar(novos)
+            print(f"🔄 Dados atualizados incrementalmente ({conjunto.versao}): "
+                  f"{len(conjunto.data) - len(self.atual.data)} pedidos novos")
+        except RecargaCompleta as motivo:
+            print(f"🔄 Recarga completa dos dados: {motivo}")
+            conjunto = carregar_dados(self.pasta, self.pasta_cache, streaming=self.streaming)
+        self._trocar(conjunto)
+        return True
+
+    def _gravador(self):
+        if self._reserva is None:
+            self._reserva = reservar_gravacao(self.pasta_cache)
+        return self._reserva is not None
+
+    # --- INCORPORAÇÃO INCREMENTAL ---
+    def _incorporar(self, novos):
+        atual = self.atual
+        if set(novos) - set(TABELAS_INCREMENTAIS):
+            raise RecargaCompleta('tabela de produtos alterada')
+
+        fontes = dict(atual.fontes)
+        linhas = {}
+        for tabela, arquivos in novos.items():
+            partes = []
+            for caminho, inicio in arquivos:
+                parte, fim = ler_linhas_novas(caminho, inicio, tabela, incluir_final=True)
+                partes.append(parte)
+                nome = os.path.basename(caminho)
+                fontes[nome] = {**assinatura_arquivo(caminho, fontes.get(nome), tamanho=fim), 'tabela': tabela}
+            linhas[tabela] = pd.concat(partes, ignore_index=True)
+
+        orders = linhas.get('orders')
+        if orders is None or orders.empty:
+            raise RecargaCompleta('linhas novas sem pedidos novos')
+        ids_pedidos = pd.Index(orders['order_id'])
+        if ids_pedidos.isin(atual.dicionarios['order_id']).any() or ids_pedidos.has_duplicates:
+            raise RecargaCompleta('pedidos já conhecidos nas linhas novas')
+
+        customers = linhas.get('customers', pd.DataFrame(columns=['customer_id']))
+        if not orders['customer_id'].isin(customers['customer_id']).all():
+            raise RecargaCompleta('clientes dos pedidos novos fora das linhas novas')
+        for tabela in ('order_items', 'payments'):
+            if tabela in linhas and not linhas[tabela]['order_id'].isin(ids_pedidos).all():
+                raise RecargaCompleta(f'{tabela} com pedidos fora das linhas novas')
+
+        # Mesmas junções da carga completa, só sobre as linhas novas
+        order_items = linhas.get('order_items', pd.DataFrame(columns=['order_id', 'product_id', 'price', 'freight_value']))
+        products = ler_tabela(self.pasta, 'products', usecols=['product_id', 'product_category_name'])
+        order_revenue, novos_itens = resumir_itens(order_items, products)
+        if atual.streaming:
+            # No modo em blocos os itens ficam agregados por pedido × categoria
+            novos_itens = (novos_itens.assign(items_count=novos_itens['product_id'].notna().astype('int64'))
+                           .groupby(['order_id', 'product_category_name'], dropna=False, sort=False)
+                           [['price', 'freight_value', 'items_count']].sum()
+                           .reset_index())
+        payment_summary = None
+        if 'payments' in linhas:
+            payment_summary = resumir_pagamentos(linhas['payments'])
+        elif 'payment_type' in atual.data.columns:
+            payment_summary = pd.DataFrame(columns=['order_id', 'payment_value', 'payment_type', 'payment_installments'])
+
+        novos_dados = juntar_dados(orders, customers, order_revenue, payment_summary)
+        novos_dados, novos_itens, dicionarios = otimizar_tipos(novos_dados, novos_itens, atual.dicionarios)
+
+        versao = chave_cache(fontes, atual.streaming)
+        conjunto = atual.com_novos_pedidos(novos_dados, novos_itens, dicionarios, versao, fontes)
+        if PARQUET_DISPONIVEL and self._gravador():
+            # Próxima partida já encontra a versão nova no cache
+            try:
+                with trava_cache(self.pasta_cache):
+                    salvar_cache(conjunto.data, conjunto.order_items_with_products, conjunto.dicionarios,
+                                 fontes, self.pasta_cache, conjunto.streaming)
+            except OSError as e:
+                print(f"⚠️  Falha ao gravar o cache em {self.pasta_cache}: {e}")
+        return conjunto
@@ -0,0 +1,23 @@
+import os
+import shutil
+
+# --- PARTES DE CSV ---
+# Os geradores gravam cada tabela em partes (só a primeira com cabeçalho),
+# possivelmente em processos diferentes, e depois as concatenam byte a byte.
+# Fica fora dos geradores para não trazer as dependências de um para o outro.
+
+
+def caminho_parte(pasta, tabela, parte):
+    return os.path.join(pasta, f'.{tabela}.parte-{parte:05d}.csv')
+
+
+def juntar_partes(pasta, tabela, n_partes, destino=None):
+    """Concatena as partes de `tabela` em `destino` (padrão: <pasta>/<tabela>.csv) e as apaga."""
+    destino = destino or os.path.join(pasta, f'{tabela}.csv')
+    with open(destino + '.tmp', 'wb') as saida:
+        for parte in range(n_partes):
+            caminho = caminho_parte(pasta, tabela, parte)
+            with open(caminho, 'rb') as entrada:
+                shutil.copyfileobj(entrada, saida)
+            os.remove(caminho)
+    os.replace(destino + '.tmp', destino)
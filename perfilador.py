@@ -0,0 +1,136 @@
+import cProfile
+import glob
+import hmac
+import html
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+
+# --- CONFIGURAÇÃO ---
+# DASH_PERFILAR=N perfila as N primeiras chamadas de callback depois da partida.
+# Em produção, um administrador arma as próximas N chamadas com os cabeçalhos
+#   X-Perfilar: N   e   X-Token-Admin: <DASH_TOKEN_ADMIN>
+# (sem DASH_TOKEN_ADMIN definido o cabeçalho é ignorado).
+PASTA_PERFIS = os.path.join('data', 'perfis')
+PERFILAR_NA_PARTIDA = int(os.environ.get('DASH_PERFILAR', '0'))
+TOKEN_ADMIN = os.environ.get('DASH_TOKEN_ADMIN', '')
+MAX_PERFIS = 200          # perfis mais antigos são apagados
+LINHAS_RELATORIO = 40     # funções mostradas por perfil, por tempo acumulado
+
+
+class Perfilador:
+    """Roda as próximas chamadas armadas sob o cProfile e grava cada perfil em disco.
+
+    Cada perfil vira um `.prof` (pstats; abre no snakeviz) e um `.json` com o
+    callback, as entradas, a duração e a versão dos dados.
+    """
+
+    def __init__(self, pasta=PASTA_PERFIS, armadas=PERFILAR_NA_PARTIDA, token=TOKEN_ADMIN):
+        self.pasta = pasta
+        self.token = token
+        self._armadas = armadas
+        self._trava = threading.Lock()
+
+    def armar(self, n):
+        with self._trava:
+            self._armadas += n
+
+    def armar_pela_requisicao(self, cabecalhos):
+        """Arma `X-Perfilar` chamadas se a requisição trouxer o token de administrador.
+
+        Um `X-Perfilar` que não seja um inteiro é ignorado.
+        """
+        pedido = cabecalhos.get('X-Perfilar')
+        if pedido and self.autorizado(cabecalhos.get('X-Token-Admin')):
+            try:
+                self.armar(max(int(pedido), 0))
+            except ValueError:
+                pass
+
+    def autorizado(self, token):
+        # Comparação em tempo constante, para o token não vazar pelo tempo de resposta
+        return bool(self.token) and token is not None and \
+            hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def _reservar(self):
+        with self._trava:
+            if self._armadas <= 0:
+                return False
+            self._armadas -= 1
+            return True
+
+    def executar(self, nome, funcao, args, versao=None):
+        """Chama `funcao(*args)`, perfilando se houver chamada armada."""
+        if not self._reservar():
+            return funcao(*args)
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            return perfil.runcall(funcao, *args)
+        finally:
+            self._gravar(nome, perfil, args, time.perf_counter() - inicio, versao)
+
+    def _gravar(self, nome, perfil, args, segundos, versao):
+        os.makedirs(self.pasta, exist_ok=True)
+        base = os.path.join(self.pasta, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{nome}-{os.getpid()}")
+        perfil.dump_stats(base + '.prof')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'callback': nome, 'entradas': args, 'segundos': round(segundos, 4),
+                       'em': datetime.now().isoformat(timespec='seconds'), 'pid': os.getpid(),
+                       'versao_dados': versao}, f, ensure_ascii=False, default=str)
+        print(f"🔬 Perfil de {nome} gravado em {base}.prof ({segundos * 1000:.0f} ms)")
+        for antigo in self.perfis()[MAX_PERFIS:]:
+            for extensao in ('.prof', '.json'):
+                try:
+                    os.remove(os.path.join(self.pasta, antigo['nome'] + extensao))
+                except FileNotFoundError:
+                    pass
+
+    # --- CONSULTA ---
+    def perfis(self):
+        """Metadados dos perfis gravados, do mais recente ao mais antigo."""
+        perfis = []
+        for caminho in sorted(glob.glob(os.path.join(self.pasta, '*.json')), reverse=True):
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    perfis.append({**json.load(f), 'nome': os.path.basename(caminho)[:-len('.json')]})
+            except (OSError, ValueError):
+                continue  # perfil sendo gravado por outro worker
+        return perfis
+
+    def caminho(self, nome):
+        """Caminho do .prof de `nome`, ou None se não existir (ou o nome sair da pasta)."""
+        caminho = os.path.join(self.pasta, os.path.basename(nome) + '.prof')
+        return caminho if os.path.exists(caminho) else None
+
+    def relatorio(self, nome, linhas=LINHAS_RELATORIO):
+        saida = io.StringIO()
+        pstats.Stats(self.caminho(nome), stream=saida).sort_stats('cumulative').print_stats(linhas)
+        return saida.getvalue()
+
+
+def pagina_indice(perfis, token=''):
+    sufixo = f'?token={html.escape(token)}' if token else ''
+    linhas = ''.join(
+        f"<tr><td>{html.escape(p['em'])}</td><td>{html.escape(p['callback'])}</td>"
+        f"<td>{html.escape(json.dumps(p['entradas'], ensure_ascii=False))}</td>"
+        f"<td style='text-align:right'>{p['segundos'] * 1000:.0f}</td><td>{p['pid']}</td>"
+        f"<td><a href='/perfis/{html.escape(p['nome'])}{sufixo}'>ver</a> · "
+        f"<a href='/perfis/{html.escape(p['nome'])}.prof{sufixo}'>.prof</a></td></tr>"
+        for p in perfis)
+    return ("<html><head><meta charset='utf-8'><title>Perfis</title></head>"
+            "<body style='font-family:sans-serif'><h2>🔬 Perfis recentes</h2>"
+            "<table cellpadding='4'><tr><th>Quando</th><th>Callback</th><th>Entradas</th>"
+            f"<th>ms</th><th>pid</th><th></th></tr>{linhas}</table></body></html>")
+
+
+def pagina_perfil(nome, relatorio):
+    return (f"<html><head><meta charset='utf-8'><title>{html.escape(nome)}</title></head>"
+            f"<body><h3>{html.escape(nome)}</h3><pre>{html.escape(relatorio)}</pre></body></html>")
+
+
+perfilador = Perfilador()
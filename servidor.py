@@ -0,0 +1,97 @@
+import argparse
+import gc
+import os
+import resource
+import time
+
+# --- SERVIDOR DE PRODUÇÃO ---
+# O app.run(debug=True) de app.py é um servidor de desenvolvimento, de um
+# processo só. Aqui o gunicorn carrega os dados uma vez no processo mestre
+# (preload) e só depois cria os workers com fork: as páginas dos DataFrames
+# ficam compartilhadas entre eles (copy-on-write) enquanto ninguém as altera,
+# e o ConjuntoDados nunca é alterado depois de criado. A memória cresce pouco
+# com o número de workers, e cada worker começa a atender logo após o fork.
+#
+# Com --segundo-plano (ou DASH_CARGA_EM_SEGUNDO_PLANO=1) não há preload: a
+# porta abre na hora e cada worker carrega os dados numa thread, mostrando a
+# página de carregamento até /ready responder 200. A partida não bloqueia as
+# verificações de saúde, mas cada worker tem a sua cópia dos dados.
+#
+#   python servidor.py --workers 4
+#   gunicorn --preload "servidor:criar_app()"   (sem o observador de dados)
+ENDERECO = os.environ.get('DASH_ENDERECO', '0.0.0.0:8050')
+WORKERS = int(os.environ.get('DASH_WORKERS', os.cpu_count() or 1))
+THREADS = int(os.environ.get('DASH_THREADS', '4'))
+TIMEOUT_SEGUNDOS = 120
+CARGA_EM_SEGUNDO_PLANO = os.environ.get('DASH_CARGA_EM_SEGUNDO_PLANO') == '1'
+
+
+def criar_app(segundo_plano=False):
+    """Fábrica WSGI: carrega e junta os dados e devolve o servidor Flask do Dash.
+
+    Com `segundo_plano`, devolve o servidor na hora e carrega os dados numa
+    thread (que depois inicia o observador).
+    """
+    inicio = time.perf_counter()
+    import app as dashboard
+    if segundo_plano:
+        dashboard.carregar_em_segundo_plano(observar=True, encerrar_se_falhar=True)
+        return dashboard.app.server
+    from carregadorDados import ArquivoAusente
+    try:
+        dashboard.carregar()
+    except ArquivoAusente as e:
+        print(f"Arquivo não encontrado: {e}")
+        print("Certifique-se que a pasta 'data' existe com todos os arquivos CSV.")
+        raise SystemExit(1)
+    dashboard.cache_callbacks.fechar()
+    # Objetos que já existem vão para a geração permanente: a coleta de lixo
+    # dos workers não escreve nos cabeçalhos deles nem copia suas páginas
+    gc.collect()
+    gc.freeze()
+    print(f"📦 Dados carregados no processo mestre em {time.perf_counter() - inicio:.1f}s "
+          f"({len(dashboard.observador.atual.data):,} pedidos, pico de {pico_rss_mb():.0f} MB)")
+    return dashboard.app.server
+
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def depois_do_fork(servidor, worker):
+    # A thread do observador não sobrevive ao fork: cada worker inicia a sua.
+    # Depois de uma recarga, o worker passa a ter a sua própria cópia dos dados
+    # novos até a próxima reinicialização do servidor.
+    import app as dashboard
+    dashboard.iniciar_observador()
+
+
+def executar(endereco=ENDERECO, workers=WORKERS, threads=THREADS, segundo_plano=CARGA_EM_SEGUNDO_PLANO):
+    from gunicorn.app.base import BaseApplication
+
+    class Servidor(BaseApplication):
+        def load_config(self):
+            config = {'bind': endereco, 'workers': workers, 'threads': threads, 'timeout': TIMEOUT_SEGUNDOS}
+            if not segundo_plano:
+                config.update(preload_app=True, post_fork=depois_do_fork)
+            for chave, valor in config.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            return criar_app(segundo_plano)
+
+    print(f"🚀 Dashboard em http://{endereco} ({workers} workers × {threads} threads"
+          f"{', carga em segundo plano' if segundo_plano else ''})")
+    Servidor().run()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard em produção: dados carregados uma vez, workers com fork.')
+    parser.add_argument('--endereco', default=ENDERECO, help=f'host:porta (padrão {ENDERECO})')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='processos (padrão: DASH_WORKERS ou nº de CPUs)')
+    parser.add_argument('--threads', type=int, default=THREADS, help='threads por worker')
+    parser.add_argument('--segundo-plano', action='store_true', default=CARGA_EM_SEGUNDO_PLANO,
+                        help='abre a porta antes da carga; cada worker carrega os dados numa thread')
+    args = parser.parse_args()
+    executar(args.endereco, args.workers, args.threads, args.segundo_plano)
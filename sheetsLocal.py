@@ -0,0 +1,78 @@
+import csv
+import os
+import threading
+import time
+
+
+class ErroLocal(Exception):
+    """Erro da API simulado, com o código HTTP em `code` (como o APIError do gspread)."""
+
+    def __init__(self, code, mensagem):
+        super().__init__(mensagem)
+        self.code = code
+
+
+class ClienteLocal:
+    """Substituto offline do cliente do gspread, lendo abas de CSVs locais.
+
+    `pastas` mapeia o nome de cada planilha para uma pasta com um <aba>.csv por
+    aba (ex.: {'teste-FluxoCaixa': 'fake_data'}). Para testar o extrator, cada
+    chamada pode esperar `latencia` segundos, e as `falhas_429` primeiras
+    chamadas respondem com limite de taxa.
+    """
+
+    def __init__(self, pastas, latencia=0.0, falhas_429=0):
+        self.pastas = pastas
+        self.latencia = latencia
+        self.falhas_429 = falhas_429
+        self.chamadas = 0
+        self._trava = threading.Lock()
+
+    def _chamar(self):
+        with self._trava:
+            self.chamadas += 1
+            falhar = self.falhas_429 > 0
+            if falhar:
+                self.falhas_429 -= 1
+        time.sleep(self.latencia)
+        if falhar:
+            raise ErroLocal(429, 'Quota exceeded (simulado)')
+
+    def open(self, nome):
+        if nome not in self.pastas:
+            raise ErroLocal(404, f'Planilha {nome!r} não encontrada')
+        return PlanilhaLocal(self, self.pastas[nome])
+
+
+class PlanilhaLocal:
+    def __init__(self, cliente, pasta):
+        self.cliente = cliente
+        self.pasta = pasta
+
+    def _ler(self, aba):
+        caminho = os.path.join(self.pasta, f'{aba}.csv')
+        if not os.path.exists(caminho):
+            raise ErroLocal(400, f'Aba {aba!r} não encontrada')
+        with open(caminho, newline='', encoding='utf-8') as f:
+            return [linha for linha in csv.reader(f)]
+
+    def worksheet(self, aba):
+        self.cliente._chamar()
+        self._ler(aba)
+        return AbaLocal(self, aba)
+
+    def values_batch_get(self, ranges, params=None):
+        # Mesmo formato da API: intervalos só com o nome da aba trazem a aba toda
+        self.cliente._chamar()
+        return {'valueRanges': [{'range': intervalo, 'values': self._ler(intervalo.strip("'"))}
+                                for intervalo in ranges]}
+
+
+class AbaLocal:
+    def __init__(self, planilha, titulo):
+        self.planilha = planilha
+        self.title = titulo
+
+    def get_all_values(self):
+        self.planilha.cliente._chamar()
+        return self.planilha._ler(self.title)
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+from backendSQL import verificar_paridade
+from carregadorDados import ARQUIVOS
+from geradorOlist import gerar
+
+PEDIDOS = 3000
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    # O DuckDB grava o excedente em data/cache/duckdb relativo ao diretório atual
+    monkeypatch.chdir(tmp_path)
+    pasta = tmp_path / 'olist'
+    gerar(str(pasta), PEDIDOS, semente=7, pedidos_por_bloco=1000)
+    return pasta
+
+
+def separar_incremento(pasta, n_pedidos):
+    """Move os últimos `n_pedidos` pedidos (e seus clientes, itens e pagamentos) para arquivos de incremento."""
+    orders = pd.read_csv(pasta / ARQUIVOS['orders'])
+    novos = orders.tail(n_pedidos)
+    filtros = {'orders': ('order_id', novos['order_id']), 'customers': ('customer_id', novos['customer_id']),
+               'order_items': ('order_id', novos['order_id']), 'payments': ('order_id', novos['order_id'])}
+    for tabela, (coluna, ids) in filtros.items():
+        base = pasta / ARQUIVOS[tabela]
+        df = pd.read_csv(base)
+        incremento = df[coluna].isin(ids)
+        df[~incremento].to_csv(base, index=False)
+        df[incremento].to_csv(str(base)[:-len('.csv')] + '_2018-10-18.csv', index=False)
+
+
+def test_paridade_com_pandas(pasta):
+    assert verificar_paridade(str(pasta))
+
+
+def test_paridade_com_incrementos(pasta):
+    separar_incremento(pasta, 200)
+    assert os.path.exists(pasta / 'olist_orders_dataset_2018-10-18.csv')
+    assert verificar_paridade(str(pasta))
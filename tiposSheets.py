@@ -0,0 +1,126 @@
+import os
+import re
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+# --- ESQUEMAS ---
+# Tipo de cada coluna das abas. Colunas que não estão aqui (ex.: uma coluna nova
+# na planilha) têm o tipo inferido pelo nome em `tipo_da_coluna`.
+#   id        inteiro com vazios (Int64)
+#   inteiro   inteiro com vazios (Int64)
+#   decimal   decimal exato com ESCALAS[coluna] casas (decimal128 do Arrow)
+#   data      datetime64, só a data
+#   categoria categórica
+#   texto     texto
+ESQUEMAS = {
+    'pessoa': {'id_pessoa': 'id', 'nome': 'texto', 'email': 'texto', 'telefone': 'texto'},
+    'empresa': {'id_empresa': 'id', 'nome': 'texto', 'cnpj': 'texto', 'telefone': 'texto', 'email': 'texto',
+                'capital_social': 'inteiro', 'endereco': 'texto', 'area_empresa': 'categoria'},
+    'area_projeto': {'id_area': 'id', 'nome_area': 'texto'},
+    'servico': {'id_servico': 'id', 'titulo': 'texto', 'descricao': 'texto', 'valor': 'decimal',
+                'data_inicio': 'data', 'data_fim': 'data', 'status': 'categoria',
+                'id_area': 'id', 'id_pessoa': 'id', 'id_empresa': 'id'},
+    'despesa': {'id_despesa': 'id', 'descricao': 'texto', 'valor': 'decimal', 'data': 'data',
+                'categoria': 'categoria'},
+    'tributo': {'id_tributo': 'id', 'tipo': 'categoria', 'percentual': 'decimal', 'id_servico': 'id'},
+}
+# (precisão, casas decimais) das colunas decimais
+ESCALAS = {'valor': (16, 2), 'percentual': (9, 4)}
+ESCALA_PADRAO = (18, 4)
+
+_INTEIRO = re.compile(r'^-?\d+(\.0+)?$')       # aceita "9.0" de CSVs gravados como float
+_DECIMAL = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+class ErroEsquema(ValueError):
+    """Valores de uma aba que não podem ser convertidos para o tipo da coluna."""
+
+
+def tipo_da_coluna(aba, coluna):
+    tipo = ESQUEMAS.get(aba, {}).get(coluna)
+    if tipo:
+        return tipo
+    if coluna.startswith('id_'):
+        return 'id'
+    if coluna.startswith('data'):
+        return 'data'
+    if coluna in ESCALAS:
+        return 'decimal'
+    if coluna in ('status', 'categoria', 'tipo'):
+        return 'categoria'
+    return 'texto'
+
+
+def _normalizar_numero(serie):
+    # A planilha pode devolver valores formatados: "R$ 1.234,56", "17,1%"
+    serie = serie.str.replace(r'[R$%\s ]', '', regex=True)
+    com_virgula = serie.str.contains(',', regex=False, na=False)
+    serie = serie.where(~com_virgula, serie.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return serie
+
+
+def _verificar(aba, coluna, serie, validos):
+    invalidos = serie[serie.notna() & ~validos]
+    if len(invalidos):
+        exemplos = ', '.join(repr(v) for v in invalidos.unique()[:5])
+        raise ErroEsquema(f"{aba}.{coluna}: {len(invalidos)} valores inválidos ({exemplos})")
+
+
+def converter_coluna(aba, coluna, serie):
+    """Converte a coluna de texto `serie` para o tipo do esquema; vazio vira nulo."""
+    tipo = tipo_da_coluna(aba, coluna)
+    serie = serie.str.strip()
+    serie = serie.mask(serie == '')
+    if tipo in ('id', 'inteiro'):
+        serie = _normalizar_numero(serie)
+        _verificar(aba, coluna, serie, serie.str.match(_INTEIRO, na=False))
+        return pd.to_numeric(serie).astype('Int64')
+    if tipo == 'decimal':
+        serie = _normalizar_numero(serie)
+        _verificar(aba, coluna, serie, serie.str.match(_DECIMAL, na=False))
+        if not PARQUET_DISPONIVEL:
+            return pd.to_numeric(serie)
+        precisao, casas = ESCALAS.get(coluna, ESCALA_PADRAO)
+        try:
+            valores = pa.array(serie.astype(object).where(serie.notna(), None), type=pa.string())
+            return pd.Series(pd.arrays.ArrowExtensionArray(valores.cast(pa.decimal128(precisao, casas))),
+                             index=serie.index)
+        except pa.ArrowInvalid as erro:
+            raise ErroEsquema(f"{aba}.{coluna}: {erro}") from erro
+    if tipo == 'data':
+        # ISO (2019-02-19) ou o formato brasileiro da planilha (19/02/2019)
+        datas = pd.to_datetime(serie, format='%Y-%m-%d', errors='coerce')
+        datas = datas.fillna(pd.to_datetime(serie, format='%d/%m/%Y', errors='coerce'))
+        _verificar(aba, coluna, serie, datas.notna())
+        return datas
+    if tipo == 'categoria':
+        return serie.astype('category')
+    return serie
+
+
+def tipar(aba, linhas):
+    """DataFrame tipado a partir das linhas da aba (cabeçalho na primeira)."""
+    if not linhas:
+        return pd.DataFrame()
+    cabecalho, corpo = linhas[0], linhas[1:]
+    df = pd.DataFrame(corpo, columns=cabecalho, dtype=object)
+    return pd.DataFrame({coluna: converter_coluna(aba, coluna, df[coluna]) for coluna in cabecalho})
+
+
+def gravar_parquet(df, caminho):
+    temporario = caminho + '.tmp'
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def ler_parquet(caminho):
+    """Lê uma aba gravada por `gravar_parquet`, mantendo os decimais como decimal do Arrow."""
+    tabela = pq.read_table(caminho)
+    return tabela.to_pandas(types_mapper=lambda tipo: pd.ArrowDtype(tipo) if pa.types.is_decimal(tipo) else None)